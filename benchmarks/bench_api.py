@@ -0,0 +1,187 @@
+""" benchmark: end-to-end price pulls against a local mock server
+
+Measures conversion time, peak memory (tracemalloc), request count and wall time of
+'get_prices_single_asset' (10k and 100k bar responses) and 'get_prices_all_assets'
+(250 day time interval pulls for 50 epics), with a configurable server latency.
+
+run from the repository root:
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --epics 10 --days 50 --latency 0.02 --max-workers 8
+    python -m benchmarks.bench_api --fixtures benchmarks/fixtures --json results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+from ig_trading_historical_data import IG_API, RateLimiter
+from ig_trading_historical_data.conversion import prices_to_dataframe
+from benchmarks.payloads import load_or_make_fixture, make_prices_payload, make_time_interval_payloads
+from tests.mock_server import MockServer
+
+
+EPIC = "CS.D.GBPUSD.TODAY.IP"
+
+
+def make_api(url_base):
+    """ IG_API instance talking to the mock server (no login, no rate limiting) """
+    ig_api = IG_API.from_session(
+        {
+            "demo": 1,
+            "api_key": "bench_api_key",
+            "token_cst": "bench_CST",
+            "token_x_security_token": "bench_X-SECURITY-TOKEN",
+            "acc_info": {"lightstreamerEndpoint": "", "timezoneOffset": 0},
+        },
+        rate_limiter=RateLimiter(),
+    )
+    ig_api.url_base = url_base
+
+    return ig_api
+
+
+def measure(func):
+    """
+    run func twice: untraced for the wall time (s), then traced for the
+    peak memory (MB, tracemalloc slows the run down)
+    """
+    # silence printed output (i.e. error blocks)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - start
+
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return result, wall, peak / 1024**2
+
+
+def fixture_path(fixtures, name):
+    return None if fixtures is None else os.path.join(fixtures, f"{name}.json")
+
+
+def bench_single_asset(n_points, latency, fixtures):
+    """ 1 num_points request of n_points bars """
+    payload = load_or_make_fixture(
+        fixture_path(fixtures, f"prices_{n_points}"), make_prices_payload, n_points
+    )
+    body = json.dumps(payload).encode()
+
+    # conversion alone
+    _, conversion, _ = measure(lambda: prices_to_dataframe(payload["prices"]))
+
+    routes = {f"/prices/{EPIC}/MINUTE/{n_points}": (200, body)}
+
+    with MockServer(routes, latency) as server:
+        ig_api = make_api(server.url_base)
+
+        (prices, _, _), wall, peak = measure(
+            lambda: ig_api.get_prices_single_asset(EPIC, "MINUTE", "num_points", num_points=n_points)
+        )
+
+        assert len(prices) == n_points
+        requests = len(server.paths) // 2  # measure() runs twice
+
+    return {
+        "name": f"get_prices_single_asset {n_points:,} bars",
+        "conversion_s": conversion,
+        "wall_s": wall,
+        "peak_mb": peak,
+        "requests": requests,
+    }
+
+
+def bench_all_assets(n_epics, n_days, latency, max_workers, fixtures):
+    """ time interval pull (10:00-10:30, MINUTE_5) over n_days weekdays for n_epics epics """
+    days = [d.strftime("%Y-%m-%d") for d in pd.bdate_range("2024-01-01", periods=n_days)]
+
+    payloads = load_or_make_fixture(
+        fixture_path(fixtures, f"time_interval_{n_days}d"), make_time_interval_payloads, days
+    )
+    bodies = {day: json.dumps(payload).encode() for day, payload in payloads.items()}
+
+    # all epics get the same bars (1 route callable parses the day from the path)
+    def route(path):
+        day = path.rsplit("/", 2)[1].split()[0]
+        return 200, bodies[day]
+
+    epics = [f"CS.D.BENCH{i:03d}.TODAY.IP" for i in range(n_epics)]
+    routes = {
+        f"/prices/{epic}/MINUTE_5/{day} 10:00:00/{day} 10:30:00": route
+        for epic in epics
+        for day in days
+    }
+
+    # conversion alone (all responses)
+    _, conversion, _ = measure(
+        lambda: [prices_to_dataframe(payloads[day]["prices"]) for _ in epics for day in days]
+    )
+
+    with MockServer(routes, latency) as server:
+        ig_api = make_api(server.url_base)
+
+        assets = {epic: {"epic": epic} for epic in epics}
+
+        (assets, _), wall, peak = measure(
+            lambda: ig_api.get_prices_all_assets(
+                assets,
+                "MINUTE_5",
+                "dates",
+                days[0] + " 10:00:00",
+                days[-1] + " 10:30:00",
+                weekdays=(0, 1, 2, 3, 4),
+                max_workers=max_workers,
+            )
+        )
+
+        assert all(len(d["prices"]) == 7 * n_days for d in assets.values())
+        requests = len(server.paths) // 2  # measure() runs twice
+
+    return {
+        "name": f"get_prices_all_assets {n_epics} epics x {n_days} days",
+        "conversion_s": conversion,
+        "wall_s": wall,
+        "peak_mb": peak,
+        "requests": requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--epics", type=int, default=50)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--latency", type=float, default=0.005, help="server latency per request (s)")
+    parser.add_argument("--max-workers", type=int, default=16, help="threads of get_prices_all_assets")
+    parser.add_argument("--fixtures", default=None, help="replay/record payloads in this directory")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [
+        bench_single_asset(10_000, args.latency, args.fixtures),
+        bench_single_asset(100_000, args.latency, args.fixtures),
+        bench_all_assets(args.epics, args.days, args.latency, args.max_workers, args.fixtures),
+    ]
+
+    print(f"{'benchmark':<45} {'conversion (s)':>15} {'wall (s)':>9} {'peak (MB)':>10} {'requests':>9}")
+    for r in results:
+        print(
+            f"{r['name']:<45} {r['conversion_s']:>15.3f} {r['wall_s']:>9.3f} "
+            f"{r['peak_mb']:>10.1f} {r['requests']:>9}"
+        )
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+""" benchmark: JSON-to-DataFrame conversion of the 'prices' payload
+
+run from the repository root:
+    python -m benchmarks.bench_conversion
+"""
+
+import time
+
+import pandas as pd
+
+from ig_trading_historical_data.conversion import prices_to_dataframe
+from benchmarks.payloads import make_prices_payload
+
+
+def legacy_prices_to_dataframe(prices_historical: list) -> pd.DataFrame:
+    """ former conversion: nested loops, pd.to_datetime per row, 4 frames + concat """
+    price_types = ["openPrice", "highPrice", "lowPrice", "closePrice"]
+    last_traded_volume = []
+    snapshot_times = []
+    i = 0
+
+    prices = {
+        "bid": {k: [] for k in price_types},
+        "ask": {k: [] for k in price_types},
+    }
+
+    for k in prices:
+        for t in prices_historical:
+            for p_type in price_types:
+                prices[k][p_type].append(t[p_type][k])
+
+            if i == 0:
+                last_traded_volume.append(t["lastTradedVolume"])
+                snapshot_times.append(pd.to_datetime(t["snapshotTime"]))
+
+        prices[k] = pd.DataFrame(data=prices[k], index=snapshot_times)
+
+        i += 1
+
+    prices["mid"] = (prices["bid"][price_types] + prices["ask"][price_types]) / 2
+    prices["spread"] = prices["ask"][price_types] - prices["bid"][price_types]
+
+    for k in prices:
+        prices[k].columns = prices[k].columns.str.replace("Price", f"_px_{k}")
+
+    prices = pd.concat([prices[k] for k in prices], axis=1)
+    prices["last_traded_volume"] = last_traded_volume
+
+    return prices
+
+
+def best_of(func, arg, repeat=3):
+    """ best wall time (seconds) of 'repeat' runs """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'points':>8} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+
+    for n_points in [1_000, 10_000, 100_000]:
+        prices_historical = make_prices_payload(n_points)["prices"]
+
+        # single run of the (slow) legacy path
+        start = time.perf_counter()
+        legacy_prices = legacy_prices_to_dataframe(prices_historical)
+        legacy = time.perf_counter() - start
+
+        # both paths must produce the identical frame
+        pd.testing.assert_frame_equal(prices_to_dataframe(prices_historical), legacy_prices)
+
+        vectorized = best_of(prices_to_dataframe, prices_historical)
+
+        print(f"{n_points:>8} {legacy:>11.3f} {vectorized:>15.3f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
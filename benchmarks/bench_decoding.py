@@ -0,0 +1,60 @@
+""" benchmark: decoding + conversion of the 'prices' response body per JSON decoder
+
+run from the repository root:
+    python -m benchmarks.bench_decoding
+"""
+
+import json
+import time
+
+import pandas as pd
+
+from ig_trading_historical_data.conversion import prices_to_dataframe
+from ig_trading_historical_data.decoding import _orjson, _typed_decoder, decode_prices
+from benchmarks.payloads import make_prices_payload
+
+
+def decode_and_convert(content: bytes, decoder: str) -> pd.DataFrame:
+    """ body > DataFrame as in 'get_prices_single_asset' """
+    return prices_to_dataframe(decode_prices(content, decoder)["prices"])
+
+
+def best_of(func, *args, repeat=5):
+    """ best wall time (seconds) of 'repeat' runs """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    decoders = ["json"]
+    if _orjson() is not None:
+        decoders.append("orjson")
+    if _typed_decoder() is not None:
+        decoders.append("msgspec")
+
+    print(f"{'points':>8} {'decoder':>8} {'decode (s)':>11} {'+ convert (s)':>14} {'speedup':>8}")
+
+    for n_points in [1_000, 10_000, 100_000]:
+        content = json.dumps(make_prices_payload(n_points)).encode()
+
+        expected = decode_and_convert(content, "json")
+        baseline = best_of(decode_and_convert, content, "json")
+
+        for decoder in decoders:
+            # every decoder must produce the identical frame
+            pd.testing.assert_frame_equal(decode_and_convert(content, decoder), expected)
+
+            decode = best_of(decode_prices, content, decoder)
+            total = best_of(decode_and_convert, content, decoder)
+
+            print(
+                f"{n_points:>8} {decoder:>8} {decode:>11.4f} {total:>14.4f} {baseline / total:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
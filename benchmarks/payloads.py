@@ -0,0 +1,111 @@
+""" generate (or replay recorded) realistic 'prices' endpoint payloads for benchmarks """
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def make_prices_payload(
+    n_points: int,
+    start: str = "2024-01-08 00:00:00",
+    freq: str = "1min",
+    seed: int = 0,
+) -> dict:
+    """
+    Build a 'prices' response (version 2 layout) with n_points random-walk bars.
+
+    ---
+    Args:
+        * n_points (int): number of bars
+        * start (str): snapshotTime of the first bar
+        * freq (str): pandas frequency between bars
+        * seed (int): random seed
+    ---
+    Returns:
+        * dict: {'prices': [...], 'instrumentType': ..., 'metadata': ..., 'allowance': ...}
+    """
+    rng = np.random.default_rng(seed)
+
+    close = 12700 + np.cumsum(rng.normal(0, 2, n_points)).round(1)
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 3, n_points).round(1)
+    low = np.minimum(open_, close) - rng.uniform(0, 3, n_points).round(1)
+    spread = rng.choice([9.9, 10.5], n_points)
+    volume = rng.integers(100, 1000, n_points)
+    times = pd.date_range(start, periods=n_points, freq=freq).strftime("%Y/%m/%d %H:%M:%S")
+
+    def px(bid, i):
+        return {"bid": float(bid[i]), "ask": round(float(bid[i] + spread[i]), 1), "lastTraded": None}
+
+    prices = [
+        {
+            "snapshotTime": times[i],
+            "openPrice": px(open_, i),
+            "closePrice": px(close, i),
+            "highPrice": px(high, i),
+            "lowPrice": px(low, i),
+            "lastTradedVolume": int(volume[i]),
+        }
+        for i in range(n_points)
+    ]
+
+    return {
+        "prices": prices,
+        "instrumentType": "CURRENCIES",
+        "metadata": {"allowance": {}, "size": n_points},
+        "allowance": {
+            "remainingAllowance": 10000 - n_points,
+            "totalAllowance": 10000,
+            "allowanceExpiry": 604800,
+        },
+    }
+
+
+def make_time_interval_payloads(
+    days: list,
+    time_start: str = "10:00:00",
+    time_end: str = "10:30:00",
+    freq: str = "5min",
+    seed: int = 0,
+) -> dict:
+    """
+    Build 1 'prices' response per day of a time interval pull.
+
+    ---
+    Args:
+        * days (list[str]): yyyy-MM-dd days
+        * time_start (str): HH:mm:ss first bar of each day
+        * time_end (str): HH:mm:ss last bar of each day (inclusive)
+        * freq (str): pandas frequency between bars
+        * seed (int): random seed
+    ---
+    Returns:
+        * dict: day to response
+    """
+    n_points = len(pd.date_range(f"2024-01-01 {time_start}", f"2024-01-01 {time_end}", freq=freq))
+
+    return {
+        day: make_prices_payload(n_points, f"{day} {time_start}", freq, seed + i)
+        for i, day in enumerate(days)
+    }
+
+
+def load_or_make_fixture(path: str, make, *args, **kwargs):
+    """
+    Replay the payload recorded at 'path' (JSON), or make it with
+    make(*args, **kwargs) and record it there (path None: never recorded).
+    """
+    if path is not None and os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    payload = make(*args, **kwargs)
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(payload, f)
+
+    return payload
@@ -1,2 +1,20 @@
 # expose api class at the top level
 from .ig_trading_historical_data import IG_API
+from .async_api import AsyncIG_API
+from .transport import HTTPTransport
+from .rate_limit import (
+    RateLimiter,
+    FixedIntervalLimiter,
+    TokenBucketLimiter,
+    AdaptiveRateLimiter,
+)
+from .cache import PriceCache
+from .planning import AllowanceExceededError, AllowanceTracker
+from .epic_cache import EpicCache
+from .streaming import CandleAssembler, LightstreamerClient
+from .export import ParquetStore
+from .metrics import MetricsSink, CallbackSink, PrometheusSink, OpenTelemetrySink
+from .jobs import PriceJob
+from .coalesce import RequestCoalescer
+from .sharding import ShardedFetcher
+from .lazy import LazyAsset, LazyPrices
@@ -0,0 +1,392 @@
+""" this module contains the AsyncIG_API class, the asyncio counterpart of IG_API."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import asyncio
+import time
+
+from .ig_trading_historical_data import IG_API
+from .rate_limit import is_rate_limited
+from .transport import HTTPTransport, transport_retries
+
+
+# ------------------------------------------------------------------
+# async function definitions
+# ------------------------------------------------------------------
+def _check_no_coalescer(kwargs: dict) -> None:
+    """
+    Raise a ValueError if a RequestCoalescer is given: the concurrent requests
+    of AsyncIG_API are not routed through it, so it would be silently unused.
+    """
+    if kwargs.get("coalescer") is not None:
+        raise ValueError(
+            "AsyncIG_API does not support 'coalescer': use IG_API to share in-flight requests"
+        )
+
+
+# ------------------------------------------------------------------
+# API class definition
+# ------------------------------------------------------------------
+class AsyncIG_API(IG_API):
+    """
+    asyncio counterpart of IG_API: same constructor and method names, but the
+    methods sending requests are coroutines.
+
+    Assets and the days of a time interval are fetched concurrently,
+    bounded by the shared rate limiter and by 'max_concurrency' requests in flight.
+    Requests are sent through the pooled (blocking) transport in worker threads,
+    so the same transports, rate limiters and conversion as IG_API are used
+    and the returned DataFrames are identical.
+
+    'sync' and 'save_prices' are coroutines and 'iter_prices' and 'stream_candles'
+    async generators running the blocking IG_API versions in worker threads.
+    """
+
+    # max number of requests in flight at any time
+    max_concurrency = 10
+
+    def __init__(
+        self,
+        demo: int,
+        username: str,
+        pw: str,
+        api_key: str,
+        max_concurrency: int = 10,
+        **kwargs,
+    ) -> None:
+        """
+        Log into the IG REST API (blocking).
+
+        ---
+        Args:
+            * demo, username, pw, api_key: see IG_API
+            * max_concurrency (int, default=10): max number of requests in flight
+            (the default transport keeps as many connections alive)
+            * **kwargs: other keyword arguments of IG_API (transport, rate_limiter, ...)
+        ---
+        Raises:
+            * ValueError: if a 'coalescer' is given (not supported by the async requests)
+        """
+        _check_no_coalescer(kwargs)
+
+        self.max_concurrency = max_concurrency
+
+        if kwargs.get("transport") is None:
+            kwargs["transport"] = HTTPTransport(pool_maxsize=max_concurrency)
+
+        super().__init__(demo, username, pw, api_key, **kwargs)
+
+    @classmethod
+    def from_session(
+        cls,
+        session,
+        username: str = None,
+        pw: str = None,
+        max_concurrency: int = 10,
+        **kwargs,
+    ):
+        """
+        Create an instance from a saved session, without logging in
+        (see IG_API.from_session and __init__ for the arguments).
+        """
+        _check_no_coalescer(kwargs)
+
+        if kwargs.get("transport") is None:
+            kwargs["transport"] = HTTPTransport(pool_maxsize=max_concurrency)
+
+        self = super().from_session(session, username, pw, **kwargs)
+        self.max_concurrency = max_concurrency
+
+        return self
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """
+        Semaphore capping the requests in flight (1 per running event loop).
+        """
+        loop = asyncio.get_running_loop()
+
+        if getattr(self, "_semaphore_loop", None) is not loop:
+            self._semaphore_loop = loop
+            self._semaphore_obj = asyncio.Semaphore(self.max_concurrency)
+
+        return self._semaphore_obj
+
+    async def _request_async(
+        self,
+        method: str,
+        url: str,
+        header: dict,
+        relogin: int = 1,
+        **kwargs,
+    ):
+        """
+        Coroutine version of IG_API._request: wait for a rate limiter slot
+        without blocking the event loop, then send the request in a worker thread.
+        On a 401 response (session tokens expired) it logs in again and retries once.
+
+        ---
+        Returns:
+            * requests.Response: response of the last attempt
+        """
+        send = self.transport.post if method == "POST" else self.transport.get
+
+        async with self._semaphore():
+            wait = 0.0
+            retries = 0
+            for attempt in range(self.rate_limit_retries + 1):
+                delay = self.rate_limiter.reserve()
+                await asyncio.sleep(delay)
+                wait += delay
+
+                timer_start = time.perf_counter()
+                r = await asyncio.to_thread(send, url=url, headers=header, **kwargs)
+                latency = time.perf_counter() - timer_start
+
+                retries += transport_retries(r)
+                self.rate_limiter.update(r.status_code, r.content)
+
+                if not is_rate_limited(r.status_code, r.content):
+                    break
+
+        self._record_request(method, url, r, latency, attempt + retries, wait)
+
+        if r.status_code == 401 and relogin:
+            header = await asyncio.to_thread(self._refresh_session, header)
+
+            if header is not None:
+                return await self._request_async(method, url, header, relogin=0, **kwargs)
+
+        return r
+
+    async def get_watchlist(
+        self,
+    ) -> dict:
+        """
+        Coroutine version of IG_API.get_watchlist.
+        """
+        r = await self._request_async("GET", f"{self.url_base}/watchlists", self.header_base)
+
+        return r.json()
+
+    async def get_market_search(
+        self,
+        search_term: str = None,
+    ) -> dict:
+        """
+        Coroutine version of IG_API.get_market_search.
+        """
+        url = f"{self.url_base}/markets?searchTerm={search_term}"
+
+        r = await self._request_async("GET", url, self.header_base)
+
+        return r.json()
+
+    async def get_epics(self, assets: dict) -> dict:
+        """
+        Coroutine version of IG_API.get_epics (all market searches run concurrently,
+        only for the assets not in the epic cache if the instance has one).
+        """
+        misses = []
+        for asset_name, d in assets.items():
+            epic = None
+            if self.epic_cache is not None:
+                epic = self.epic_cache.get(d["instrument_name"], d["expiry"])
+
+            if epic is None:
+                misses.append(asset_name)
+            else:
+                assets[asset_name]["epic"] = epic
+
+        searches = await asyncio.gather(
+            *[self.get_market_search(asset_name) for asset_name in misses]
+        )
+
+        for asset_name, market_search_dict in zip(misses, searches):
+            if self.epic_cache is not None:
+                self.epic_cache.put_markets(market_search_dict)
+
+            assets[asset_name]["epic"] = self.find_asset_epic_or_info(
+                market_search_dict,
+                assets[asset_name]["instrument_name"],
+                assets[asset_name]["expiry"],
+                epic_only=1,
+            )
+
+        return assets
+
+    async def get_prices_single_asset(
+        self,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> tuple:
+        """
+        Coroutine version of IG_API.get_prices_single_asset
+        (all days of a time interval are requested concurrently).
+        """
+        requests, date_ranges = await asyncio.to_thread(
+            self._plan_price_requests,
+            epic, resolution, range_type, start_date, end_date, weekdays, num_points, resample=1,
+        )
+
+        header = self.header_base.copy()
+        header["Version"] = "2"
+
+        # timings are recorded in the instance's metrics sink
+        responses = await asyncio.gather(
+            *[self._request_async("GET", url, header) for url, _ in requests]
+        )
+
+        # initialize list for loop
+        results = []
+        failed = None
+
+        # responses are kept in request order
+        for (_, date_range), r in zip(requests, responses):
+            if r.status_code != 200:
+                failed = failed or r
+                continue
+
+            results.append((date_range, self._decode_prices(r)))
+
+        # function exit if error
+        if failed is not None:
+            print("----------------------")
+            print("ERROR OCCURED")
+            print("----------------------")
+            print(f"STATUS CODE: {failed.status_code}")
+            print()
+
+            # all requests were sent at once: keep every range received,
+            # a retry only fetches the failed ones
+            if self.cache is not None and date_ranges is not None:
+                await asyncio.to_thread(self._cache_results, epic, resolution, results)
+
+            return failed.content
+
+        # convert (and cache) the responses off the event loop
+        return await asyncio.to_thread(
+            self._collect_prices, epic, resolution, date_ranges, results
+        )
+
+    async def get_prices_all_assets(
+        self,
+        assets: dict,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> tuple[dict]:
+        """
+        Coroutine version of IG_API.get_prices_all_assets (all assets are fetched
+        concurrently; 'allowance' is the one returned for the last asset in 'assets'
+        fetched successfully).
+
+        As with max_workers in IG_API, a failed asset does not abort the batch:
+        the exception (ValueError with the response content for a failed request)
+        is stored under the asset's 'error' key instead of 'prices' and 'instrument_type'.
+        """
+        results = await asyncio.gather(
+            *[
+                self.get_prices_single_asset(
+                    assets[asset]["epic"],
+                    resolution,
+                    range_type,
+                    start_date,
+                    end_date,
+                    weekdays,
+                    num_points,
+                )
+                for asset in assets
+            ],
+            return_exceptions=True,
+        )
+
+        allowance = None
+
+        for asset, result in zip(assets, results):
+            if isinstance(result, Exception):
+                assets[asset]["error"] = result
+                continue
+
+            # error response content is returned instead of the tuple
+            if not isinstance(result, tuple):
+                assets[asset]["error"] = ValueError(result)
+                continue
+
+            prices, allowance, instrument_type = result
+
+            assets[asset]["prices"] = prices
+            assets[asset]["instrument_type"] = instrument_type
+
+        return assets, allowance
+
+    def lazy_prices(self, *args, **kwargs):
+        """
+        Not available on AsyncIG_API: the lazy accessors fetch on attribute access,
+        which cannot await the coroutine 'get_prices_single_asset'.
+
+        ---
+        Raises:
+            * TypeError: always (use IG_API.lazy_prices, or await
+            'get_prices_single_asset' / 'get_prices_all_assets')
+        """
+        raise TypeError(
+            "lazy_prices needs the blocking IG_API: the lazy accessors cannot await "
+            "AsyncIG_API.get_prices_single_asset"
+        )
+
+    # ------------------------------------------------------------------
+    # blocking IG_API methods, run in worker threads
+    # ------------------------------------------------------------------
+    async def _iterate_in_thread(self, iterator):
+        """
+        Yield the items of a blocking iterator, each one fetched in a worker thread.
+        """
+        done = object()
+
+        try:
+            while True:
+                item = await asyncio.to_thread(next, iterator, done)
+
+                if item is done:
+                    return
+
+                yield item
+        finally:
+            await asyncio.to_thread(iterator.close)
+
+    async def iter_prices(self, *args, **kwargs):
+        """
+        Async generator version of IG_API.iter_prices (same arguments): the
+        requests and conversions run in worker threads, 1 chunk at a time.
+        """
+        async for chunk in self._iterate_in_thread(super().iter_prices(*args, **kwargs)):
+            yield chunk
+
+    async def save_prices(self, *args, **kwargs) -> tuple:
+        """
+        Coroutine version of IG_API.save_prices (runs in a worker thread).
+        """
+        return await asyncio.to_thread(super().save_prices, *args, **kwargs)
+
+    async def sync(self, *args, **kwargs) -> tuple:
+        """
+        Coroutine version of IG_API.sync (runs in a worker thread).
+        """
+        return await asyncio.to_thread(super().sync, *args, **kwargs)
+
+    async def stream_candles(self, *args, **kwargs):
+        """
+        Async generator version of IG_API.stream_candles (same arguments): the
+        streaming connection is read in worker threads.
+        """
+        async for candle in self._iterate_in_thread(super().stream_candles(*args, **kwargs)):
+            yield candle
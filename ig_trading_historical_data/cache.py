@@ -0,0 +1,417 @@
+""" this module contains the PriceCache class, a local on-disk (SQLite) store of fetched prices."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .conversion import frame_from_columns
+
+
+# ------------------------------------------------------------------
+# cache inputs
+# ------------------------------------------------------------------
+# smallest time step of the 'prices' URL (dates are given to the second)
+ONE_SECOND = 1_000_000_000  # ns
+
+# intervals ending less than this long ago may still change (open periods)
+# (1 day also covers any difference between the account timezone and UTC)
+RECENT = 24 * 3600 * ONE_SECOND  # ns
+
+# stored raw fields, rebuilt into the 17 column DataFrame on read
+BAR_FIELDS = [
+    "open_bid", "high_bid", "low_bid", "close_bid",
+    "open_ask", "high_ask", "low_ask", "close_ask",
+    "volume",
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS bars (
+    epic TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    {", ".join(f"{field} REAL" for field in BAR_FIELDS)},
+    PRIMARY KEY (epic, resolution, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    epic TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_range ON coverage (epic, resolution, start);
+
+CREATE TABLE IF NOT EXISTS instruments (
+    epic TEXT PRIMARY KEY,
+    instrument_type TEXT
+);
+"""
+
+
+def to_ns(date: str) -> int:
+    """
+    Convert 'yyyy-MM-dd HH:mm:ss' (or any Timestamp) to int ns since epoch (naive).
+    """
+    return pd.Timestamp(date).value
+
+
+def to_date_str(ns: int) -> str:
+    """
+    Convert int ns since epoch to 'yyyy-MM-dd HH:mm:ss' (as used in the 'prices' URL).
+    """
+    return pd.Timestamp(ns).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def uncovered(
+    covered: list,
+    start: int,
+    end: int,
+) -> list[tuple[int]]:
+    """
+    Return the gaps of [start, end] (int ns, inclusive) between the covered
+    (start, end) ranges, sorted by start.
+    """
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - ONE_SECOND))
+        cursor = max(cursor, covered_end + ONE_SECOND)
+
+    if cursor <= end:
+        gaps.append((cursor, end))
+
+    return [(s, e) for s, e in gaps if s <= e]
+
+
+# ------------------------------------------------------------------
+# cache class definition
+# ------------------------------------------------------------------
+class PriceCache:
+    """
+    Local on-disk store of fetched prices (1 SQLite file), keyed by epic,
+    resolution and time.
+
+    Besides the bars it records which time ranges were already fetched
+    ('coverage'), so only the missing ranges are requested from the API
+    (a fetched range without bars, i.e. a weekend, is not requested again).
+
+    Eviction (applied after every write):
+        * max_age: ranges fetched more than max_age seconds ago are dropped
+        * max_bytes: least recently used ranges are dropped until the
+        store is smaller than max_bytes
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = None,
+        max_age: float = None,
+        clock=time.time,
+    ) -> None:
+        """
+        Open (or create) the cache file.
+
+        ---
+        Args:
+            * path (str): SQLite file path (':memory:' for a throwaway cache)
+            * max_bytes (int, opt.): max size of the stored data in bytes
+                * defaults to None (no size limit)
+            * max_age (float, opt.): max age of fetched ranges in seconds
+                * defaults to None (historical bars never change)
+            * clock (callable, opt.): current time in seconds since epoch
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the cache file.
+        """
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def missing(
+        self,
+        epic: str,
+        resolution: str,
+        start_date: str,
+        end_date: str,
+    ) -> list[tuple[str]]:
+        """
+        Return the parts of [start_date, end_date] not fetched yet.
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * start_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+            * end_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+        ---
+        Returns:
+            * list[tuple[str]]: (start_date, end_date) of each missing range (inclusive)
+        """
+        start, end = to_ns(start_date), to_ns(end_date)
+
+        with self.lock:
+            covered = self.conn.execute(
+                "SELECT start, end FROM coverage "
+                "WHERE epic = ? AND resolution = ? AND end >= ? AND start <= ? "
+                "ORDER BY start",
+                (epic, resolution, start, end),
+            ).fetchall()
+
+        return [(to_date_str(s), to_date_str(e)) for s, e in uncovered(covered, start, end)]
+
+    def write(
+        self,
+        epic: str,
+        resolution: str,
+        prices: pd.DataFrame,
+        start_date: str,
+        end_date: str,
+        instrument_type: str = None,
+        complete: int = 0,
+    ) -> None:
+        """
+        Store the bars fetched for [start_date, end_date] and mark the range as fetched.
+
+        A range ending less than a day ago is only marked as fetched up to
+        (excluding) its last bar, which may still change (unless 'complete').
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * prices (DataFrame): 17 column prices of the range
+            * start_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+            * end_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+            * instrument_type (str, opt.): e.g. CURRENCIES
+            * complete (int, default=0):
+                * 1: all bars of the range are final (i.e. completed live candles),
+                the whole range is marked as fetched
+                * 0: the last bar of a recent range may still change
+        """
+        start, end = to_ns(start_date), to_ns(end_date)
+        now = self.clock()
+
+        ts = prices.index.values.astype("datetime64[ns]").astype(np.int64)
+        values = prices[
+            [
+                "open_px_bid", "high_px_bid", "low_px_bid", "close_px_bid",
+                "open_px_ask", "high_px_ask", "low_px_ask", "close_px_ask",
+                "last_traded_volume",
+            ]
+        ].to_numpy(dtype=np.float64)
+
+        # open period: the last bar may still change
+        if not complete and end >= int(now * ONE_SECOND) - RECENT:
+            end = min(end, int(ts[-1]) - 1) if len(ts) else start - 1
+
+        rows = [
+            (epic, resolution, int(t), *[None if np.isnan(v) else float(v) for v in row])
+            for t, row in zip(ts, values)
+        ]
+
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO bars VALUES ({', '.join('?' * (3 + len(BAR_FIELDS)))})",
+                rows,
+            )
+
+            if start <= end:
+                self.conn.execute(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+                    (epic, resolution, start, end, now, now),
+                )
+
+            if instrument_type is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO instruments VALUES (?, ?)",
+                    (epic, instrument_type),
+                )
+
+        self.evict()
+
+    def read(
+        self,
+        epic: str,
+        resolution: str,
+        start_date: str = None,
+        end_date: str = None,
+    ) -> pd.DataFrame:
+        """
+        Return the stored prices within [start_date, end_date].
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * start_date (str, opt.): yyyy-MM-dd HH:mm:ss (inclusive)
+                * defaults to None (from the first stored bar)
+            * end_date (str, opt.): yyyy-MM-dd HH:mm:ss (inclusive)
+                * defaults to None (until the last stored bar)
+        ---
+        Returns:
+            * DataFrame: 17 columns indexed by snapshot time
+        """
+        start = np.iinfo(np.int64).min if start_date is None else to_ns(start_date)
+        end = np.iinfo(np.int64).max if end_date is None else to_ns(end_date)
+
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                f"SELECT ts, {', '.join(BAR_FIELDS)} FROM bars "
+                "WHERE epic = ? AND resolution = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (epic, resolution, int(start), int(end)),
+            ).fetchall()
+
+            self.conn.execute(
+                "UPDATE coverage SET last_used = ? "
+                "WHERE epic = ? AND resolution = ? AND end >= ? AND start <= ?",
+                (self.clock(), epic, resolution, int(start), int(end)),
+            )
+
+        ts = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        values = np.array([r[1:] for r in rows], dtype=np.float64).reshape(-1, len(BAR_FIELDS))
+
+        return frame_from_columns(
+            values[:, 0:4],
+            values[:, 4:8],
+            values[:, 8],
+            pd.DatetimeIndex(ts.astype("datetime64[ns]")),
+        )
+
+    def stored_range(
+        self,
+        epic: str,
+        resolution: str,
+    ) -> tuple[str]:
+        """
+        Return the first and last date of the fetched ranges of an epic and resolution.
+
+        ---
+        Returns:
+            * tuple[str]: (start_date, end_date), or None if nothing is stored
+        """
+        with self.lock:
+            start, end = self.conn.execute(
+                "SELECT MIN(start), MAX(end) FROM coverage WHERE epic = ? AND resolution = ?",
+                (epic, resolution),
+            ).fetchone()
+
+        return None if start is None else (to_date_str(start), to_date_str(end))
+
+    def instrument_type(self, epic: str) -> str:
+        """
+        Return the stored instrument type of an epic (None if unknown).
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT instrument_type FROM instruments WHERE epic = ?", (epic,)
+            ).fetchone()
+
+        return None if row is None else row[0]
+
+    def size(self) -> int:
+        """
+        Return the size of the stored data in bytes.
+        """
+        with self.lock:
+            page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            freelist_count = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+
+        return (page_count - freelist_count) * page_size
+
+    def _drop_range(
+        self,
+        rowid: int,
+        epic: str,
+        resolution: str,
+        start: int,
+        end: int,
+    ) -> None:
+        """
+        Drop 1 fetched range and its bars, except the bars other fetched
+        (i.e. overlapping, fetched again later) ranges still cover (caller holds the lock).
+        """
+        self.conn.execute("DELETE FROM coverage WHERE rowid = ?", (rowid,))
+
+        covered = self.conn.execute(
+            "SELECT start, end FROM coverage "
+            "WHERE epic = ? AND resolution = ? AND end >= ? AND start <= ? "
+            "ORDER BY start",
+            (epic, resolution, start, end),
+        ).fetchall()
+
+        self.conn.executemany(
+            "DELETE FROM bars WHERE epic = ? AND resolution = ? AND ts BETWEEN ? AND ?",
+            [(epic, resolution, s, e) for s, e in uncovered(covered, start, end)],
+        )
+
+    def evict(self) -> None:
+        """
+        Drop ranges older than max_age, then least recently used ranges
+        until the store is smaller than max_bytes.
+        """
+        if self.max_age is not None:
+            with self.lock, self.conn:
+                expired = self.conn.execute(
+                    "SELECT rowid, epic, resolution, start, end FROM coverage "
+                    "WHERE fetched_at < ?",
+                    (self.clock() - self.max_age,),
+                ).fetchall()
+
+                for row in expired:
+                    self._drop_range(*row)
+
+        if self.max_bytes is not None:
+            while self.size() > self.max_bytes:
+                with self.lock, self.conn:
+                    row = self.conn.execute(
+                        "SELECT rowid, epic, resolution, start, end FROM coverage "
+                        "ORDER BY last_used LIMIT 1"
+                    ).fetchone()
+
+                    if row is None:
+                        break
+
+                    self._drop_range(*row)
+
+    def clear(
+        self,
+        epic: str = None,
+        resolution: str = None,
+    ) -> None:
+        """
+        Drop all stored data (of an epic and/or resolution if given).
+        """
+        where = " AND ".join(
+            f"{k} = ?" for k, v in [("epic", epic), ("resolution", resolution)] if v is not None
+        )
+        params = [v for v in (epic, resolution) if v is not None]
+
+        with self.lock, self.conn:
+            for table in ("bars", "coverage"):
+                self.conn.execute(
+                    f"DELETE FROM {table}" + (f" WHERE {where}" if where else ""), params
+                )
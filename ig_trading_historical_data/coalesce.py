@@ -0,0 +1,444 @@
+""" this module contains the RequestCoalescer class, sharing overlapping 'prices' requests between callers."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from .conversion import PRICE_TYPES, SNAPSHOT_TIME_FORMAT, VOLUME_COLUMN, PriceBars, join_points
+from .planning import DATE_FORMAT, ONE_SECOND
+
+
+# ------------------------------------------------------------------
+# coalescing inputs
+# ------------------------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# response price type > column prefix, i.e. 'openPrice' > 'open_px'
+PRICE_TYPE_COLUMNS = {p_type: p_type.replace("Price", "_px") for p_type in PRICE_TYPES}
+
+
+# ------------------------------------------------------------------
+# coalescing function definitions
+# ------------------------------------------------------------------
+def _time_key(item: dict) -> str:
+    """
+    Return the snapshotTime of a price point as yyyy-MM-dd HH:mm:ss
+    (comparable as a string with the date ranges).
+    """
+    return item["snapshotTime"].replace("/", "-")
+
+
+def _subtract_ranges(
+    start: str,
+    end: str,
+    taken: list,
+) -> list[tuple[str]]:
+    """
+    Return the parts of [start, end] not covered by the 'taken' (start, end, ...) ranges.
+    """
+    gaps = []
+    cursor = pd.Timestamp(start)
+
+    for taken_start, taken_end, _ in sorted(taken, key=lambda t: t[0]):
+        taken_start, taken_end = pd.Timestamp(taken_start), pd.Timestamp(taken_end)
+
+        if taken_start > cursor:
+            gaps.append((cursor, min(taken_start - ONE_SECOND, pd.Timestamp(end))))
+
+        cursor = max(cursor, taken_end + ONE_SECOND)
+
+    if cursor <= pd.Timestamp(end):
+        gaps.append((cursor, pd.Timestamp(end)))
+
+    return [(s.strftime(DATE_FORMAT), e.strftime(DATE_FORMAT)) for s, e in gaps if s <= e]
+
+
+def _select_points(points, start: str, end: str):
+    """
+    Return the price points (list[dict] or PriceBars) within [start, end].
+    """
+    if isinstance(points, list):
+        return [item for item in points if start <= _time_key(item) <= end]
+
+    keep = np.array(
+        [start <= t.replace("/", "-") <= end for t in points.snapshot_times], dtype=bool
+    )
+
+    return PriceBars(
+        points.values[keep],
+        [t for t, kept in zip(points.snapshot_times, keep) if kept],
+    )
+
+
+def _bars_to_items(bars: PriceBars) -> list[dict]:
+    """
+    Convert price points decoded into columns back to 'prices' response points.
+    """
+    names = [f"{p_type}_{side}" for side in ("bid", "ask") for p_type in PRICE_TYPES]
+    rows = bars.values.tolist()
+
+    items = []
+    for t, row in zip(bars.snapshot_times, rows):
+        fields = dict(zip(names, row))
+        volume = row[8]
+
+        items.append(
+            {
+                "snapshotTime": t,
+                **{
+                    p_type: {
+                        "bid": None if np.isnan(fields[f"{p_type}_bid"]) else fields[f"{p_type}_bid"],
+                        "ask": None if np.isnan(fields[f"{p_type}_ask"]) else fields[f"{p_type}_ask"],
+                        "lastTraded": None,
+                    }
+                    for p_type in PRICE_TYPES
+                },
+                "lastTradedVolume": None if np.isnan(volume) else int(volume),
+            }
+        )
+
+    return items
+
+
+def _frame_to_items(prices: pd.DataFrame) -> list[dict]:
+    """
+    Convert 17 column prices back to 'prices' response points (bid/ask and volume).
+    """
+    times = prices.index.strftime(SNAPSHOT_TIME_FORMAT)
+    volume = prices[VOLUME_COLUMN].to_numpy(dtype=np.float64)
+
+    # (bid, ask) per point of each price type
+    sides = {
+        name: prices[[f"{column}_bid", f"{column}_ask"]].to_numpy(dtype=np.float64).tolist()
+        for name, column in PRICE_TYPE_COLUMNS.items()
+    }
+
+    return [
+        {
+            "snapshotTime": t,
+            **{
+                name: {"bid": sides[name][i][0], "ask": sides[name][i][1], "lastTraded": None}
+                for name in sides
+            },
+            "lastTradedVolume": None if np.isnan(volume[i]) else int(volume[i]),
+        }
+        for i, t in enumerate(times)
+    ]
+
+
+# ------------------------------------------------------------------
+# coalescing class definitions
+# ------------------------------------------------------------------
+class _Fetch:
+    """
+    Response of 1 fetch in flight, decoded once for all the callers sharing it.
+    """
+
+    def __init__(self, r, res: dict = None) -> None:
+        self.r = r
+        self.res = res
+        self.lock = threading.Lock()
+
+    def decoded(self, ig_api) -> dict:
+        """
+        Return the decoded JSON (decoded on first use, with the caller's JSON decoder).
+        """
+        with self.lock:
+            if self.res is None:
+                self.res = ig_api._decode_prices(self.r)
+
+        return self.res
+
+
+class CoalescedResponse:
+    """
+    Successful 'prices' response assembled from shared fetches
+    (the requests.Response attributes used by IG_API).
+    """
+
+    status_code = 200
+
+    def __init__(self, res, content: bytes = None, stored: int = 0) -> None:
+        """
+        ---
+        Args:
+            * res (dict or callable): decoded JSON, or a function returning it
+            (decoding on first use)
+            * content (bytes, opt.): response body
+                * defaults to None (encoded from the decoded JSON)
+            * stored (int, default=0):
+                * 1: the bars are in the shared cache already (stored by the
+                lease holders), the caller must not store them again
+                * 0: not stored
+        """
+        self._res = res
+        self._content = content
+        self.stored = stored
+
+    def json(self) -> dict:
+        if callable(self._res):
+            self._res = self._res()
+
+        return self._res
+
+    @property
+    def content(self) -> bytes:
+        if self._content is not None:
+            return self._content
+
+        res = self.json()
+
+        if isinstance(res["prices"], PriceBars):
+            res = {**res, "prices": _bars_to_items(res["prices"])}
+
+        return json.dumps(res).encode()
+
+
+class RequestCoalescer:
+    """
+    Share 'prices' fetches between concurrent callers (threads, and the IG_API
+    instances the coalescer is given to).
+
+    A request overlapping requests in flight for the same epic and resolution
+    waits for them and only fetches the parts of its range nobody is fetching;
+    each caller gets the bars of its own range. Identical num_points requests
+    in flight share 1 fetch.
+
+    With 'path', fetches are also shared between processes: a range being
+    fetched by another process is leased in the SQLite file, and once the lease
+    is released its bars are read from the shared price cache (IG_API(...,
+    cache=PriceCache(path))) instead of being fetched again.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        lease_ttl: float = 120.0,
+        poll_interval: float = 0.1,
+        clock=time.time,
+        sleep=time.sleep,
+    ) -> None:
+        """
+        ---
+        Args:
+            * path (str, opt.): SQLite file of the cross-process leases
+            (i.e. the file of the shared PriceCache)
+                * defaults to None (in-process only)
+            * lease_ttl (float, default=120.0): seconds after which the lease of
+            a crashed process is ignored
+            * poll_interval (float, default=0.1): seconds between checks of a
+            lease held by another process
+            * clock, sleep (callable, opt.): replaceable (i.e. by a fake clock in tests)
+        """
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+
+        self.lock = threading.Lock()
+        self.inflight = {}  # key: list of (start, end, Future) or Future (num_points)
+
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.conn = None
+
+        if path is not None:
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the lease file (if any).
+        """
+        if self.conn is not None:
+            self.conn.close()
+
+    def send(
+        self,
+        ig_api,
+        url: str,
+        request,
+    ):
+        """
+        Send a 'prices' request, sharing it with the overlapping requests in flight.
+
+        ---
+        Args:
+            * ig_api (IG_API): instance of the caller (its cache is used across processes)
+            * url (str): 'prices' URL (range or num_points)
+            * request (callable): sends a GET request to a URL, returns the response
+        ---
+        Returns:
+            * requests.Response or CoalescedResponse: response for the caller's range
+            (the first failed response if a shared fetch failed)
+        """
+        head, start, end = url.rsplit("/", 2)
+
+        # num_points request: identical URLs only
+        if ":" not in end:
+            return self._send_identical(url, request)
+
+        with self.lock:
+            inflight = self.inflight.setdefault(head, [])
+            shared = [e for e in inflight if e[0] <= end and e[1] >= start]
+            own = [(s, e, Future()) for s, e in _subtract_ranges(start, end, shared)]
+            inflight.extend(own)
+
+        for entry in own:
+            s, e, future = entry
+
+            try:
+                future.set_result(_Fetch(*self._fetch(ig_api, head, s, e, request)))
+            except BaseException as exc:  # pylint: disable=broad-exception-caught
+                future.set_exception(exc)
+            finally:
+                with self.lock:
+                    self.inflight[head].remove(entry)
+                    if not self.inflight[head]:
+                        del self.inflight[head]
+
+        parts = sorted(shared + own, key=lambda entry: entry[0])
+        fetches = [future.result() for _, _, future in parts]
+
+        for fetch in fetches:
+            if fetch.r.status_code != 200:
+                return fetch.r
+
+        # across processes, every fetch is stored by its lease holder
+        stored = int(self.conn is not None)
+
+        # nothing shared: the whole response, decoded once even if shared later
+        if not shared and len(own) == 1:
+            fetch = fetches[0]
+            return CoalescedResponse(functools.partial(fetch.decoded, ig_api), fetch.r.content, stored)
+
+        decoded = [fetch.decoded(ig_api) for fetch in fetches]
+        points = join_points([_select_points(res["prices"], start, end) for res in decoded])
+
+        return CoalescedResponse({**decoded[-1], "prices": points}, stored=stored)
+
+    def _send_identical(self, url: str, request):
+        """
+        Send a request, or wait for the identical request in flight.
+        """
+        with self.lock:
+            future = self.inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self.inflight[url] = Future()
+
+        if owner:
+            try:
+                future.set_result(request(url))
+            except BaseException as exc:  # pylint: disable=broad-exception-caught
+                future.set_exception(exc)
+            finally:
+                with self.lock:
+                    del self.inflight[url]
+
+        return future.result()
+
+    def _fetch(
+        self,
+        ig_api,
+        head: str,
+        start: str,
+        end: str,
+        request,
+    ) -> tuple:
+        """
+        Fetch 1 range nobody in this process is fetching.
+
+        ---
+        Returns:
+            * tuple: response, decoded JSON (None if not decoded yet, or not successful)
+        """
+        if self.conn is None:
+            return request(f"{head}/{start}/{end}"), None
+
+        if ig_api.cache is None:
+            raise ValueError(
+                "cross-process coalescing needs a shared cache: IG_API(..., cache=PriceCache(path))"
+            )
+
+        epic, resolution = head.rsplit("/", 2)[-2:]
+
+        waited = False
+        while not self._take_lease(head, start, end):
+            waited = True
+            self.sleep(self.poll_interval)
+
+        try:
+            # fetched (and stored) by another process meanwhile
+            if waited and not ig_api.cache.missing(epic, resolution, start, end):
+                res = {
+                    "prices": _frame_to_items(ig_api.cache.read(epic, resolution, start, end)),
+                    "instrumentType": ig_api.cache.instrument_type(epic),
+                    "allowance": ig_api.allowance,
+                }
+                return CoalescedResponse(res), res
+
+            r = request(f"{head}/{start}/{end}")
+
+            if r.status_code != 200:
+                return r, None
+
+            # store before releasing the lease, for the processes waiting for it
+            res = ig_api._decode_prices(r)
+            ig_api._cache_results(epic, resolution, [((start, end), res)])
+
+            return r, res
+        finally:
+            self._release_lease(head, start, end)
+
+    def _take_lease(self, key: str, start: str, end: str) -> bool:
+        """
+        Lease a range unless another lease overlaps it.
+        """
+        with self.lock:
+            now = self.clock()
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+
+                taken = self.conn.execute(
+                    "SELECT 1 FROM leases WHERE key = ? AND start <= ? AND end >= ? LIMIT 1",
+                    (key, end, start),
+                ).fetchone()
+
+                if taken is None:
+                    self.conn.execute(
+                        "INSERT INTO leases VALUES (?, ?, ?, ?, ?)",
+                        (key, start, end, self.owner, now + self.lease_ttl),
+                    )
+            finally:
+                self.conn.execute("COMMIT")
+
+        return taken is None
+
+    def _release_lease(self, key: str, start: str, end: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM leases WHERE key = ? AND start = ? AND end = ? AND owner = ?",
+                (key, start, end, self.owner),
+            )
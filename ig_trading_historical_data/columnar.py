@@ -0,0 +1,163 @@
+""" this module contains the Arrow / Polars output backends of the prices (see 'output' of IG_API)."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from .conversion import PRICE_COLUMNS, PRICE_TYPES, SIDES, VOLUME_COLUMN, prices_to_arrays
+from .export import TIME_COLUMN
+from .planning import ranges_mask
+
+
+# ------------------------------------------------------------------
+# output inputs
+# ------------------------------------------------------------------
+# output backends: type of the returned prices
+#   * "pandas": DataFrame indexed by snapshot time (default)
+#   * "arrow": pyarrow Table, snapshot time as the first column
+#   * "polars": polars DataFrame, snapshot time as the first column
+OUTPUTS = ("pandas", "arrow", "polars")
+
+
+def _import_pyarrow():
+    """
+    Import pyarrow (optional dependency) on first use.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("output='arrow'/'polars' needs pyarrow: pip install pyarrow") from None
+
+    return pa
+
+
+def _import_polars():
+    """
+    Import polars (optional dependency) on first use.
+    """
+    try:
+        import polars as pl
+    except ImportError:
+        raise ImportError("output='polars' needs polars: pip install polars") from None
+
+    return pl
+
+
+# ------------------------------------------------------------------
+# output function definitions
+# ------------------------------------------------------------------
+def check_output(output: str) -> None:
+    """
+    Raise a ValueError if 'output' is not a known backend.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"output must be one of {OUTPUTS}, not {output!r}")
+
+
+def prices_to_table(
+    prices_historical: list,
+    date_ranges: list = None,
+    compact: int = 0,
+):
+    """
+    Convert the list of price points (res['prices'] of the 'prices' endpoint)
+    directly to a pyarrow Table (no DataFrame in between).
+
+    The fields are extracted into 1 NumPy array (as in 'prices_to_dataframe')
+    that is transposed once, so every column is a contiguous buffer handed to
+    Arrow without a copy; mid/spread are computed vectorized.
+
+    ---
+    Args:
+        * prices_historical (list[dict]): price points (1 dict per point in time)
+        * date_ranges (list[tuple[str]], opt.): keep only the points within these
+        ranges (and the last of duplicated points)
+            * defaults to None (keep all points)
+        * compact (int, default=0): see 'compact' of IG_API
+    ---
+    Returns:
+        * pyarrow.Table: snapshot time, then the price and volume columns
+    """
+    pa = _import_pyarrow()
+
+    values, index = prices_to_arrays(prices_historical)
+
+    # drop points returned twice at chunk boundaries and outside the ranges asked for
+    if date_ranges is not None:
+        keep = ~index.duplicated(keep="last") & ranges_mask(index, date_ranges)
+
+        if not keep.all():
+            values, index = values[keep], index[keep]
+
+    # 1 row per field: each row is 1 contiguous column
+    fields = np.ascontiguousarray(values.T)
+    bid, ask, volume = fields[0:4], fields[4:8], fields[8]
+
+    blocks = {"bid": bid, "ask": ask}
+    if compact != 2:
+        blocks.update(mid=(bid + ask) / 2, spread=ask - bid)
+
+    # 1 time unit whatever the pandas version parsed to (as in ParquetStore)
+    names = [TIME_COLUMN]
+    arrays = [pa.array(index.to_numpy().astype("datetime64[ns]", copy=False))]
+
+    for side in SIDES:
+        if side not in blocks:
+            continue
+
+        block = blocks[side].astype(np.float32) if compact else blocks[side]
+
+        for i, p_type in enumerate(PRICE_TYPES):
+            names.append(p_type.replace("Price", f"_px_{side}"))
+            arrays.append(pa.array(block[i]))
+
+    # volume is integer, missing values are nulls
+    missing = np.isnan(volume)
+    names.append(VOLUME_COLUMN)
+    arrays.append(pa.array(volume, mask=missing if missing.any() else None).cast(pa.int64()))
+
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def table_from_prices(prices: pd.DataFrame):
+    """
+    Convert a prices DataFrame (i.e. read from the cache) to a pyarrow Table
+    with the snapshot time as the first column.
+    """
+    pa = _import_pyarrow()
+
+    columns = [column for column in PRICE_COLUMNS if column in prices]
+
+    # same schema as 'prices_to_table': nullable int64 volume
+    prices = prices[columns + [VOLUME_COLUMN]].astype({VOLUME_COLUMN: "Int64"})
+    prices.index = prices.index.astype("datetime64[ns]").rename(TIME_COLUMN)
+
+    table = pa.Table.from_pandas(prices.reset_index(), preserve_index=False)
+
+    return table.replace_schema_metadata(None)
+
+
+def output_table(table, output: str):
+    """
+    Return a pyarrow Table in the requested output backend ('arrow' or 'polars');
+    polars takes over the Arrow buffers without a copy.
+    """
+    if output == "arrow":
+        return table
+
+    return _import_polars().from_arrow(table)
+
+
+def output_frame(
+    prices: pd.DataFrame,
+    output: str,
+):
+    """
+    Return a prices DataFrame in the requested output backend.
+    """
+    if output == "pandas":
+        return prices
+
+    return output_table(table_from_prices(prices), output)
@@ -0,0 +1,289 @@
+""" this module contains the conversion of raw 'prices' JSON data to a DataFrame."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------------------------------------------
+# conversion inputs
+# ------------------------------------------------------------------
+PRICE_TYPES = ["openPrice", "highPrice", "lowPrice", "closePrice"]
+SIDES = ["bid", "ask", "mid", "spread"]
+
+# output columns (in order), i.e. 'openPrice' of 'bid' > 'open_px_bid'
+PRICE_COLUMNS = [
+    p_type.replace("Price", f"_px_{side}") for side in SIDES for p_type in PRICE_TYPES
+]
+VOLUME_COLUMN = "last_traded_volume"
+COLUMNS = PRICE_COLUMNS + [VOLUME_COLUMN]
+
+# bid/ask columns (mid and spread are derived from them)
+BID_ASK_COLUMNS = [column for column in PRICE_COLUMNS if column.endswith(("_bid", "_ask"))]
+
+# snapshotTime format of the 'prices' endpoint (version 2)
+SNAPSHOT_TIME_FORMAT = "%Y/%m/%d %H:%M:%S"
+
+
+# ------------------------------------------------------------------
+# decoded price points
+# ------------------------------------------------------------------
+class PriceBars:
+    """
+    Price points of 'prices' responses decoded straight into columns
+    (res['prices'] of the fast decoders, see decoding.decode_prices);
+    accepted by the conversions wherever a list of price point dicts is.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        snapshot_times: list,
+    ) -> None:
+        """
+        ---
+        Args:
+            * values (ndarray): shape (n, 9), bid OHLC, ask OHLC, volume (NaN if missing)
+            * snapshot_times (list[str]): snapshotTime of each point
+        """
+        self.values = values
+        self.snapshot_times = snapshot_times
+
+    def __len__(self) -> int:
+        return len(self.snapshot_times)
+
+    def __repr__(self) -> str:
+        return f"PriceBars({len(self)} points)"
+
+
+def join_points(parts: list):
+    """
+    Join the price points of several responses (in order).
+
+    ---
+    Args:
+        * parts (list): res['prices'] of each response (list[dict] or PriceBars)
+    ---
+    Returns:
+        * list[dict] or PriceBars: PriceBars if any part was decoded into columns
+    """
+    if all(isinstance(part, list) for part in parts):
+        return [item for part in parts for item in part]
+
+    bars = [part if isinstance(part, PriceBars) else PriceBars(*_extract(part)) for part in parts]
+
+    if len(bars) == 1:
+        return bars[0]
+
+    return PriceBars(
+        np.concatenate([part.values for part in bars]).reshape(-1, 9),
+        [t for part in bars for t in part.snapshot_times],
+    )
+
+
+# ------------------------------------------------------------------
+# conversion function definitions
+# ------------------------------------------------------------------
+def _extract(prices_historical: list) -> tuple:
+    """
+    Extract the fields of price point dicts in a single pass into 1 NumPy array.
+
+    ---
+    Returns:
+        * tuple: values (ndarray, shape (n, 9)), snapshot times (list[str])
+    """
+    # 1 row per point: bid OHLC, ask OHLC, volume (None > NaN)
+    values = np.array(
+        [
+            (
+                t["openPrice"]["bid"],
+                t["highPrice"]["bid"],
+                t["lowPrice"]["bid"],
+                t["closePrice"]["bid"],
+                t["openPrice"]["ask"],
+                t["highPrice"]["ask"],
+                t["lowPrice"]["ask"],
+                t["closePrice"]["ask"],
+                t["lastTradedVolume"],
+            )
+            for t in prices_historical
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 9)
+
+    return values, [t["snapshotTime"] for t in prices_historical]
+
+
+def parse_snapshot_times(snapshot_times: list) -> pd.DatetimeIndex:
+    """
+    Parse all snapshotTime strings in 1 vectorized call.
+
+    ---
+    Args:
+        * snapshot_times (list[str]): i.e. '2024/01/08 10:00:00'
+    ---
+    Returns:
+        * DatetimeIndex: parsed times
+    """
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(snapshot_times, format=SNAPSHOT_TIME_FORMAT))
+    except ValueError:
+        # other formats (i.e. ISO 8601 of the version 3 endpoint)
+        return pd.DatetimeIndex(pd.to_datetime(snapshot_times))
+
+
+def frame_from_columns(
+    bid: np.ndarray,
+    ask: np.ndarray,
+    volume: np.ndarray,
+    index: pd.DatetimeIndex,
+) -> pd.DataFrame:
+    """
+    Build the 17 column prices DataFrame from bid/ask OHLC and volume arrays
+    (mid and spread are computed vectorized).
+
+    ---
+    Args:
+        * bid (ndarray): shape (n, 4), bid open/high/low/close
+        * ask (ndarray): shape (n, 4), ask open/high/low/close
+        * volume (ndarray): shape (n,), last traded volume (NaN if missing)
+        * index (DatetimeIndex): snapshot times
+    ---
+    Returns:
+        * DataFrame: 17 columns indexed by snapshot time
+    """
+    block = np.hstack([bid, ask, (bid + ask) / 2, ask - bid])
+
+    prices = pd.DataFrame(data=block, index=index, columns=PRICE_COLUMNS)
+
+    # volume stays integer unless a value is missing
+    if not np.isnan(volume).any():
+        volume = volume.astype(np.int64)
+
+    prices[VOLUME_COLUMN] = volume
+
+    return prices
+
+
+def prices_to_arrays(prices_historical: list) -> tuple:
+    """
+    Extract the fields of the price points (res['prices'] of the 'prices' endpoint)
+    in a single pass into 1 NumPy array, and parse the timestamps in 1 vectorized call.
+
+    ---
+    Args:
+        * prices_historical (list[dict] or PriceBars): price points (1 dict per
+        point in time, or already decoded into columns)
+    ---
+    Returns:
+        * tuple:
+            * values (ndarray): shape (n, 9), bid OHLC, ask OHLC, volume (NaN if missing)
+            * index (DatetimeIndex): snapshot times
+    """
+    if isinstance(prices_historical, PriceBars):
+        values, snapshot_times = prices_historical.values, prices_historical.snapshot_times
+    else:
+        values, snapshot_times = _extract(prices_historical)
+
+    return values, parse_snapshot_times(snapshot_times)
+
+
+def prices_to_dataframe(prices_historical: list) -> pd.DataFrame:
+    """
+    Convert the list of price points (res['prices'] of the 'prices' endpoint)
+    to 1 DataFrame with all fields: bid, ask, mid, spread (OHLC) and volume.
+
+    ---
+    Args:
+        * prices_historical (list[dict] or PriceBars): price points
+    ---
+    Returns:
+        * DataFrame: 17 columns indexed by snapshot time
+    """
+    values, index = prices_to_arrays(prices_historical)
+
+    return frame_from_columns(values[:, 0:4], values[:, 4:8], values[:, 8], index)
+
+
+def compact_prices(
+    prices: pd.DataFrame,
+    derived: int = 1,
+) -> pd.DataFrame:
+    """
+    Return the prices with compact dtypes: float32 prices and integer volume
+    (nullable Int64 if a value is missing); the index stays a DatetimeIndex
+    (int64 epoch based).
+
+    float32 keeps ~7 significant digits, i.e. prices around 10,000
+    are rounded to ~0.001.
+
+    ---
+    Args:
+        * prices (DataFrame): 17 column prices
+        * derived (int, default=1):
+            * 1: keep the mid/spread columns
+            * 0: drop them (get them on access with prices.ig.mid / prices.ig.spread)
+    ---
+    Returns:
+        * DataFrame: 17 (or 9 without mid/spread) columns indexed by snapshot time
+    """
+    columns = PRICE_COLUMNS if derived else BID_ASK_COLUMNS
+
+    compact = prices[columns].astype(np.float32)
+
+    volume = prices[VOLUME_COLUMN]
+    compact[VOLUME_COLUMN] = volume.astype(np.int64 if not volume.isna().any() else "Int64")
+
+    return compact
+
+
+@pd.api.extensions.register_dataframe_accessor("ig")
+class PricesAccessor:
+    """
+    prices.ig: mid/spread columns of a prices DataFrame, computed from bid/ask
+    on access if they were dropped (see compact_prices).
+    """
+
+    def __init__(self, prices: pd.DataFrame) -> None:
+        self._prices = prices
+
+    def _derived(self, side: str) -> pd.DataFrame:
+        """
+        Return the 4 (OHLC) columns of side 'mid' or 'spread'.
+        """
+        columns = [column for column in PRICE_COLUMNS if column.endswith(f"_{side}")]
+
+        if all(column in self._prices for column in columns):
+            return self._prices[columns]
+
+        bid = self._prices[[column.replace(side, "bid") for column in columns]].to_numpy()
+        ask = self._prices[[column.replace(side, "ask") for column in columns]].to_numpy()
+
+        values = (bid + ask) / 2 if side == "mid" else ask - bid
+
+        return pd.DataFrame(values, index=self._prices.index, columns=columns)
+
+    @property
+    def mid(self) -> pd.DataFrame:
+        """
+        mid OHLC prices: (bid + ask) / 2
+        """
+        return self._derived("mid")
+
+    @property
+    def spread(self) -> pd.DataFrame:
+        """
+        OHLC spreads: ask - bid
+        """
+        return self._derived("spread")
+
+    def full(self) -> pd.DataFrame:
+        """
+        Return the prices with all 17 columns (in the usual order).
+        """
+        return pd.concat(
+            [self._prices[BID_ASK_COLUMNS], self.mid, self.spread, self._prices[[VOLUME_COLUMN]]],
+            axis=1,
+        )[COLUMNS]
@@ -0,0 +1,161 @@
+""" this module contains the JSON decoders of 'prices' responses (stdlib json, orjson or msgspec)."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import functools
+import json
+from typing import Optional
+
+import numpy as np
+
+from .conversion import PriceBars
+
+
+# ------------------------------------------------------------------
+# decoding inputs
+# ------------------------------------------------------------------
+# decoders of 'prices' responses (see 'json_decoder' of IG_API):
+#   * "auto": the fastest installed (msgspec, then orjson, then json)
+#   * "msgspec": typed structs of the bar schema, decoded straight into columns (PriceBars)
+#   * "orjson": dicts as json, decoded faster
+#   * "json": standard library (dicts)
+DECODERS = ("auto", "msgspec", "orjson", "json")
+
+
+@functools.lru_cache(maxsize=None)
+def _typed_decoder():
+    """
+    Return the msgspec decoder of the 'prices' response schema, and the error
+    it raises on other payloads (None if msgspec is not installed).
+    """
+    try:
+        import msgspec
+    except ImportError:
+        return None
+
+    # no GC tracking: many small structs, no reference cycles
+    class Price(msgspec.Struct, gc=False):
+        bid: Optional[float] = None
+        ask: Optional[float] = None
+
+    class Bar(msgspec.Struct, gc=False):
+        snapshotTime: str
+        openPrice: Price
+        highPrice: Price
+        lowPrice: Price
+        closePrice: Price
+        lastTradedVolume: Optional[float] = None
+
+    class Response(msgspec.Struct):
+        prices: list[Bar]
+        instrumentType: Optional[str] = None
+        allowance: Optional[dict] = None
+        metadata: Optional[dict] = None
+
+    return msgspec.json.Decoder(Response), msgspec.DecodeError
+
+
+@functools.lru_cache(maxsize=None)
+def _orjson():
+    """
+    Return the orjson module (None if not installed).
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    return orjson
+
+
+# ------------------------------------------------------------------
+# decoding function definitions
+# ------------------------------------------------------------------
+def _decode_typed(decoder, content: bytes) -> dict:
+    """
+    Decode a 'prices' response into typed structs, then into 1 NumPy array.
+    """
+    res = decoder.decode(content)
+    bars = res.prices
+
+    # 1 row per point: bid OHLC, ask OHLC, volume (None > NaN)
+    values = np.array(
+        [
+            (
+                b.openPrice.bid,
+                b.highPrice.bid,
+                b.lowPrice.bid,
+                b.closePrice.bid,
+                b.openPrice.ask,
+                b.highPrice.ask,
+                b.lowPrice.ask,
+                b.closePrice.ask,
+                b.lastTradedVolume,
+            )
+            for b in bars
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 9)
+
+    decoded = {
+        "prices": PriceBars(values, [b.snapshotTime for b in bars]),
+        "instrumentType": res.instrumentType,
+        "allowance": res.allowance,
+    }
+
+    if res.metadata is not None:
+        decoded["metadata"] = res.metadata
+
+    return decoded
+
+
+def decode_prices(
+    content: bytes,
+    decoder: str = "auto",
+) -> dict:
+    """
+    Decode the body of a successful 'prices' response.
+
+    ---
+    Args:
+        * content (bytes): response body
+        * decoder (str, default="auto"): see DECODERS
+            * "auto" falls back to the next decoder if a library is not installed
+            * msgspec falls back to json if the payload does not match the bar schema
+    ---
+    Raises:
+        * ValueError: if 'decoder' is not one of DECODERS
+        * ImportError: if the library of an explicitly chosen decoder is not installed
+    ---
+    Returns:
+        * dict: as r.json() ('prices', 'instrumentType', 'allowance', ...), with
+        res['prices'] as PriceBars (msgspec) or as a list of dicts (orjson, json)
+    """
+    if decoder not in DECODERS:
+        raise ValueError(f"decoder must be one of {DECODERS}, not {decoder!r}")
+
+    if decoder in ("auto", "msgspec"):
+        typed = _typed_decoder()
+
+        if typed is None and decoder == "msgspec":
+            raise ImportError("json_decoder='msgspec' needs msgspec: pip install msgspec")
+
+        if typed is not None:
+            typed_decoder, decode_error = typed
+
+            try:
+                return _decode_typed(typed_decoder, content)
+            except decode_error:
+                return json.loads(content)
+
+    if decoder in ("auto", "orjson"):
+        orjson = _orjson()
+
+        if orjson is None and decoder == "orjson":
+            raise ImportError("json_decoder='orjson' needs orjson: pip install orjson")
+
+        if orjson is not None:
+            return orjson.loads(content)
+
+    return json.loads(content)
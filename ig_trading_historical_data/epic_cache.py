@@ -0,0 +1,135 @@
+""" this module contains the EpicCache class, a local on-disk (SQLite) store of resolved epics."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import sqlite3
+import threading
+import time
+
+
+# ------------------------------------------------------------------
+# cache inputs
+# ------------------------------------------------------------------
+# epics of an instrument name and expiry almost never change
+DEFAULT_TTL = 7 * 24 * 3600.0  # s
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS epics (
+    instrument_name TEXT NOT NULL,
+    expiry TEXT NOT NULL,
+    epic TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (instrument_name, expiry)
+) WITHOUT ROWID;
+"""
+
+
+# ------------------------------------------------------------------
+# cache class definition
+# ------------------------------------------------------------------
+class EpicCache:
+    """
+    Local on-disk store of epics (1 SQLite file), keyed by (instrument_name, expiry).
+
+    Every market search stores ALL markets it returned, so 1 search
+    usually serves several assets; entries older than 'ttl' are ignored
+    (and searched again).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        clock=time.time,
+    ) -> None:
+        """
+        Open (or create) the cache file.
+
+        ---
+        Args:
+            * path (str): SQLite file path (':memory:' for a throwaway cache;
+            may be the file of a PriceCache)
+            * ttl (float, default=7 days): max age of an entry in seconds
+                * None: entries never expire
+            * clock (callable, opt.): current time in seconds since epoch
+        """
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the cache file.
+        """
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get(
+        self,
+        instrument_name: str,
+        expiry: str = "DFB",
+    ) -> str:
+        """
+        Return the stored epic of an instrument name and expiry.
+
+        ---
+        Returns:
+            * str: epic, or None if not stored (or expired)
+        """
+        oldest = float("-inf") if self.ttl is None else self.clock() - self.ttl
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT epic FROM epics "
+                "WHERE instrument_name = ? AND expiry = ? AND fetched_at >= ?",
+                (instrument_name, expiry, oldest),
+            ).fetchone()
+
+        return None if row is None else row[0]
+
+    def put_markets(self, market_search_dict: dict) -> None:
+        """
+        Store the epics of all markets of a market search.
+
+        ---
+        Args:
+            * market_search_dict (dict): output of IG_API.get_market_search
+        """
+        now = self.clock()
+
+        rows = [
+            (market["instrumentName"], market["expiry"], market["epic"], now)
+            for market in market_search_dict.get("markets", [])
+        ]
+
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO epics VALUES (?, ?, ?, ?)", rows)
+
+    def invalidate(
+        self,
+        instrument_name: str = None,
+        expiry: str = None,
+    ) -> None:
+        """
+        Drop stored epics (of an instrument name and/or expiry if given,
+        else all of them).
+        """
+        where = " AND ".join(
+            f"{k} = ?"
+            for k, v in [("instrument_name", instrument_name), ("expiry", expiry)]
+            if v is not None
+        )
+        params = [v for v in (instrument_name, expiry) if v is not None]
+
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM epics" + (f" WHERE {where}" if where else ""), params)
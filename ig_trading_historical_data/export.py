@@ -0,0 +1,321 @@
+""" this module contains the ParquetStore class, a partitioned Parquet export of fetched prices."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .conversion import COLUMNS, VOLUME_COLUMN
+
+
+# ------------------------------------------------------------------
+# export inputs
+# ------------------------------------------------------------------
+# name of the time column (the DataFrame index) in the Parquet files
+TIME_COLUMN = "snapshot_time"
+
+# default 'date' partition period per resolution (roughly 100-10,000 bars per file)
+PARTITION_PERIODS = {
+    "SECOND": "D",
+    "MINUTE": "D",
+    "MINUTE_2": "D",
+    "MINUTE_3": "D",
+    "MINUTE_5": "D",
+    "MINUTE_10": "M",
+    "MINUTE_15": "M",
+    "MINUTE_30": "M",
+    "HOUR": "M",
+    "HOUR_2": "M",
+    "HOUR_3": "M",
+    "HOUR_4": "M",
+    "DAY": "Y",
+    "WEEK": "Y",
+    "MONTH": "Y",
+}
+
+
+def _import_pyarrow():
+    """
+    Import pyarrow (optional dependency) on first use.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.fs  # noqa: F401 (pa.fs)
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("ParquetStore needs pyarrow: pip install pyarrow") from None
+
+    return pa, ds, pq
+
+
+def _table_to_prices(table) -> pd.DataFrame:
+    """
+    Convert a read table (or an 'arrow'/'polars' output) to a DataFrame
+    indexed by snapshot time.
+    """
+    prices = table.to_pandas()
+
+    return prices.set_index(TIME_COLUMN) if TIME_COLUMN in prices else prices
+
+
+# ------------------------------------------------------------------
+# export class definition
+# ------------------------------------------------------------------
+class ParquetStore:
+    """
+    Parquet export of prices, partitioned by epic, resolution and date
+    (hive layout: root/epic=.../resolution=.../date=.../part-*.parquet).
+
+    Every write appends new part files; 'compact' merges the parts of each
+    partition into 1 file (bars written twice keep the last written values).
+    Reads only open the partitions of the requested time range and push
+    the time and column selection down to the Parquet reader (memory mapped).
+    """
+
+    def __init__(self, root: str) -> None:
+        """
+        ---
+        Args:
+            * root (str): root directory of the store (created if needed)
+        """
+        self.root = str(root)
+
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, *parts: tuple) -> str:
+        """
+        Return the directory of a (partial) partition, i.e. ('epic', epic), ('resolution', res).
+        """
+        return os.path.join(self.root, *[f"{key}={value}" for key, value in parts])
+
+    def _partitions(
+        self,
+        epic: str,
+        resolution: str,
+    ) -> list[str]:
+        """
+        Return the 'date' partition values stored for an epic and resolution (sorted).
+        """
+        path = self._dir(("epic", epic), ("resolution", resolution))
+
+        if not os.path.isdir(path):
+            return []
+
+        return sorted(name.split("=", 1)[1] for name in os.listdir(path) if name.startswith("date="))
+
+    def _files(
+        self,
+        epic: str,
+        resolution: str,
+        date: str,
+    ) -> list[str]:
+        """
+        Return the part files of 1 partition, in write order.
+        """
+        path = self._dir(("epic", epic), ("resolution", resolution), ("date", date))
+
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet")
+        )
+
+    def write(
+        self,
+        epic: str,
+        resolution: str,
+        prices,
+    ) -> list[str]:
+        """
+        Append prices (1 new part file per date partition touched).
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * prices (DataFrame, pyarrow Table or polars DataFrame): prices as returned
+            by 'get_prices_single_asset' (any 'output'; compact prices are stored
+            with all 17 float64 columns)
+        ---
+        Raises:
+            * TypeError: if prices is not one of the above
+        ---
+        Returns:
+            * list[str]: written files
+        """
+        pa, _, pq = _import_pyarrow()
+
+        # 'arrow' / 'polars' output: snapshot time is the first column
+        if not isinstance(prices, pd.DataFrame):
+            if not hasattr(prices, "to_pandas"):
+                raise TypeError(
+                    f"prices must be a DataFrame, pyarrow Table or polars DataFrame, not {type(prices).__name__}"
+                )
+
+            prices = _table_to_prices(prices)
+
+        if prices.empty:
+            return []
+
+        # 1 schema for all files: 17 float64 columns, nullable int volume
+        if not all(column in prices for column in COLUMNS):
+            prices = prices.ig.full()
+
+        prices = prices[COLUMNS].astype(
+            {**{column: np.float64 for column in COLUMNS}, VOLUME_COLUMN: "Int64"}
+        )
+        prices.index = prices.index.astype("datetime64[ns]").rename(TIME_COLUMN)
+
+        period = PARTITION_PERIODS.get(resolution, "D")
+        dates = prices.index.to_period(period).astype(str)
+
+        # part names sort in write order
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+
+        files = []
+        for date, part in prices.groupby(dates, sort=True):
+            path = self._dir(("epic", epic), ("resolution", resolution), ("date", date))
+            os.makedirs(path, exist_ok=True)
+
+            file = os.path.join(path, name)
+            pq.write_table(pa.Table.from_pandas(part.sort_index()), file)
+            files.append(file)
+
+        return files
+
+    def write_assets(
+        self,
+        assets: dict,
+        resolution: str,
+    ) -> None:
+        """
+        Append the prices of all assets returned by 'get_prices_all_assets'
+        (assets without prices, i.e. failed ones, are skipped).
+
+        ---
+        Raises:
+            * TypeError: if prices are not a DataFrame, pyarrow Table or polars DataFrame
+        """
+        for d in assets.values():
+            if d.get("prices") is not None:
+                self.write(d["epic"], resolution, d["prices"])
+
+    def read(
+        self,
+        epic: str,
+        resolution: str,
+        start_date: str = None,
+        end_date: str = None,
+        columns: list = None,
+    ) -> pd.DataFrame:
+        """
+        Read the prices within [start_date, end_date].
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * start_date (str, opt.): yyyy-MM-dd HH:mm:ss (inclusive)
+                * defaults to None (from the first stored bar)
+            * end_date (str, opt.): yyyy-MM-dd HH:mm:ss (inclusive)
+                * defaults to None (until the last stored bar)
+            * columns (list[str], opt.): columns to read
+                * defaults to None (all 17 columns)
+        ---
+        Returns:
+            * DataFrame: prices indexed by snapshot time
+        """
+        pa, ds, _ = _import_pyarrow()
+
+        columns = COLUMNS if columns is None else list(columns)
+        period = PARTITION_PERIODS.get(resolution, "D")
+
+        # partition pruning: only the dates overlapping the range
+        dates = self._partitions(epic, resolution)
+        if start_date is not None:
+            first = str(pd.Timestamp(start_date).to_period(period))
+            dates = [date for date in dates if date >= first]
+        if end_date is not None:
+            last = str(pd.Timestamp(end_date).to_period(period))
+            dates = [date for date in dates if date <= last]
+
+        files = [file for date in dates for file in self._files(epic, resolution, date)]
+
+        if not files:
+            empty = pd.DataFrame(columns=columns, dtype=np.float64)
+            empty.index = pd.DatetimeIndex([], name=TIME_COLUMN)
+            return empty
+
+        # row filter pushed down to the reader (row group statistics)
+        row_filter = None
+        for bound, op in ((start_date, "__ge__"), (end_date, "__le__")):
+            if bound is not None:
+                condition = getattr(ds.field(TIME_COLUMN), op)(pd.Timestamp(bound))
+                row_filter = condition if row_filter is None else row_filter & condition
+
+        dataset = ds.dataset(files, format="parquet", filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+        table = dataset.to_table(columns=[TIME_COLUMN] + columns, filter=row_filter)
+
+        prices = _table_to_prices(table)
+
+        # bars written twice (overlapping appends): keep the last written
+        if prices.index.has_duplicates:
+            prices = prices[~prices.index.duplicated(keep="last")]
+
+        return prices.sort_index(kind="stable")
+
+    def compact(
+        self,
+        epic: str = None,
+        resolution: str = None,
+    ) -> int:
+        """
+        Merge the part files of every partition (of an epic and/or resolution
+        if given) into 1 file, dropping bars written twice.
+
+        ---
+        Returns:
+            * int: number of partitions compacted
+        """
+        pa, _, pq = _import_pyarrow()
+
+        epics = [epic] if epic is not None else [
+            name.split("=", 1)[1] for name in sorted(os.listdir(self.root)) if name.startswith("epic=")
+        ]
+
+        n = 0
+        for e in epics:
+            resolutions = [resolution] if resolution is not None else [
+                name.split("=", 1)[1]
+                for name in sorted(os.listdir(self._dir(("epic", e))))
+                if name.startswith("resolution=")
+            ]
+
+            for r in resolutions:
+                for date in self._partitions(e, r):
+                    files = self._files(e, r, date)
+
+                    if len(files) < 2:
+                        continue
+
+                    prices = pd.concat([_table_to_prices(pq.read_table(file)) for file in files])
+                    prices = prices[~prices.index.duplicated(keep="last")].sort_index()
+
+                    # write the merged file (sorting after the parts), then drop the parts
+                    merged = os.path.join(
+                        os.path.dirname(files[-1]),
+                        f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet",
+                    )
+                    pq.write_table(pa.Table.from_pandas(prices), merged + ".tmp")
+                    os.replace(merged + ".tmp", merged)
+
+                    for file in files:
+                        os.remove(file)
+
+                    n += 1
+
+        return n
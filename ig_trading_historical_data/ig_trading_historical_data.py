@@ -3,10 +3,38 @@
 # ------------------------------------------------------------------
 # import packages
 # ------------------------------------------------------------------
+import json
+import os
+import threading
 import time
-import requests
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+
 import pandas as pd
 
+from .rate_limit import AdaptiveRateLimiter, RateLimiter, is_rate_limited
+from .cache import PriceCache
+from .coalesce import CoalescedResponse, RequestCoalescer
+from .columnar import check_output, output_frame, output_table, prices_to_table
+from .epic_cache import EpicCache
+from .lazy import LazyPrices
+from .metrics import MetricsSink, endpoint_of
+from .conversion import VOLUME_COLUMN, compact_prices, join_points, prices_to_dataframe
+from .decoding import decode_prices
+from .planning import (
+    DATE_FORMAT,
+    ONE_SECOND,
+    AllowanceExceededError,
+    AllowanceTracker,
+    estimate_range_points,
+    plan_date_ranges,
+    plan_fetch_ranges,
+    ranges_mask,
+)
+from .resample import bar_start, coarse_ranges, finer_resolutions, next_bar_start, resample_prices
+from .streaming import CANDLE_FIELDS, CHART_SCALES, CandleAssembler, LightstreamerClient
+from .transport import HTTPTransport, transport_retries
+
 
 # ------------------------------------------------------------------
 # API class definition
@@ -17,12 +45,56 @@ class IG_API:
     Use the methods to gather data.
     """
 
+    # number of times a request rejected for exceeding a per-minute limit is retried
+    rate_limit_retries = 3
+
+    # max number of bars requested in 1 call, longer ranges are split into chunks
+    # (IG caps the points per response; lower this if responses get truncated)
+    max_points_per_request = 5000
+
+    # how the days of a time interval are fetched (see planning.merge_ranges):
+    # 'auto' (fewest requests + allowance), 'per_range' (1 request per day) or 'span'
+    interval_strategy = "auto"
+
+    # allowance points 1 request is worth when 'auto' weighs requests against allowance
+    request_cost = 10
+
+    # JSON decoder of 'prices' responses (see decoding.DECODERS): 'auto' (fastest
+    # installed of msgspec, orjson and json), 'msgspec', 'orjson' or 'json'
+    json_decoder = "auto"
+
+    # local price cache (PriceCache), None: always fetch from the API
+    cache = None
+
+    # local epic cache (EpicCache), None: always search the markets
+    epic_cache = None
+
+    # shares overlapping 'prices' requests in flight (RequestCoalescer), None: no sharing
+    coalescer = None
+
+    # 'allowance' dict of the last 'prices' response
+    allowance = None
+
+    # dtypes of the returned prices (see __init__)
+    compact = 0
+
+    # type of the returned prices: "pandas", "arrow" or "polars" (see __init__)
+    output = "pandas"
+
     def __init__(
         self,
         demo: int,
         username: str,
         pw: str,
         api_key: str,
+        transport: HTTPTransport = None,
+        rate_limiter: RateLimiter = None,
+        cache: PriceCache = None,
+        compact: int = 0,
+        epic_cache: EpicCache = None,
+        metrics: MetricsSink = None,
+        coalescer: RequestCoalescer = None,
+        output: str = "pandas",
     ) -> None:
         """
         Log into the IG REST API.
@@ -35,9 +107,43 @@ class IG_API:
             * username (str): username
             * pw (str): password
             * api_key (str): API key
+            * transport (HTTPTransport, opt.): transport used for ALL requests
+            of this instance
+                * defaults to None (a pooled, keep-alive HTTPTransport is created)
+                * pass your own HTTPTransport to tune pool size, retries and timeouts,
+                or any object with the same 'get'/'post' methods as a stand-in
+            * rate_limiter (RateLimiter, opt.): limiter pacing ALL requests of this instance
+                * defaults to None (an AdaptiveRateLimiter using IG's per-minute limits)
+                * pass the same limiter to several instances to share it between them
+            * cache (PriceCache, opt.): local store of fetched prices
+                * defaults to None (always fetch from the API)
+                * with range_type='dates', only ranges not stored yet are fetched
+            * compact (int, default=0): dtypes of the returned prices
+                * 0: float64 prices (17 columns)
+                * 1: float32 prices and integer volume (about half the memory)
+                * 2: as 1, without the mid/spread columns (computed on access
+                with prices.ig.mid / prices.ig.spread / prices.ig.full())
+            * epic_cache (EpicCache, opt.): local store of epics used by 'get_epics'
+                * defaults to None (always search the markets)
+            * metrics (MetricsSink, opt.): sink receiving the latency, bytes, status,
+            retries and rate limiter wait of every request, conversion times
+            and allowance updates
+                * defaults to None (silent, nothing is recorded)
+                * i.e. PrometheusSink(), OpenTelemetrySink() or CallbackSink(hook)
+            * coalescer (RequestCoalescer, opt.): share 'prices' requests overlapping
+            requests in flight (of this instance's threads, other instances given the
+            same coalescer and, with a lease file, other processes)
+                * defaults to None (every request is sent)
+            * output (str, default="pandas"): type of the returned prices
+                * "pandas": DataFrame indexed by snapshot time
+                * "arrow": pyarrow Table built directly from the responses
+                (snapshot time as the first column), needs pyarrow
+                * "polars": polars DataFrame sharing the Arrow buffers (no copy),
+                needs pyarrow and polars
         ---
         Raises:
             * ValueError: if status_code != 200 (i.e. could not log in)
+            * ValueError: if 'compact' or 'output' is not one of the above
         ---
         Returns:
             * Nothing. Instead updates class instance attributes that are
@@ -55,24 +161,75 @@ class IG_API:
         self.username = username
         self.pw = pw
         self.api_key = api_key
+        self._set_options(
+            transport, rate_limiter, cache, compact, epic_cache, metrics, coalescer, output
+        )
 
         # determine correct URL (API gateway location link)
         self.url_base = "https://" + "demo-" * demo + "api.ig.com/gateway/deal"
 
+        # log in
+        self.login()
+
+    def _set_options(
+        self,
+        transport: HTTPTransport = None,
+        rate_limiter: RateLimiter = None,
+        cache: PriceCache = None,
+        compact: int = 0,
+        epic_cache: EpicCache = None,
+        metrics: MetricsSink = None,
+        coalescer: RequestCoalescer = None,
+        output: str = "pandas",
+    ) -> None:
+        """
+        Check and set the options of this instance (see __init__ for the arguments),
+        for __init__ and 'from_session' alike.
+
+        ---
+        Raises:
+            * ValueError: if 'compact' or 'output' is not valid
+        """
+        if compact not in (0, 1, 2):
+            raise ValueError(f"compact must be 0, 1 or 2, not {compact!r}")
+
+        check_output(output)
+
+        self.transport = transport
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.compact = compact
+        self.epic_cache = epic_cache
+        self.metrics = metrics
+        self.coalescer = coalescer
+        self.output = output
+
+        # serializes logging in again when the session tokens of this instance expire
+        self._session_lock = threading.Lock()
+
+    def login(self) -> None:
+        """
+        Log into the IG REST API (a new session) with the instance's credentials;
+        called by __init__, and again if the session tokens expired.
+
+        ---
+        Raises:
+            * ValueError: if status_code != 200 (i.e. could not log in)
+        """
         # log in: variables
         url = f"{self.url_base}/session"
         header = {
             "Content-Type": "application/json; charset=UTF-8",
             "Accept": "application/json; charset=UTF-8",
             "VERSION": "2",
-            "X-IG-API-KEY": api_key,
+            "X-IG-API-KEY": self.api_key,
         }
-        json = {"identifier": username, "password": pw}
+        body = {"identifier": self.username, "password": self.pw}
 
         # log in: POST request
-        r = requests.post(url=url, headers=header, json=json)
+        r = self._request("POST", url, header, json=body)
 
-        self.acc_info = r.json()
+        acc_info = r.json()
 
         # log in: reponse
         # (response.text or response.json())
@@ -92,8 +249,24 @@ class IG_API:
 
         # retrieve tokens that MUST BE PASSED AS HEADERS to ALL subsequent API requests
         # [both tokens valid for 6H?]; get extended up to max of 72H while they are in use
-        self.token_cst = r.headers["CST"]  # client ID
-        self.token_x_security_token = r.headers["X-SECURITY-TOKEN"]  # current account
+        self._set_session(
+            r.headers["CST"],  # client ID
+            r.headers["X-SECURITY-TOKEN"],  # current account
+            acc_info,
+        )
+
+    def _set_session(
+        self,
+        token_cst: str,
+        token_x_security_token: str,
+        acc_info: dict,
+    ) -> None:
+        """
+        Set the session tokens and account data (see __init__ for the attributes set).
+        """
+        self.token_cst = token_cst
+        self.token_x_security_token = token_x_security_token
+        self.acc_info = acc_info
 
         # retreieve Lightstream address (required for all streaming connections)
         self.ls_addr = self.acc_info["lightstreamerEndpoint"]
@@ -105,11 +278,306 @@ class IG_API:
         self.header_base = {
             "Content-Type": "application/json; charset=UTF-8",
             "Accept": "application/json; charset=UTF-8",
-            "X-IG-API-KEY": api_key,
+            "X-IG-API-KEY": self.api_key,
+            "CST": self.token_cst,
+            "X-SECURITY-TOKEN": self.token_x_security_token,
+        }
+
+    def session_state(self) -> dict:
+        """
+        Return the session of this instance (tokens and account data, no password)
+        as a JSON serializable dict, i.e. to put in a shared store.
+
+        ---
+        Returns:
+            * dict: input of 'from_session'
+        """
+        return {
+            "demo": self.demo,
+            "api_key": self.api_key,
+            "token_cst": self.token_cst,
+            "token_x_security_token": self.token_x_security_token,
+            "acc_info": self.acc_info,
+            "saved_at": time.time(),
+        }
+
+    def save_session(self, path: str) -> None:
+        """
+        Save the session of this instance to a JSON file readable by the owner only
+        (replaced atomically, so processes reading it never see a partial file).
+
+        ---
+        Args:
+            * path (str): session file path
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.session_state(), f)
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_session(
+        cls,
+        session,
+        username: str = None,
+        pw: str = None,
+        **kwargs,
+    ):
+        """
+        Create an instance from a saved session, without logging in.
+
+        If the session tokens expired (401 response), the instance logs in again
+        with username/pw (if given) and retries the request.
+
+        ---
+        Args:
+            * session (str or dict): file written by 'save_session',
+            or dict returned by 'session_state'
+            * username (str, opt.): username (to log in again once the tokens expire)
+            * pw (str, opt.): password
+            * **kwargs: other keyword arguments of __init__ (transport, rate_limiter, ...)
+        ---
+        Raises:
+            * ValueError: if 'compact' or 'output' is not valid (see __init__)
+        ---
+        Returns:
+            * IG_API: instance using the saved session
+        """
+        if not isinstance(session, dict):
+            with open(session, "r") as f:
+                session = json.load(f)
+
+        self = cls.__new__(cls)
+
+        self.demo = session["demo"]
+        self.username = username
+        self.pw = pw
+        self.api_key = session["api_key"]
+
+        self._set_options(**kwargs)
+
+        # determine correct URL (API gateway location link)
+        self.url_base = "https://" + "demo-" * self.demo + "api.ig.com/gateway/deal"
+
+        self._set_session(
+            session["token_cst"], session["token_x_security_token"], session["acc_info"]
+        )
+
+        return self
+
+    def _refresh_session(self, header: dict) -> dict:
+        """
+        Log in again after a 401 response (session tokens expired), once for all
+        threads that got one with the same tokens.
+
+        ---
+        Args:
+            * header (dict): headers of the rejected request
+        ---
+        Returns:
+            * dict: headers with the new tokens, or None if logging in again
+            is not possible (no credentials, or not a session request)
+        """
+        if getattr(self, "pw", None) is None or "CST" not in header:
+            return None
+
+        with self._session_lock:
+            # another thread may have logged in again already
+            if header["CST"] == self.token_cst:
+                self.login()
+
+        return {
+            **header,
             "CST": self.token_cst,
             "X-SECURITY-TOKEN": self.token_x_security_token,
         }
 
+    @property
+    def transport(self) -> HTTPTransport:
+        """
+        Transport used for all requests of this instance
+        (a default pooled HTTPTransport is created on first use if none was given).
+        """
+        if getattr(self, "_transport", None) is None:
+            self._transport = HTTPTransport()
+
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: HTTPTransport) -> None:
+        self._transport = transport
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """
+        Rate limiter pacing all requests of this instance
+        (a default AdaptiveRateLimiter is created on first use if none was given).
+        """
+        if getattr(self, "_rate_limiter", None) is None:
+            self._rate_limiter = AdaptiveRateLimiter()
+
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: RateLimiter) -> None:
+        self._rate_limiter = rate_limiter
+
+    @property
+    def metrics(self) -> MetricsSink:
+        """
+        Sink receiving the instrumentation events of this instance: every request,
+        conversion and allowance update (a silent MetricsSink if none was given).
+        """
+        if getattr(self, "_metrics", None) is None:
+            self._metrics = MetricsSink()
+
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: MetricsSink) -> None:
+        self._metrics = metrics
+
+    @property
+    def allowance_tracker(self) -> AllowanceTracker:
+        """
+        Live view of the remaining historical data allowance, updated by every
+        'prices' response of this instance (created on first use).
+        """
+        if getattr(self, "_allowance_tracker", None) is None:
+            self._allowance_tracker = AllowanceTracker()
+
+        return self._allowance_tracker
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        header: dict,
+        relogin: int = 1,
+        **kwargs,
+    ):
+        """
+        Send a request through the transport, paced by the rate limiter.
+        Requests rejected for exceeding a per-minute limit are retried
+        (up to 'rate_limit_retries' times) once the limiter has backed off.
+
+        ---
+        Args:
+            * method (str): 'GET' or 'POST'
+            * url (str): request URL
+            * header (dict): request headers
+            * relogin (int, default=1):
+                * 1: on a 401 response (session tokens expired), log in again
+                and retry once (if the instance has credentials)
+                * 0: return the 401 response
+            * **kwargs: passed on to the transport (i.e. json=...)
+        ---
+        Returns:
+            * requests.Response: response of the last attempt
+        """
+        send = self.transport.post if method == "POST" else self.transport.get
+
+        # retries of the rate limiter (attempts) and of the transport (within 1 attempt)
+        wait = 0.0
+        retries = 0
+        for attempt in range(self.rate_limit_retries + 1):
+            wait += self.rate_limiter.acquire()
+
+            timer_start = time.perf_counter()
+            r = send(url=url, headers=header, **kwargs)
+            latency = time.perf_counter() - timer_start
+
+            retries += transport_retries(r)
+            self.rate_limiter.update(r.status_code, r.content)
+
+            if not is_rate_limited(r.status_code, r.content):
+                break
+
+        self._record_request(method, url, r, latency, attempt + retries, wait)
+
+        # session tokens expired (i.e. a saved session): log in again and retry once
+        if r.status_code == 401 and relogin:
+            header = self._refresh_session(header)
+
+            if header is not None:
+                return self._request(method, url, header, relogin=0, **kwargs)
+
+        return r
+
+    def _record_request(
+        self,
+        method: str,
+        url: str,
+        r,
+        latency: float,
+        retries: int,
+        wait: float,
+    ) -> None:
+        """
+        Record a 'request' event (of the last attempt) in the metrics sink;
+        'retries' counts the rate limiter's and the transport's retries.
+        """
+        self.metrics.record(
+            "request",
+            method=method,
+            endpoint=endpoint_of(url, self.url_base),
+            status=r.status_code,
+            latency=latency,
+            bytes=len(r.content),
+            retries=retries,
+            wait=wait,
+        )
+
+    def _update_allowance(self, allowance: dict) -> None:
+        """
+        Keep the 'allowance' dict of a 'prices' response (attribute, tracker and metrics);
+        None (a response shared by another process) is ignored.
+        """
+        if allowance is None:
+            return
+
+        self.allowance = allowance
+        self.allowance_tracker.update(allowance)
+
+        self.metrics.record(
+            "allowance",
+            remaining=allowance["remainingAllowance"],
+            total=allowance["totalAllowance"],
+        )
+
+    def _convert_prices(
+        self,
+        epic: str,
+        resolution: str,
+        prices_historical: list,
+        date_ranges: list = None,
+        table: int = 0,
+    ) -> pd.DataFrame:
+        """
+        Convert 'prices' response items to a DataFrame (or with 'table', directly
+        to a pyarrow Table of the points within 'date_ranges'), recording
+        a 'conversion' event.
+        """
+        timer_start = time.perf_counter()
+
+        if table:
+            prices = prices_to_table(prices_historical, date_ranges, self.compact)
+        else:
+            prices = prices_to_dataframe(prices_historical)
+
+        self.metrics.record(
+            "conversion",
+            epic=epic,
+            resolution=resolution,
+            points=len(prices_historical),
+            seconds=time.perf_counter() - timer_start,
+        )
+
+        return prices
+
     def get_watchlist(
         self,
     ) -> dict:
@@ -125,7 +593,7 @@ class IG_API:
         header = self.header_base
 
         # watchlist: GET request
-        r = requests.get(url=url, headers=header)
+        r = self._request("GET", url, header)
 
         # watchlist: response
         return r.json()
@@ -153,7 +621,7 @@ class IG_API:
         header = self.header_base
 
         # market_search: GET request
-        r = requests.get(url=url, headers=header)
+        r = self._request("GET", url, header)
 
         # market_search: response
         return r.json()
@@ -194,7 +662,57 @@ class IG_API:
 
         return "Asset not found"
 
-    def get_epics(self, assets: dict) -> dict:
+    def _run_per_asset(
+        self,
+        func,
+        assets: dict,
+        max_workers: int = None,
+        executor: Executor = None,
+    ) -> list[tuple]:
+        """
+        Call func(asset_name) for every asset in 'assets', either sequentially
+        or in parallel threads (all threads share the instance's rate limiter).
+
+        ---
+        Args:
+            * func (callable): called with each asset name
+            * assets (dict or list): asset names (run in this order)
+            * max_workers (int, opt.): run in a new thread pool of this size
+                * defaults to None (run sequentially unless 'executor' is given)
+            * executor (Executor, opt.): run in this executor (takes precedence
+            over max_workers; it is NOT shut down afterwards)
+        ---
+        Returns:
+            * list[tuple]: (asset_name, result, error) in the order of 'assets'
+                * sequential: exceptions are raised, error is always None
+                * parallel: exceptions are collected per asset (result is None)
+        """
+        if executor is None and max_workers is None:
+            return [(asset, func(asset), None) for asset in assets]
+
+        pool = executor if executor is not None else ThreadPoolExecutor(max_workers)
+
+        try:
+            futures = [(asset, pool.submit(func, asset)) for asset in assets]
+
+            results = []
+            for asset, future in futures:
+                try:
+                    results.append((asset, future.result(), None))
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    results.append((asset, None, e))
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+        return results
+
+    def get_epics(
+        self,
+        assets: dict,
+        max_workers: int = None,
+        executor: Executor = None,
+    ) -> dict:
         """
         Return the 'assets' dict updated with each assets' epic.
 
@@ -203,26 +721,70 @@ class IG_API:
             * assets (dict of dict):
                 * example key: 'GBPUSD'
                     * value: dict(key: 'instrument_name', value: 'GBP/USD')
+            * max_workers (int, opt.): run the market searches in a thread pool of this size
+                * defaults to None (searches run one after the other)
+            * executor (Executor, opt.): run the market searches in this executor instead
+                * defaults to None
+        ---
+        Notes to max_workers/executor:
+            * if either is given, a failed search does not abort the batch:
+            the exception is stored under the asset's 'error' key instead of 'epic'
+        ---
+        Notes to the epic cache (if the instance has one):
+            * only assets not stored yet are searched (all markets a search
+            returns are stored, so 1 search often serves several assets)
         ---
         Returns:
             * dict of dict: 'assets' input dict updated and returned
         """
-        # loop to get epics for all assets in 'assets' dict
-        for asset_name, d in assets.items():
-            instrument_name = d["instrument_name"]
-            expiry = d["expiry"]
-            assets[asset_name]["epic"] = self.find_asset_epic_or_info(
-                self.get_market_search(
-                    asset_name,
-                ),
-                instrument_name,
-                expiry,
+
+        def cached_epic(asset_name):
+            if self.epic_cache is None:
+                return None
+
+            return self.epic_cache.get(
+                assets[asset_name]["instrument_name"], assets[asset_name]["expiry"]
+            )
+
+        def search_epic(asset_name):
+            # may have been stored by the search of a previous asset
+            epic = cached_epic(asset_name)
+            if epic is not None:
+                return epic
+
+            market_search_dict = self.get_market_search(asset_name)
+
+            if self.epic_cache is not None:
+                self.epic_cache.put_markets(market_search_dict)
+
+            return self.find_asset_epic_or_info(
+                market_search_dict,
+                assets[asset_name]["instrument_name"],
+                assets[asset_name]["expiry"],
                 epic_only=1,
             )
 
+        # served from the epic cache
+        cached = {asset_name: cached_epic(asset_name) for asset_name in assets}
+        results = [(asset_name, epic, None) for asset_name, epic in cached.items() if epic]
+
+        # get epics for all other assets in 'assets' dict
+        results += self._run_per_asset(
+            search_epic,
+            [asset_name for asset_name, epic in cached.items() if epic is None],
+            max_workers,
+            executor,
+        )
+
+        for asset_name, epic, error in results:
+            if error is None:
+                assets[asset_name]["epic"] = epic
+            else:
+                assets[asset_name]["error"] = error
+
         return assets
 
-    def get_prices_single_asset(
+    def _plan_price_requests(
         self,
         epic: str,
         resolution: str,
@@ -231,222 +793,956 @@ class IG_API:
         end_date: str = None,
         weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
         num_points: int = None,
-    ) -> tuple:
+        resample: int = 0,
+    ) -> tuple[list]:
         """
-        Get prices DataFrame (bid/ask/mid/spreads for all OHLC prices and volume)
-        for given parameters and time interval;
-        also returns 'allowance' dict
-        (resets every 7 days to 10,000 historical price data points).
+        Return the 'prices' requests to send for the given parameters
+        (see 'get_prices_single_asset' for a description of the arguments).
+        If a cache is used, only the ranges missing from it are requested.
 
         ---
         Args:
-            * epic (str): instrument epic
-            * resolution (str): price resolution
-                * SECOND, MINUTE, MINUTE_2, MINUTE_3, MINUTE_5, MINUTE_10,
-                MINUTE_15, MINUTE_30, HOUR, HOUR_2, HOUR_3, HOUR_4, DAY, WEEK, MONTH
-            * range_type (str):
-                * 'num_points': use num_points argument
-                * 'dates': use start_date/end_date arguments with given timeInterval (see below)
-            * start_date (str, opt. depending on range_type):
-                * yyyy-MM-dd HH:mm:ss (inclusive)
-                * the time portion indicates time_interval_start
-                * see full description on how to use this below this 'Args' block
-                * defaults to None
-            * end_date (str, opt. depending on range_type):
-                * yyyy-MM-dd HH:mm:ss (inclusive)
-                * the time portion indicates time_interval_end
-                * see full description on how to use this below this 'Args' block
-                * defaults to None
-            * weekdays (tup[int], opt.):
-                * which days of the week to get data for (0: Mon, 6: Sun)
-                * defaults to all days of the week (0, 1, 2, 3, 4, 5, 6)
-                * NOTE: this is only applied to the code when the time portion
-                of the date range is different
-            * num_points (int, opt. depending on range_type):
-                * get last num_points data points
-                * defaults to None
-        ---
-        Notes to start_date/end_date:
-            * if the time portions are the SAME (00:00:00) then data is fetched using
-            ALL the 24 hours in EVERY single day available ('weekdays' parameter is IGNORED)
-            * if the time portions are DIFFERENT from one another, then the timeInterval and
-            'weekdays' parameter is applied
-            * during the timeInterval technique, note that the time rounds DOWNWARDS
-                * i.e. if getting HOURLY data from 00:00:00-23:59:59 final value would be 23:00:00
-                instead of: 23:59:59 OR 00:00:00 (which would be midnight the NEXT day,
-                but dates are INCLUSIVE so midnight the next day is technically
-                out of date range)
+            * resample (int, default=0):
+                * 1: first build (and store) the bars that finer bars stored in the
+                cache cover (see '_resample_from_cache'), for the fetch paths only
+                * 0: no writes (i.e. estimates); such bars are left out of the requests
         ---
         Returns:
             * tuple:
-                * prices (DataFrame): bid/ask/mid/spreads for all OHLC prices and volume data
-                for all time periods within time interval
-                * allowance (dict):
-                    * remainingAllowance: number of data points still available to fetch
-                    within current allowance period
-                    * totalAllowance: number of data points the API key and account
-                    combination is allowed to fetch in any given allowance period
-                    * allowanceExpiry: number of seconds till current allowance period
-                    ends and remainingAllowance field is reset
-                * instrument_type (str): e.g. CURRENCIES
+                * requests (list[tuple]): (URL, (start_date, end_date) or None) per request
+                * date_ranges (list[tuple[str]] or None): all ranges asked for
+                (None if range_type='num_points')
         """
-        # initialize flag at 0
-        # i.e. not using and timeInterval (later updated if necessary)
-        time_interval_flag = 0
-
         # range_type selection
         if range_type == "num_points":
-            url = f"{self.url_base}/prices/{epic}/{resolution}/{num_points}"
-
-            # number of times to loop requests.get for this range_type method
-            n = 1
-
-        elif range_type == "dates":
-            # unpack dates to dates and timeInterval
-            date_start, time_interval_start = start_date.split()
-            date_end, time_interval_end = end_date.split()
-
-            # condition to exclude time intervals
-            # gets all data points possible
-            # ignores 'weekdays' selection
-            if time_interval_start == time_interval_end:
-                url = (
-                    f"{self.url_base}/prices/{epic}/{resolution}/{start_date}/{end_date}"
-                )
-
-                # number of times to loop requests.get for this range_type method
-                n = 1
-
-            else:
-                # activate flag ONLY if 'dates' selected and time intervals DIFFER
-                # 'weekdays' input only taken into account HERE
-                time_interval_flag = 1
-
-                # create date range taking into account 'weekdays' input
-                date_range = pd.date_range(date_start, date_end)
-                date_range = list(filter(lambda x: x.weekday() in weekdays, date_range))
-                date_range = [x.strftime("%Y-%m-%d") for x in date_range]
-
-                # number of times to loop requests.get for this range_type method
-                n = len(date_range)
-
-        header = self.header_base.copy()
-        header["Version"] = "2"
+            return [(f"{self.url_base}/prices/{epic}/{resolution}/{num_points}", None)], None
 
-        # initialize list for loop
-        prices_historical = []
-
-        for i in range(n):
-            if time_interval_flag:
-                start_date = f"{date_range[i]} {time_interval_start}"
-                end_date = f"{date_range[i]} {time_interval_end}"
-                url = (
-                    f"{self.url_base}/prices/{epic}/{resolution}/{start_date}/{end_date}"
-                )
+        if range_type != "dates":
+            raise ValueError(f"unknown range_type: {range_type}")
 
-            # prices: GET request
-            # every request/loopIteration is 1 call to the API
-            # we have limit of max 60 or 30 [unclear] per minute
-            # need to sleep this section so that 1 call takes minimum 1s
-            # [for limit of 60 per minute]
-            # or 2s [for limit of 30 per minute]
-            # in reality, so far 3s sleep throws no error, whereas 1s or 2s still gives error
-            timer_start = time.time()
+        date_ranges = plan_date_ranges(start_date, end_date, weekdays)
 
-            r = requests.get(url=url, headers=header)
+        if resample:
+            self._resample_from_cache(epic, resolution, date_ranges)
 
-            timer_end = time.time()
+        return self._plan_range_requests(epic, resolution, date_ranges, merge=1), date_ranges
 
-            time_taken = timer_end - timer_start
-            print(f"{time_taken:.2f} seconds for asset {epic} to run day {i+1}/{n}")
+    def _plan_range_requests(
+        self,
+        epic: str,
+        resolution: str,
+        date_ranges: list,
+        merge: int = 0,
+    ) -> list[tuple]:
+        """
+        Return 1 'prices' request per date range
+        (if a cache is used: per part of a date range not stored yet),
+        ranges holding more than 'max_points_per_request' bars are split into chunks.
 
-            # if NOT a single API call
-            if n != 1:
-                # number of seconds to sleep between each API call
-                # to avoid exceeding unknown limit
-                seconds_force_sleep = 3.0
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * date_ranges (list[tuple[str]]): (start_date, end_date) ranges (inclusive)
+            * merge (int, default=0):
+                * 1: merge neighbouring ranges into spans (time interval mode,
+                see 'interval_strategy'); the caller filters the bars of the spans
+                * 0: 1 request per range
+        ---
+        Returns:
+            * list[tuple]: (URL, (start_date, end_date)) per request
+        """
+        # only fetch what is not stored locally yet
+        # (nor can be built from finer bars stored locally)
+        if self.cache is not None:
+            fetch_ranges = [
+                missing
+                for date_range in date_ranges
+                for missing in self.cache.missing(epic, resolution, *date_range)
+            ]
+            fetch_ranges, _ = self._plan_resample(epic, resolution, fetch_ranges)
+        else:
+            fetch_ranges = date_ranges
+
+        # spans where cheaper (filtered locally), chunks of at most 1 response
+        fetch_ranges = plan_fetch_ranges(
+            resolution,
+            fetch_ranges,
+            self.max_points_per_request,
+            self.interval_strategy,
+            self.request_cost,
+            merge,
+        )
+
+        return [
+            (f"{self.url_base}/prices/{epic}/{resolution}/{start}/{end}", (start, end))
+            for start, end in fetch_ranges
+        ]
+
+    def _resample_from_cache(
+        self,
+        epic: str,
+        resolution: str,
+        date_ranges: list,
+    ) -> None:
+        """
+        Build the bars of date_ranges that finer bars stored in the cache fully
+        cover and store them in the cache (if a cache is used).
 
-                # sleep if time taken for request is less than value of seconds_force_sleep
-                if time_taken < seconds_force_sleep:
-                    time.sleep(seconds_force_sleep - time_taken)
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * date_ranges (list[tuple[str]]): (start_date, end_date) ranges (inclusive)
+        """
+        if self.cache is None:
+            return
 
-            # store JSON result
-            res = r.json()
+        missing = [
+            gap
+            for date_range in date_ranges
+            for gap in self.cache.missing(epic, resolution, *date_range)
+        ]
 
-            # early function exit if error
-            if r.status_code != 200:
-                print("----------------------")
-                print("ERROR OCCURED")
-                print("----------------------")
-                print(f"STATUS CODE: {r.status_code}")
-                print()
+        _, builds = self._plan_resample(epic, resolution, missing)
 
-                # error codes link:
-                # https://labs.ig.com/rest-trading-api-reference/service-detail?id=684
+        for finer, start, end in builds:
+            self._store_resampled(epic, resolution, finer, start, end)
 
-                return r.content
+    def _plan_resample(
+        self,
+        epic: str,
+        resolution: str,
+        date_ranges: list,
+    ) -> tuple[list]:
+        """
+        Split date_ranges into the bars that finer bars stored in the cache fully
+        cover (coarsest finer resolution first) and the ranges still to fetch
+        (nothing is written).
 
-            # append prices info of each iteration in list container
-            # NOTE:
-            #   res['prices'] is a list
-            #   each elem is a different point in times' price info
-            prices_historical.extend(res["prices"])
-
-        # unpack result
-        allowance = res["allowance"]
-        instrument_type = res["instrumentType"]
-
-        ##########################
-        # convert prices_historical list to 4 DataFrames
-        # and then merge into 1 DataFrame with all fields: bid, ask, mid, spread, volume etc.
-        ##########################
-        # conversion inputs
-        price_types = ["openPrice", "highPrice", "lowPrice", "closePrice"]
-        last_traded_volume = []
-        snapshot_times = []
-        i = 0  # counter so we only gather snapshot_times values only ONCE
-
-        # initialize output dict
-        prices = {
-            "bid": {k: [] for k in price_types},
-            "ask": {k: [] for k in price_types},
-        }
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * date_ranges (list[tuple[str]]): (start_date, end_date) ranges not stored yet
+        ---
+        Returns:
+            * tuple:
+                * list[tuple[str]]: (start_date, end_date) ranges still to fetch
+                * list[tuple]: (finer resolution, start, end) of the bars to build
+        """
+        builds = []
+
+        for finer in finer_resolutions(resolution):
+            if not date_ranges:
+                break
+
+            if self.cache.stored_range(epic, finer) is None:
+                continue
 
-        # retrieve data in correct ordered way and place into DataFrames
-        for k in prices:
-            for t in prices_historical:
-                for p_type in price_types:
-                    prices[k][p_type].append(t[p_type][k])
+            remaining = []
+            for start_date, end_date in date_ranges:
+                start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
 
-                if i == 0:
-                    last_traded_volume.append(t["lastTradedVolume"])
-                    snapshot_times.append(pd.to_datetime(t["snapshotTime"]))
+                # finer bars needed for all bars starting in [start, end]
+                first_bar = bar_start(start, resolution)
+                if first_bar < start:
+                    first_bar = next_bar_start(start, resolution)
+
+                if first_bar > end:
+                    remaining.append((start_date, end_date))
+                    continue
+
+                fine_end = next_bar_start(end, resolution) - ONE_SECOND
+                fine_gaps = self.cache.missing(
+                    epic, finer, first_bar.strftime(DATE_FORMAT), fine_end.strftime(DATE_FORMAT)
+                )
 
-            prices[k] = pd.DataFrame(data=prices[k], index=snapshot_times)
+                to_fetch = coarse_ranges(resolution, start_date, end_date, fine_gaps)
 
-            i += 1
+                # build everything between the ranges to fetch
+                cursor = start
+                for built_start, built_end in to_fetch + [(end + ONE_SECOND, None)]:
+                    if cursor < built_start:
+                        builds.append((finer, cursor, built_start - ONE_SECOND))
+                    if built_end is not None:
+                        cursor = built_end + ONE_SECOND
+
+                remaining += [
+                    (s.strftime(DATE_FORMAT), e.strftime(DATE_FORMAT)) for s, e in to_fetch
+                ]
+
+            date_ranges = remaining
+
+        return date_ranges, builds
+
+    def _store_resampled(
+        self,
+        epic: str,
+        resolution: str,
+        finer: str,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+    ) -> None:
+        """
+        Resample the stored finer bars of the bars starting in [start, end]
+        and store them as fetched 'resolution' bars.
+        """
+        fine_start = bar_start(start, resolution)
+        if fine_start < start:
+            fine_start = next_bar_start(start, resolution)
+
+        fine = self.cache.read(
+            epic,
+            finer,
+            fine_start.strftime(DATE_FORMAT),
+            (next_bar_start(end, resolution) - ONE_SECOND).strftime(DATE_FORMAT),
+        )
+
+        prices = resample_prices(fine, resolution)
+        prices = prices[(prices.index >= start) & (prices.index <= end)]
+
+        self.cache.write(
+            epic,
+            resolution,
+            prices,
+            start.strftime(DATE_FORMAT),
+            end.strftime(DATE_FORMAT),
+            self.cache.instrument_type(epic),
+        )
+
+    def _compact_prices(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return the prices in the instance's output dtypes (see 'compact' in __init__).
+        """
+        if not self.compact:
+            return prices
+
+        return compact_prices(prices, derived=int(self.compact == 1))
+
+    def _output_prices(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return the prices in the instance's output dtypes and type
+        (see 'compact' and 'output' in __init__).
+        """
+        return output_frame(self._compact_prices(prices), self.output)
+
+    def _collect_prices(
+        self,
+        epic: str,
+        resolution: str,
+        date_ranges: list,
+        results: list,
+        to_store: list = None,
+    ) -> tuple:
+        """
+        Convert the (successful) 'prices' responses to the output tuple
+        of 'get_prices_single_asset'; if a cache is used, the responses are
+        stored first and the output is read back from the cache.
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * date_ranges (list[tuple[str]] or None): all ranges asked for
+            * results (list[tuple]): ((start_date, end_date) or None, res) per response,
+            in request order
+            * to_store (list[tuple], opt.): the results not stored in the cache yet
+                * defaults to None (all results)
+        ---
+        Returns:
+            * tuple: prices (DataFrame), allowance (dict), instrument_type (str)
+        """
+        for _, res in results:
+            self._update_allowance(res["allowance"])
+
+        if self.cache is None or date_ranges is None:
+            # join the prices info of all responses
+            # NOTE:
+            #   res['prices'] is a list (each elem is a different point in times'
+            #   price info), or PriceBars if decoded straight into columns
+            prices_historical = join_points([res["prices"] for _, res in results])
+
+            # unpack result
+            res = results[-1][1]
+
+            # columnar output: build the table directly (no DataFrame in between)
+            if self.output != "pandas":
+                table = self._convert_prices(
+                    epic, resolution, prices_historical, date_ranges, table=1
+                )
+                return output_table(table, self.output), res["allowance"], res["instrumentType"]
 
-        # create 'mid' DataFrame
-        prices["mid"] = (prices["bid"][price_types] + prices["ask"][price_types]) / 2
+            # convert prices_historical list to 1 DataFrame
+            prices = self._convert_prices(epic, resolution, prices_historical)
 
-        # create 'spread' DataFrame
-        prices["spread"] = prices["ask"][price_types] - prices["bid"][price_types]
+            # drop bars returned twice at chunk boundaries,
+            # and the bars of merged spans outside the ranges asked for
+            if date_ranges is not None:
+                prices = prices[~prices.index.duplicated(keep="last")]
+                prices = prices[ranges_mask(prices.index, date_ranges)]
 
-        # rename headers to shorten 'Prices' > 'Px'
-        # and append type of field (bid, ask, mid, spread)
-        for k in prices:
-            prices[k].columns = prices[k].columns.str.replace(
-                "Price", f"_px_{k}"
+            return self._output_prices(prices), res["allowance"], res["instrumentType"]
+
+        # store new data, then read the full ranges back
+        self._cache_results(epic, resolution, results if to_store is None else to_store)
+
+        frames = [self.cache.read(epic, resolution, *date_range) for date_range in date_ranges]
+        prices = pd.concat(frames) if frames else prices_to_dataframe([])
+
+        return self._output_prices(prices), self.allowance, self.cache.instrument_type(epic)
+
+    def _cache_results(
+        self,
+        epic: str,
+        resolution: str,
+        results: list,
+    ) -> None:
+        """
+        Store the (successful) 'prices' responses of date ranges in the cache.
+        """
+        for (start, end), res in results:
+            self.cache.write(
+                epic,
+                resolution,
+                self._convert_prices(epic, resolution, res["prices"]),
+                start,
+                end,
+                res["instrumentType"],
             )
 
-        # merge the DataFrames and add last_traded_volume column
-        prices = pd.concat([prices[k] for k in prices], axis=1)
-        prices["last_traded_volume"] = last_traded_volume
-        ##########################
-        # end of conversion from list to 1 DataFrame
-        ##########################
+    def _decode_prices(self, r) -> dict:
+        """
+        Decode a 'prices' response with the instance's JSON decoder (see 'json_decoder').
+        """
+        # error bodies, and responses assembled from shared fetches (already decoded)
+        if r.status_code != 200 or isinstance(r, CoalescedResponse):
+            return r.json()
+
+        return decode_prices(r.content, self.json_decoder)
+
+    def _send_price_request(
+        self,
+        url: str,
+    ):
+        """
+        Send 1 'prices' request.
+
+        ---
+        Returns:
+            * requests.Response: response of the request
+        """
+        header = self.header_base.copy()
+        header["Version"] = "2"
+
+        # prices: GET request
+        # every request/loopIteration is 1 call to the API
+        # calls are paced by the instance's rate limiter
+        # (IG allows max 60 calls per minute per API key and 30 per account)
+        # timings are recorded in the instance's metrics sink
+        if self.coalescer is not None:
+            return self.coalescer.send(self, url, lambda url: self._request("GET", url, header))
+
+        return self._request("GET", url, header)
+
+    def _fetch_prices(
+        self,
+        epic: str,
+        resolution: str,
+        requests: list,
+        date_ranges: list,
+        max_workers: int = None,
+    ) -> tuple:
+        """
+        Send the planned 'prices' requests and collect the output.
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+            * requests (list[tuple]): (URL, (start_date, end_date) or None) per request
+            * date_ranges (list[tuple[str]] or None): all ranges asked for
+            * max_workers (int, opt.): send the requests from a thread pool of this size
+                * defaults to None (one after the other)
+        ---
+        Returns:
+            * tuple: prices (DataFrame), allowance (dict), instrument_type (str)
+            * or bytes: response content of the first failed request
+        """
+        urls = [url for url, _ in requests]
+
+        # responses are yielded in request order (lazily if sequential)
+        if max_workers is None:
+            pool = None
+            responses = map(self._send_price_request, urls)
+        else:
+            pool = ThreadPoolExecutor(max_workers)
+            responses = pool.map(self._send_price_request, urls)
+
+        # initialize list for loop
+        results = []
+        to_store = []  # not stored by a coalescing process already
+
+        try:
+            for (_, date_range), r in zip(requests, responses):
+                # store JSON result
+                res = self._decode_prices(r)
+
+                # early function exit if error
+                if r.status_code != 200:
+                    print("----------------------")
+                    print("ERROR OCCURED")
+                    print("----------------------")
+                    print(f"STATUS CODE: {r.status_code}")
+                    print()
+
+                    # error codes link:
+                    # https://labs.ig.com/rest-trading-api-reference/service-detail?id=684
+
+                    # keep the ranges fetched so far: a retry only fetches the rest
+                    if self.cache is not None and date_ranges is not None:
+                        self._cache_results(epic, resolution, to_store)
+
+                    return r.content
+
+                results.append((date_range, res))
 
-        return prices, allowance, instrument_type
+                if not getattr(r, "stored", 0):
+                    to_store.append((date_range, res))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return self._collect_prices(epic, resolution, date_ranges, results, to_store)
+
+    def estimate_points(
+        self,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> int:
+        """
+        Estimate the allowance (number of data points) a 'get_prices_single_asset'
+        call with the same arguments costs, without sending any request.
+
+        The estimate assumes the market is open the whole time (upper bound)
+        and leaves out ranges already stored in the cache (if the instance has one).
+
+        ---
+        Returns:
+            * int: max number of data points fetched
+        """
+        if range_type == "num_points":
+            return num_points
+
+        requests, _ = self._plan_price_requests(
+            epic, resolution, range_type, start_date, end_date, weekdays, num_points
+        )
+
+        return sum(
+            estimate_range_points(resolution, *date_range) for _, date_range in requests
+        )
+
+    def get_prices_single_asset(
+        self,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+        max_workers: int = None,
+    ) -> tuple:
+        """
+        Get prices DataFrame (bid/ask/mid/spreads for all OHLC prices and volume)
+        for given parameters and time interval;
+        also returns 'allowance' dict
+        (resets every 7 days to 10,000 historical price data points).
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution
+                * SECOND, MINUTE, MINUTE_2, MINUTE_3, MINUTE_5, MINUTE_10,
+                MINUTE_15, MINUTE_30, HOUR, HOUR_2, HOUR_3, HOUR_4, DAY, WEEK, MONTH
+            * range_type (str):
+                * 'num_points': use num_points argument
+                * 'dates': use start_date/end_date arguments with given timeInterval (see below)
+            * start_date (str, opt. depending on range_type):
+                * yyyy-MM-dd HH:mm:ss (inclusive)
+                * the time portion indicates time_interval_start
+                * see full description on how to use this below this 'Args' block
+                * defaults to None
+            * end_date (str, opt. depending on range_type):
+                * yyyy-MM-dd HH:mm:ss (inclusive)
+                * the time portion indicates time_interval_end
+                * see full description on how to use this below this 'Args' block
+                * defaults to None
+            * weekdays (tup[int], opt.):
+                * which days of the week to get data for (0: Mon, 6: Sun)
+                * defaults to all days of the week (0, 1, 2, 3, 4, 5, 6)
+                * NOTE: this is only applied to the code when the time portion
+                of the date range is different
+            * num_points (int, opt. depending on range_type):
+                * get last num_points data points
+                * defaults to None
+            * max_workers (int, opt.): send the requests (days/chunks) of this asset
+            from a thread pool of this size, paced by the instance's rate limiter
+                * defaults to None (one after the other)
+        ---
+        Notes to start_date/end_date:
+            * if the time portions are the SAME (00:00:00) then data is fetched using
+            ALL the 24 hours in EVERY single day available ('weekdays' parameter is IGNORED)
+            * if the time portions are DIFFERENT from one another, then the timeInterval and
+            'weekdays' parameter is applied
+            * during the timeInterval technique, note that the time rounds DOWNWARDS
+                * i.e. if getting HOURLY data from 00:00:00-23:59:59 final value would be 23:00:00
+                instead of: 23:59:59 OR 00:00:00 (which would be midnight the NEXT day,
+                but dates are INCLUSIVE so midnight the next day is technically
+                out of date range)
+            * the days of a timeInterval are requested 1 by 1, or as contiguous spans
+            filtered locally where that costs less (see 'interval_strategy')
+        ---
+        Notes to long ranges:
+            * with range_type='dates', ranges that could hold more than
+            'max_points_per_request' bars are split into chunks requested separately
+            (use 'estimate_points' to see the allowance a call may cost up front)
+        ---
+        Notes to the cache (if the instance has one):
+            * with range_type='dates', only ranges not stored yet are requested,
+            new data is stored and the prices are then read from the cache
+            * with range_type='num_points' the cache is not used
+        ---
+        Returns:
+            * tuple:
+                * prices (DataFrame): bid/ask/mid/spreads for all OHLC prices and volume data
+                for all time periods within time interval (a pyarrow Table or polars
+                DataFrame with a columnar 'output', see __init__)
+                * allowance (dict):
+                    * remainingAllowance: number of data points still available to fetch
+                    within current allowance period
+                    * totalAllowance: number of data points the API key and account
+                    combination is allowed to fetch in any given allowance period
+                    * allowanceExpiry: number of seconds till current allowance period
+                    ends and remainingAllowance field is reset
+                * instrument_type (str): e.g. CURRENCIES
+            * or bytes: response content of the first failed request
+            (with a cache, the ranges fetched before it are stored; see PriceJob
+            for long pulls resumed after errors)
+        """
+        # list of requests to send (1 per day if a time interval is used)
+        requests, date_ranges = self._plan_price_requests(
+            epic, resolution, range_type, start_date, end_date, weekdays, num_points, resample=1
+        )
+
+        return self._fetch_prices(epic, resolution, requests, date_ranges, max_workers)
+
+    def _plan_price_segments(
+        self,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> list[tuple]:
+        """
+        Return the time ordered segments of the prices asked for: parts to request
+        and, if a cache is used, parts already stored (read from the cache instead;
+        bars finer stored bars cover are built and stored first).
+
+        ---
+        Returns:
+            * tuple:
+                * segments (list[tuple]): (URL or None if stored, (start_date, end_date)
+                or None) per segment
+                * date_ranges (list[tuple[str]] or None): all ranges asked for
+        """
+        requests, date_ranges = self._plan_price_requests(
+            epic, resolution, range_type, start_date, end_date, weekdays, num_points, resample=1
+        )
+
+        if self.cache is None or date_ranges is None:
+            return requests, date_ranges
+
+        segments = []
+        for start, end in date_ranges:
+            # stored parts are the gaps between the requests of the range
+            cursor = pd.Timestamp(start)
+            for url, (request_start, request_end) in self._plan_range_requests(
+                epic, resolution, [(start, end)]
+            ):
+                if cursor < pd.Timestamp(request_start):
+                    stored_end = pd.Timestamp(request_start) - ONE_SECOND
+                    segments.append(
+                        (None, (cursor.strftime(DATE_FORMAT), stored_end.strftime(DATE_FORMAT)))
+                    )
+                segments.append((url, (request_start, request_end)))
+                cursor = pd.Timestamp(request_end) + ONE_SECOND
+
+            if cursor <= pd.Timestamp(end):
+                segments.append((None, (cursor.strftime(DATE_FORMAT), end)))
+
+        return segments, date_ranges
+
+    def _iter_price_responses(
+        self,
+        requests: list,
+        max_workers: int = None,
+    ):
+        """
+        Send the 'prices' requests, yielding the responses in request order.
+
+        With max_workers, at most max_workers requests are in flight or
+        waiting to be consumed at any time (memory does not grow with the range).
+        """
+        if max_workers is None:
+            for url, _ in requests:
+                yield self._send_price_request(url)
+            return
+
+        pool = ThreadPoolExecutor(max_workers)
+        pending = deque()
+
+        try:
+            for url, _ in requests:
+                pending.append(pool.submit(self._send_price_request, url))
+
+                if len(pending) == max_workers:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def iter_prices(
+        self,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+        max_workers: int = None,
+    ):
+        """
+        Streaming version of 'get_prices_single_asset' (same arguments): yield
+        the prices 1 DataFrame chunk per response instead of 1 DataFrame at the end,
+        so memory stays flat whatever the range length.
+
+        If a cache is used, new responses are stored as they arrive and the parts
+        already stored are yielded (in time order) from the cache.
+
+        ---
+        Raises:
+            * ValueError: if a request fails (chunks yielded before are valid)
+        ---
+        Yields:
+            * tuple:
+                * prices (DataFrame): bid/ask/mid/spreads for all OHLC prices and
+                volume data of 1 response (or stored part), in time order
+                (a pyarrow Table or polars DataFrame with a columnar 'output')
+                (empty chunks are skipped)
+                * allowance (dict): 'allowance' dict of the last response
+                * instrument_type (str): e.g. CURRENCIES
+        """
+        for prices, allowance, instrument_type in self._iter_frames(
+            epic, resolution, range_type, start_date, end_date, weekdays, num_points, max_workers
+        ):
+            yield output_frame(prices, self.output), allowance, instrument_type
+
+    def _iter_frames(
+        self,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str,
+        end_date: str,
+        weekdays: tuple[int],
+        num_points: int,
+        max_workers: int,
+    ):
+        """
+        Yield the chunks of 'iter_prices' as DataFrames (in the output dtypes).
+        """
+        segments, date_ranges = self._plan_price_segments(
+            epic, resolution, range_type, start_date, end_date, weekdays, num_points
+        )
+        responses = self._iter_price_responses(
+            [segment for segment in segments if segment[0] is not None], max_workers
+        )
+
+        # last yielded snapshot time (bars returned twice at chunk boundaries are dropped)
+        last = None
+
+        try:
+            for url, date_range in segments:
+                if url is None:
+                    prices = self.cache.read(epic, resolution, *date_range)
+                    allowance = self.allowance
+                    instrument_type = self.cache.instrument_type(epic)
+                else:
+                    r = next(responses)
+                    res = self._decode_prices(r)
+
+                    if r.status_code != 200:
+                        # error codes link:
+                        # https://labs.ig.com/rest-trading-api-reference/service-detail?id=684
+                        raise ValueError(
+                            f"'prices' request failed with status code {r.status_code}: {r.content}"
+                        )
+
+                    allowance = res["allowance"]
+                    self._update_allowance(allowance)
+                    instrument_type = res["instrumentType"]
+
+                    prices = self._convert_prices(epic, resolution, res["prices"])
+
+                    stored = getattr(r, "stored", 0)
+
+                    if self.cache is not None and date_range is not None and not stored:
+                        self.cache.write(
+                            epic, resolution, prices, *date_range, instrument_type
+                        )
+
+                    # bars of a merged span outside the ranges asked for
+                    if date_ranges is not None:
+                        prices = prices[ranges_mask(prices.index, date_ranges)]
+
+                if last is not None:
+                    prices = prices[prices.index > last]
+
+                if prices.empty:
+                    continue
+
+                last = prices.index[-1]
+
+                yield self._compact_prices(prices), allowance, instrument_type
+        finally:
+            responses.close()
+
+    def save_prices(
+        self,
+        path: str,
+        epic: str,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+        max_workers: int = None,
+    ) -> tuple:
+        """
+        Write the prices of 'iter_prices' (same arguments) to a file chunk by chunk,
+        without holding the whole range in memory.
+
+        ---
+        Args:
+            * path (str): output file
+                * '.parquet': Parquet file (needs pyarrow)
+                * any other suffix: CSV file
+            * other arguments: see 'get_prices_single_asset'
+        ---
+        Raises:
+            * ValueError: if a request fails (the chunks before it are written)
+        ---
+        Returns:
+            * tuple:
+                * n_points (int): number of bars written
+                * allowance (dict): see 'get_prices_single_asset'
+                * instrument_type (str): e.g. CURRENCIES
+        """
+        parquet = str(path).endswith(".parquet")
+
+        if parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("writing Parquet files needs pyarrow: pip install pyarrow") from None
+
+        def write(prices, first):
+            nonlocal writer
+
+            if not parquet:
+                prices.to_csv(path, mode="w" if first else "a", header=first)
+                return
+
+            # volume is NaN in some chunks only: nullable ints keep 1 schema
+            prices = prices.astype({VOLUME_COLUMN: "Int64"})
+            table = pa.Table.from_pandas(prices)
+
+            if first:
+                writer = pq.ParquetWriter(path, table.schema)
+
+            writer.write_table(table.cast(writer.schema))
+
+        writer = None
+        n_points = 0
+        allowance, instrument_type = self.allowance, None
+
+        try:
+            for prices, allowance, instrument_type in self._iter_frames(
+                epic, resolution, range_type, start_date, end_date, weekdays, num_points, max_workers
+            ):
+                write(prices, n_points == 0)
+                n_points += len(prices)
+
+            # no data: still write the (empty) columns
+            if n_points == 0:
+                write(prices_to_dataframe([]), True)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        return n_points, allowance, instrument_type
+
+    def sync(
+        self,
+        epic: str,
+        resolution: str,
+        start_date: str = None,
+        end_date: str = None,
+        max_workers: int = None,
+    ) -> tuple:
+        """
+        Incrementally update the cache for 1 epic and resolution: only fetch the bars
+        after the last stored one, and backfill any holes in the stored series
+        (time ranges never fetched, or evicted, between start_date and end_date).
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * resolution (str): price resolution (see 'get_prices_single_asset')
+            * start_date (str, opt.):
+                * yyyy-MM-dd HH:mm:ss (inclusive)
+                * defaults to None (start of the stored series)
+                * required on the first sync of an epic/resolution
+            * end_date (str, opt.):
+                * yyyy-MM-dd HH:mm:ss (inclusive)
+                * defaults to None (now, in the account's timezone)
+            * max_workers (int, opt.): send the requests from a thread pool of this size
+                * defaults to None (one after the other)
+        ---
+        Raises:
+            * ValueError: if the instance has no cache, or nothing is stored yet
+            and no start_date is given
+        ---
+        Returns:
+            * tuple:
+                * prices (DataFrame): the bars fetched by this sync (bid/ask/mid/spreads
+                for all OHLC prices and volume data); empty if nothing was missing
+                * allowance (dict): see 'get_prices_single_asset'
+                (last known one if nothing was fetched)
+                * instrument_type (str): e.g. CURRENCIES (None if unknown)
+            * or bytes: response content of the first failed request
+        """
+        if self.cache is None:
+            raise ValueError("sync needs a cache: IG_API(..., cache=PriceCache(path))")
+
+        stored = self.cache.stored_range(epic, resolution)
+
+        if start_date is None:
+            if stored is None:
+                raise ValueError(
+                    f"nothing stored yet for {epic} {resolution}: start_date is required"
+                )
+            start_date = stored[0]
+
+        if end_date is None:
+            # IG dates are in the account's timezone
+            now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+            now += pd.Timedelta(hours=getattr(self, "utc_offset", 0) or 0)
+            end_date = now.strftime("%Y-%m-%d %H:%M:%S")
+
+        # only the parts of the range not stored yet: holes and everything after
+        # the last stored bar (which is fetched again if its period was still open)
+        self._resample_from_cache(epic, resolution, [(start_date, end_date)])
+        requests = self._plan_range_requests(epic, resolution, [(start_date, end_date)])
+
+        return self._fetch_prices(
+            epic, resolution, requests, [date_range for _, date_range in requests], max_workers
+        )
+
+    def plan_allowance(
+        self,
+        assets: dict,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+        remaining: int = None,
+    ) -> dict:
+        """
+        Estimate the allowance a 'get_prices_all_assets' job costs and which assets
+        fit the remaining budget (no request is sent).
+
+        Assets are taken by priority ('priority' key of each asset, int, default 0,
+        higher first; ties keep the order of 'assets') while their estimate fits.
+
+        ---
+        Args:
+            * assets ... num_points: see 'get_prices_all_assets'
+            * remaining (int, opt.): remaining allowance
+                * defaults to None (as last seen by 'allowance_tracker', unknown
+                before the first 'prices' response: then every asset fits)
+        ---
+        Returns:
+            * dict:
+                * points (dict): estimated points (upper bound) per asset
+                * total (int): estimated points of all assets
+                * remaining (int or None): remaining allowance used for the plan
+                * order (list): assets in the order they are fetched (by priority)
+                * selected (list): assets fitting the budget (in fetch order)
+                * skipped (list): assets that would exceed the budget
+        """
+        points = {
+            asset: self.estimate_points(
+                assets[asset]["epic"],
+                resolution,
+                range_type,
+                start_date,
+                end_date,
+                weekdays,
+                num_points,
+            )
+            for asset in assets
+        }
+
+        order = sorted(assets, key=lambda asset: -assets[asset].get("priority", 0))
+
+        if remaining is None:
+            remaining = self.allowance_tracker.available()
+
+        selected, skipped = [], []
+        budget = remaining
+
+        for asset in order:
+            if budget is None or points[asset] <= budget:
+                selected.append(asset)
+                budget = None if budget is None else budget - points[asset]
+            else:
+                skipped.append(asset)
+
+        return {
+            "points": points,
+            "total": sum(points.values()),
+            "remaining": remaining,
+            "order": order,
+            "selected": selected,
+            "skipped": skipped,
+        }
 
     def get_prices_all_assets(
         self,
@@ -457,6 +1753,9 @@ class IG_API:
         end_date: str = None,
         weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
         num_points: int = None,
+        max_workers: int = None,
+        executor: Executor = None,
+        budget_guard: str = None,
     ) -> tuple[dict]:
         """
         Get prices DataFrame (bid/ask/mid/spreads for all OHLC prices and volume)
@@ -491,6 +1790,25 @@ class IG_API:
             * num_points (int, opt. depending on range_type):
                 * get last num_points data points
                 * defaults to None
+            * max_workers (int, opt.): fetch assets in parallel in a thread pool of this size
+                * defaults to None (assets are fetched one after the other)
+                * all threads share the instance's rate limiter
+                (set the transport's pool_maxsize to at least max_workers)
+            * executor (Executor, opt.): fetch assets in parallel in this executor instead
+                * defaults to None
+            * budget_guard (str, opt.): protect the historical data allowance
+                * None (default): no checks
+                * 'skip': fetch assets by priority (see 'plan_allowance'); an asset whose
+                estimate exceeds the remaining allowance (tracked live, also across
+                parallel fetches) is skipped with an AllowanceExceededError under its
+                'error' key
+                * 'raise': as 'skip', but first raise AllowanceExceededError (before any
+                request) if the job is known not to fit the remaining allowance
+        ---
+        Notes to max_workers/executor:
+            * if either is given, a failed asset does not abort the batch:
+            the exception is stored under the asset's 'error' key
+            (instead of 'prices' and 'instrument_type')
         ---
         Notes to start_date/end_date:
             * if the time portions are the SAME (00:00:00) then data is fetched using
@@ -518,15 +1836,202 @@ class IG_API:
                     combination is allowed to fetch in any given allowance period
                     * allowanceExpiry: number of seconds till current allowance period
                     ends and remainingAllowance field is reset
+                    * (of the last asset fetched successfully, None if none was)
         """
-        for asset in assets:
-            epic = assets[asset]["epic"]
+        order = list(assets)
 
-            prices, allowance, instrument_type = self.get_prices_single_asset(
-                epic, resolution, range_type, start_date, end_date, weekdays, num_points
+        if budget_guard is not None:
+            plan = self.plan_allowance(
+                assets, resolution, range_type, start_date, end_date, weekdays, num_points
             )
+            order = plan["order"]
+
+            if budget_guard == "raise" and plan["skipped"]:
+                raise AllowanceExceededError(
+                    f"job needs up to {plan['total']} points, remaining allowance is "
+                    f"{plan['remaining']} (assets not fitting: {plan['skipped']})"
+                )
+
+        def get_prices(asset):
+            # reserve the asset's estimated points (None: skipped)
+            if budget_guard is not None:
+                reservation = self.allowance_tracker.reserve(plan["points"][asset])
+
+                if reservation is None:
+                    return None
+
+            try:
+                result = self.get_prices_single_asset(
+                    assets[asset]["epic"],
+                    resolution,
+                    range_type,
+                    start_date,
+                    end_date,
+                    weekdays,
+                    num_points,
+                )
+            finally:
+                if budget_guard is not None:
+                    self.allowance_tracker.release(reservation)
+
+            # error response content is returned instead of the tuple
+            if not isinstance(result, tuple):
+                raise ValueError(result)
+
+            return result
+
+        allowance = None
+
+        for asset, result, error in self._run_per_asset(
+            get_prices, order, max_workers, executor
+        ):
+            if error is not None:
+                assets[asset]["error"] = error
+                continue
+
+            if result is None:
+                assets[asset]["error"] = AllowanceExceededError(
+                    f"{asset} skipped: up to {plan['points'][asset]} points needed, "
+                    f"{self.allowance_tracker.available()} remaining"
+                )
+                continue
+
+            prices, allowance, instrument_type = result
 
             assets[asset]["prices"] = prices
             assets[asset]["instrument_type"] = instrument_type
 
         return assets, allowance
+
+    def lazy_prices(
+        self,
+        assets: dict,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> LazyPrices:
+        """
+        Lazy counterpart of 'get_prices_all_assets': return a mapping of asset name
+        to LazyAsset, which fetches the asset's prices (or reads them from the cache)
+        only when they are first accessed; time slices before that only request
+        the days they overlap.
+
+        ---
+        Args:
+            * assets (dict): dict of assets with their epics (assets without an
+            'epic' are searched on first access, see 'get_epics')
+            * other arguments: see 'get_prices_all_assets'
+        ---
+        Raises:
+            * ValueError: if the instance's output is not "pandas" (slices use .loc)
+        ---
+        Returns:
+            * LazyPrices: i.e. prices['GBPUSD'].prices, prices['GBPUSD']['2024-03-01':'2024-03-31'],
+            prices['GBPUSD'][:, ['close_px_bid', 'close_px_ask']]
+        """
+        params = {
+            "resolution": resolution,
+            "range_type": range_type,
+            "start_date": start_date,
+            "end_date": end_date,
+            "weekdays": weekdays,
+            "num_points": num_points,
+        }
+
+        if self.output != "pandas":
+            raise ValueError(f"lazy_prices needs output='pandas', not {self.output!r}")
+
+        return LazyPrices(self, assets, params)
+
+    def _instrument_type(self, epic: str) -> str:
+        """
+        Return the instrument type of an epic: stored in the cache, or else read
+        from its market details (1 request, no historical data allowance used);
+        None if unknown.
+        """
+        instrument_type = self.cache.instrument_type(epic)
+
+        if instrument_type is not None:
+            return instrument_type
+
+        header = self.header_base.copy()
+        header["Version"] = "3"
+
+        r = self._request("GET", f"{self.url_base}/markets/{epic}", header)
+
+        if r.status_code != 200:
+            return None
+
+        return r.json()["instrument"]["type"]
+
+    def stream_candles(
+        self,
+        epics: list,
+        resolution: str = "MINUTE",
+        store: int = 0,
+    ):
+        """
+        Stream live candles of some epics from IG's Lightstreamer server
+        (no 'prices' requests, no historical data allowance used).
+
+        ---
+        Args:
+            * epics (list[str]): instrument epics
+            * resolution (str, default='MINUTE'): SECOND, MINUTE, MINUTE_5 or HOUR
+            * store (int, default=0):
+                * 1: also append every completed candle to the instance's cache
+                (marked as fetched, so 'sync' and cached ranges do not request it
+                again; the instrument type of epics not stored yet is read from
+                their market details, 1 request per epic, no allowance used)
+                * 0: do not store the candles
+        ---
+        Raises:
+            * ValueError: if the resolution cannot be streamed, or store=1 without a cache
+            * ConnectionError: if the streaming session fails
+        ---
+        Yields:
+            * tuple:
+                * epic (str): instrument epic
+                * candle (DataFrame): completed candle (1 row, same columns
+                as the prices of 'get_prices_single_asset')
+        """
+        if resolution not in CHART_SCALES:
+            raise ValueError(
+                f"resolution {resolution} cannot be streamed, use one of {list(CHART_SCALES)}"
+            )
+
+        if store and self.cache is None:
+            raise ValueError("store=1 needs a cache: IG_API(..., cache=PriceCache(path))")
+
+        if store:
+            instrument_types = {epic: self._instrument_type(epic) for epic in epics}
+
+        items = [f"CHART:{epic}:{CHART_SCALES[resolution]}" for epic in epics]
+        assembler = CandleAssembler(getattr(self, "utc_offset", 0))
+
+        with LightstreamerClient(self) as client:
+            client.subscribe(items, CANDLE_FIELDS)
+
+            for item, candle in client.updates():
+                epic = item.split(":")[1]
+
+                for prices in assembler.update(epic, candle):
+                    if store:
+                        # the candle's whole period is final
+                        start = prices.index[0]
+                        end = next_bar_start(start, resolution) - ONE_SECOND
+
+                        self.cache.write(
+                            epic,
+                            resolution,
+                            prices,
+                            start.strftime(DATE_FORMAT),
+                            end.strftime(DATE_FORMAT),
+                            instrument_types[epic],
+                            complete=1,
+                        )
+
+                    yield epic, self._output_prices(prices)
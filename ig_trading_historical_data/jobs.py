@@ -0,0 +1,391 @@
+""" this module contains the PriceJob class, a resumable (checkpointed) 'get_prices_all_assets' job."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .decoding import decode_prices
+from .planning import AllowanceExceededError
+
+
+# ------------------------------------------------------------------
+# job inputs
+# ------------------------------------------------------------------
+# errorCode of a 'prices' response once the weekly data point allowance is used up
+# (waiting does not help: the job stops, run it again after the allowance reset)
+ALLOWANCE_ERROR_CODE = b"exceeded-account-historical-data-allowance"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS assets (
+    position INTEGER PRIMARY KEY,
+    asset TEXT NOT NULL,
+    epic TEXT NOT NULL,
+    date_ranges TEXT
+);
+CREATE TABLE IF NOT EXISTS units (
+    asset TEXT NOT NULL,
+    i INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    response BLOB,
+    PRIMARY KEY (asset, i)
+) WITHOUT ROWID;
+"""
+
+
+# ------------------------------------------------------------------
+# job class definition
+# ------------------------------------------------------------------
+class PriceJob:
+    """
+    Resumable 'get_prices_all_assets' job, checkpointed to 1 SQLite file.
+
+    The job is split into units (1 'prices' request each: 1 day of a time interval,
+    1 chunk of a long range, or the num_points request of an asset), planned once
+    when the checkpoint is created. Every completed unit is stored as it arrives, so
+    running the job again (after a crash, an error or the allowance reset) only
+    fetches the units not completed yet.
+
+    Failed units are retried with exponential backoff (up to 'retries' times per run);
+    once the historical data allowance is used up the run stops with an
+    AllowanceExceededError, leaving the remaining units for the next run.
+    """
+
+    def __init__(
+        self,
+        ig_api,
+        path: str,
+        assets: dict,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        sleep=time.sleep,
+        clock=time.monotonic,
+    ) -> None:
+        """
+        Open (or create and plan) the checkpoint of a job.
+
+        ---
+        Args:
+            * ig_api (IG_API): logged in instance sending the requests
+            * path (str): SQLite checkpoint file path
+            * assets ... num_points: see 'IG_API.get_prices_all_assets'
+            (every asset needs its 'epic')
+            * retries (int, default=3): retries of a failed unit per run
+            * backoff (float, default=1.0): seconds before the first retry
+            (doubled for each further retry)
+            * max_backoff (float, default=60.0): max seconds between retries
+            * sleep, clock (callable, opt.): replaceable (i.e. by a fake clock in tests)
+        ---
+        Raises:
+            * ValueError: if the checkpoint belongs to a job with other parameters
+        """
+        self.ig_api = ig_api
+        self.path = path
+        self.resolution = resolution
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+        params = json.dumps(
+            {
+                "assets": {asset: d["epic"] for asset, d in assets.items()},
+                "resolution": resolution,
+                "range_type": range_type,
+                "start_date": start_date,
+                "end_date": end_date,
+                "weekdays": list(weekdays),
+                "num_points": num_points,
+            },
+            sort_keys=True,
+        )
+
+        row = self.conn.execute("SELECT value FROM job WHERE key = 'params'").fetchone()
+
+        if row is None:
+            self._plan(assets, params, range_type, start_date, end_date, weekdays, num_points)
+        elif row[0] != params:
+            raise ValueError(f"checkpoint {path} belongs to a job with other parameters")
+
+    def _plan(
+        self,
+        assets: dict,
+        params: str,
+        range_type: str,
+        start_date: str,
+        end_date: str,
+        weekdays: tuple[int],
+        num_points: int,
+    ) -> None:
+        """
+        Store the parameters and the units of a new job.
+        """
+        asset_rows, unit_rows = [], []
+
+        for position, (asset, d) in enumerate(assets.items()):
+            requests, date_ranges = self.ig_api._plan_price_requests(
+                d["epic"], self.resolution, range_type, start_date, end_date, weekdays, num_points,
+                resample=1,
+            )
+
+            asset_rows.append(
+                (position, asset, d["epic"], None if date_ranges is None else json.dumps(date_ranges))
+            )
+            unit_rows.extend(
+                (asset, i, url, *(date_range or (None, None)), "pending", None, None)
+                for i, (url, date_range) in enumerate(requests)
+            )
+
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT INTO assets VALUES (?, ?, ?, ?)", asset_rows)
+            self.conn.executemany(
+                "INSERT INTO units VALUES (?, ?, ?, ?, ?, ?, ?, ?)", unit_rows
+            )
+            self.conn.execute("INSERT INTO job VALUES ('params', ?)", (params,))
+
+    def close(self) -> None:
+        """
+        Close the checkpoint file.
+        """
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def progress(self) -> dict:
+        """
+        Return the number of units per status.
+
+        ---
+        Returns:
+            * dict: pending, done, failed and total number of units
+        """
+        with self.lock:
+            counts = dict(
+                self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall()
+            )
+
+        progress = {status: counts.get(status, 0) for status in ("pending", "done", "failed")}
+        progress["total"] = sum(progress.values())
+
+        return progress
+
+    def _send(self, unit: tuple):
+        """
+        Send the request of 1 unit.
+
+        ---
+        Returns:
+            * requests.Response or Exception: response, or the error raised sending it
+        """
+        _, _, url = unit
+
+        try:
+            return self.ig_api._send_price_request(url)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return e
+
+    def run(self, max_workers: int = None) -> tuple[dict]:
+        """
+        Fetch the units not completed yet, then return the output of
+        'get_prices_all_assets' for all completed assets.
+
+        ---
+        Args:
+            * max_workers (int, opt.): send the requests from a thread pool of this size
+                * defaults to None (one after the other)
+        ---
+        Raises:
+            * AllowanceExceededError: if the allowance got used up (completed units
+            are kept: run again once it is reset)
+        ---
+        Returns:
+            * tuple: assets (dict), allowance (dict), see 'get_prices_all_assets'
+                * assets with a unit still failing after all retries get an 'error'
+                key instead of 'prices' and 'instrument_type'
+        """
+        with self.lock, self.conn:
+            # units failed in an earlier run get a new set of retries
+            self.conn.execute("UPDATE units SET status = 'pending', error = NULL WHERE status = 'failed'")
+
+            rows = self.conn.execute(
+                "SELECT u.asset, u.i, u.url "
+                "FROM units u JOIN assets a ON a.asset = u.asset "
+                "WHERE u.status = 'pending' ORDER BY a.position, u.i"
+            ).fetchall()
+
+        # unit: (attempts, next try)
+        pending = {unit: (0, self.clock()) for unit in rows}
+        exhausted = False
+
+        pool = None if max_workers is None else ThreadPoolExecutor(max_workers)
+
+        try:
+            while pending and not exhausted:
+                now = self.clock()
+                due = [unit for unit, (_, next_try) in pending.items() if next_try <= now]
+
+                if not due:
+                    self.sleep(min(next_try for _, next_try in pending.values()) - now)
+                    continue
+
+                responses = map(self._send, due) if pool is None else pool.map(self._send, due)
+
+                for unit, r in zip(due, responses):
+                    attempts, _ = pending.pop(unit)
+
+                    if not isinstance(r, Exception) and r.status_code == 200:
+                        self._cache_unit(unit, r)
+                        self._set_status(unit, "done", response=r.content)
+                        continue
+
+                    if isinstance(r, Exception):
+                        error = repr(r)
+                    else:
+                        # error codes link:
+                        # https://labs.ig.com/rest-trading-api-reference/service-detail?id=684
+                        error = f"'prices' request failed with status code {r.status_code}: {r.content}"
+
+                        # stop sending (the unit stays pending for the next run); the
+                        # rest of a parallel batch was sent already: its responses are
+                        # still stored, so they are not paid for again
+                        if ALLOWANCE_ERROR_CODE in r.content:
+                            exhausted = True
+
+                            if pool is None:
+                                break
+
+                            continue
+
+                    attempts += 1
+                    if attempts > self.retries:
+                        self._set_status(unit, "failed", error=error)
+                    else:
+                        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+                        pending[unit] = (attempts, self.clock() + delay)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        if exhausted:
+            progress = self.progress()
+            raise AllowanceExceededError(
+                f"historical data allowance used up with {progress['pending']} of "
+                f"{progress['total']} units left: run the job again once it is reset"
+            )
+
+        return self._collect()
+
+    def _cache_unit(self, unit: tuple, r) -> None:
+        """
+        Store the response of 1 completed unit of a date range in the instance's
+        cache (if any), once: the collected output is read back from it.
+        """
+        # stored by a coalescing process already
+        if self.ig_api.cache is None or getattr(r, "stored", 0):
+            return
+
+        asset, i = unit[:2]
+
+        with self.lock:
+            epic, start, end = self.conn.execute(
+                "SELECT a.epic, u.start_date, u.end_date "
+                "FROM units u JOIN assets a ON a.asset = u.asset WHERE u.asset = ? AND u.i = ?",
+                (asset, i),
+            ).fetchone()
+
+        if start is not None:
+            self.ig_api._cache_results(epic, self.resolution, [((start, end), self.ig_api._decode_prices(r))])
+
+    def _set_status(
+        self,
+        unit: tuple,
+        status: str,
+        error: str = None,
+        response: bytes = None,
+    ) -> None:
+        """
+        Checkpoint the outcome of 1 unit.
+        """
+        asset, i = unit[:2]
+
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE units SET status = ?, error = ?, response = ? WHERE asset = ? AND i = ?",
+                (status, error, response, asset, i),
+            )
+
+    def _collect(self) -> tuple[dict]:
+        """
+        Convert the stored responses of every asset (in planned order).
+        """
+        with self.lock:
+            asset_rows = self.conn.execute(
+                "SELECT asset, epic, date_ranges FROM assets ORDER BY position"
+            ).fetchall()
+
+        assets = {}
+        allowance = None
+
+        for asset, epic, date_ranges in asset_rows:
+            assets[asset] = {"epic": epic}
+
+            with self.lock:
+                units = self.conn.execute(
+                    "SELECT start_date, end_date, status, error, response FROM units "
+                    "WHERE asset = ? ORDER BY i",
+                    (asset,),
+                ).fetchall()
+
+            errors = [error for _, _, status, error, _ in units if status != "done"]
+            if errors:
+                assets[asset]["error"] = ValueError(errors[0] or "unit not completed")
+                continue
+
+            results = [
+                (
+                    None if start is None else (start, end),
+                    decode_prices(response, self.ig_api.json_decoder),
+                )
+                for start, end, _, _, response in units
+            ]
+
+            prices, allowance, instrument_type = self.ig_api._collect_prices(
+                epic,
+                self.resolution,
+                None if date_ranges is None else [tuple(r) for r in json.loads(date_ranges)],
+                results,
+                to_store=[],  # stored as the units completed
+            )
+
+            assets[asset]["prices"] = prices
+            assets[asset]["instrument_type"] = instrument_type
+
+        return assets, allowance
@@ -0,0 +1,242 @@
+""" this module contains the LazyPrices mapping, fetching the prices of an asset on first access."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import threading
+from collections.abc import Mapping
+
+import pandas as pd
+
+from .conversion import prices_to_dataframe
+from .planning import DATE_FORMAT, ONE_SECOND
+
+
+# ------------------------------------------------------------------
+# lazy access class definitions
+# ------------------------------------------------------------------
+class LazyAsset:
+    """
+    Prices of 1 asset, fetched (or read from the instance's cache) on first access.
+
+    * asset.prices: all prices of the job (fetched once, then kept)
+    * asset[start:end], asset[start:end, columns], asset[columns]: a part of them;
+    before the first full load only the days of [start, end] are requested
+    (parts fetched once are kept and not requested again)
+    """
+
+    def __init__(
+        self,
+        ig_api,
+        name: str,
+        asset: dict,
+        params: dict,
+    ) -> None:
+        """
+        ---
+        Args:
+            * ig_api (IG_API): instance fetching the prices
+            * name (str): asset name
+            * asset (dict): asset dict ('epic', or 'instrument_name' and 'expiry'
+            to search the epic on first access)
+            * params (dict): resolution ... num_points of 'get_prices_single_asset'
+        """
+        self.ig_api = ig_api
+        self.name = name
+        self.asset = asset
+        self.params = params
+
+        self.allowance = None
+        self.instrument_type = None
+
+        self._prices = None
+        self._parts = []  # ((start, end), prices) of the parts fetched before the full load
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"LazyAsset({self.name!r}, {self.params['resolution']}, {state})"
+
+    @property
+    def loaded(self) -> bool:
+        """
+        True once all prices of the job were fetched.
+        """
+        return self._prices is not None
+
+    @property
+    def epic(self) -> str:
+        """
+        Epic of the asset (searched on first access if not given).
+        """
+        if self.asset.get("epic") is None:
+            self.ig_api.get_epics({self.name: self.asset})
+
+        return self.asset["epic"]
+
+    def _fetch(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Fetch the prices of the job between start_date and end_date.
+        """
+        params = {**self.params, "start_date": start_date, "end_date": end_date}
+
+        result = self.ig_api.get_prices_single_asset(self.epic, **params)
+
+        # error response content is returned instead of the tuple
+        if not isinstance(result, tuple):
+            raise ValueError(result)
+
+        prices, self.allowance, self.instrument_type = result
+
+        return prices
+
+    @property
+    def prices(self) -> pd.DataFrame:
+        """
+        All prices of the job (fetched on first access).
+        """
+        with self._lock:
+            if self._prices is None:
+                self._prices = self._fetch(self.params["start_date"], self.params["end_date"])
+                self._parts = []
+
+        return self._prices
+
+    def get(
+        self,
+        start: str = None,
+        end: str = None,
+        columns: list = None,
+    ) -> pd.DataFrame:
+        """
+        Return the prices within [start, end] (inclusive).
+
+        ---
+        Args:
+            * start (str or Timestamp, opt.): first time
+                * defaults to None (start of the job)
+            * end (str or Timestamp, opt.): last time
+                * defaults to None (end of the job)
+            * columns (str or list[str], opt.): columns to return
+                * defaults to None (all columns)
+        ---
+        Returns:
+            * DataFrame: prices indexed by snapshot time
+        """
+        if self.loaded or self.params["range_type"] != "dates" or (start is None and end is None):
+            prices = self.prices
+        else:
+            prices = self._fetch_part(start, end)
+
+        prices = prices.loc[start:end]
+
+        if columns is None:
+            return prices
+
+        # mid/spread of compact prices (compact=2) are computed on access
+        selected = [columns] if isinstance(columns, str) else list(columns)
+        if not all(column in prices for column in selected):
+            prices = prices.ig.full()
+
+        return prices[columns]
+
+    def _fetch_part(self, start: str, end: str) -> pd.DataFrame:
+        """
+        Fetch the days of the job overlapping [start, end] (keeping its time interval,
+        if any), unless a part fetched before covers them.
+        """
+        job_start = pd.Timestamp(self.params["start_date"])
+        job_end = pd.Timestamp(self.params["end_date"])
+
+        part_start = job_start if start is None else max(job_start, pd.Timestamp(start))
+        part_end = job_end
+
+        if end is not None:
+            end_time = pd.Timestamp(end)
+
+            # a date only (as in .loc): the whole day
+            if isinstance(end, str) and ":" not in end:
+                end_time += pd.Timedelta(days=1) - ONE_SECOND
+
+            part_end = min(job_end, end_time)
+
+        if job_start.time() != job_end.time():
+            # time interval: whole days, keeping the interval's start/end times
+            part_start = part_start.normalize() + (job_start - job_start.normalize())
+            part_end = part_end.normalize() + (job_end - job_end.normalize())
+        else:
+            # whole range: whole days, start and end at the job's time of day
+            # (different times would request a time interval); .loc cuts the bounds
+            offset = job_start - job_start.normalize()
+            day_start = (part_start - offset).normalize() + offset
+            day_end = (part_end - offset).normalize() + offset
+
+            if day_end < part_end:
+                day_end += pd.Timedelta(days=1)
+
+            part_start, part_end = max(job_start, day_start), min(job_end, day_end)
+
+        if part_start > part_end:
+            return self.ig_api._output_prices(prices_to_dataframe([]))
+
+        with self._lock:
+            for (fetched_start, fetched_end), prices in self._parts:
+                if fetched_start <= part_start and part_end <= fetched_end:
+                    return prices
+
+        prices = self._fetch(part_start.strftime(DATE_FORMAT), part_end.strftime(DATE_FORMAT))
+
+        with self._lock:
+            self._parts.append(((part_start, part_end), prices))
+
+        return prices
+
+    def __getitem__(self, key) -> pd.DataFrame:
+        """
+        asset[start:end], asset[start:end, columns] or asset[columns].
+        """
+        columns = None
+
+        if isinstance(key, tuple):
+            key, columns = key
+
+        if not isinstance(key, slice):
+            return self.get(columns=key)
+
+        return self.get(key.start, key.stop, columns)
+
+
+class LazyPrices(Mapping):
+    """
+    Read-only mapping of asset name to LazyAsset: nothing is fetched until
+    the prices of an asset are accessed, and then only that asset's
+    (see 'IG_API.lazy_prices').
+    """
+
+    def __init__(
+        self,
+        ig_api,
+        assets: dict,
+        params: dict,
+    ) -> None:
+        self._assets = {
+            name: LazyAsset(ig_api, name, asset, params) for name, asset in assets.items()
+        }
+
+    def __getitem__(self, name: str) -> LazyAsset:
+        return self._assets[name]
+
+    def __iter__(self):
+        return iter(self._assets)
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def __repr__(self) -> str:
+        return f"LazyPrices({list(self._assets)})"
+
+    def loaded(self) -> list[str]:
+        """
+        Return the assets whose prices were fetched.
+        """
+        return [name for name, asset in self._assets.items() if asset.loaded]
@@ -0,0 +1,269 @@
+""" this module contains the metrics sinks that receive the instrumentation events of IG_API."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import bisect
+import threading
+
+
+# ------------------------------------------------------------------
+# metrics inputs
+# ------------------------------------------------------------------
+# events recorded by IG_API (and the fields passed with them):
+#   * "request": method, endpoint, status, latency (s), bytes, retries, wait (s)
+#     (retries: of the rate limiter (rejected for a per-minute limit)
+#     and of the transport (connection errors, 502/503/504))
+#   * "conversion": epic, resolution, points, seconds
+#   * "allowance": remaining, total
+EVENTS = ("request", "conversion", "allowance")
+
+# histogram buckets (upper bounds, seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def endpoint_of(url: str, url_base: str) -> str:
+    """
+    Return the endpoint of a request URL, i.e. 'prices' for
+    {url_base}/prices/CS.D.GBPUSD.TODAY.IP/MINUTE/10 (a low cardinality label).
+    """
+    path = url[len(url_base):] if url.startswith(url_base) else url
+
+    return path.split("?", 1)[0].strip("/").split("/", 1)[0]
+
+
+# ------------------------------------------------------------------
+# metrics sink class definitions
+# ------------------------------------------------------------------
+class MetricsSink:
+    """
+    Base class of all metrics sinks, and the silent default of IG_API
+    (every event is dropped).
+
+    A sink is shared by all requests of an IG_API instance (and its threads):
+        * record(event, **fields): receive 1 event (see EVENTS)
+    """
+
+    def record(self, event: str, **fields) -> None:
+        """
+        Receive 1 instrumentation event (no-op).
+
+        ---
+        Args:
+            * event (str): 'request', 'conversion' or 'allowance'
+            * **fields: fields of the event (see EVENTS)
+        """
+
+
+class CallbackSink(MetricsSink):
+    """
+    Pass every event to a hook: callback(event, fields), i.e. to log it
+    or to collect the events in a list.
+    """
+
+    def __init__(self, callback) -> None:
+        """
+        ---
+        Args:
+            * callback (callable): called as callback(event (str), fields (dict))
+        """
+        self.callback = callback
+
+    def record(self, event: str, **fields) -> None:
+        self.callback(event, fields)
+
+
+class _Histogram:
+    """
+    Cumulative histogram of 1 label set (Prometheus semantics).
+    """
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Aggregate the events into Prometheus metrics (no dependency), exposed
+    in the text exposition format by 'render' (i.e. served on /metrics):
+        * ig_api_requests_total{method, endpoint, status} (counter)
+        * ig_api_request_retries_total{endpoint} (counter)
+        * ig_api_response_bytes_total{endpoint} (counter)
+        * ig_api_request_duration_seconds{endpoint} (histogram)
+        * ig_api_rate_limit_wait_seconds{endpoint} (histogram)
+        * ig_api_conversion_seconds (histogram)
+        * ig_api_converted_points_total (counter)
+        * ig_api_allowance_remaining, ig_api_allowance_total (gauges)
+    """
+
+    def __init__(self, namespace: str = "ig_api") -> None:
+        """
+        ---
+        Args:
+            * namespace (str, default="ig_api"): prefix of the metric names
+        """
+        self.namespace = namespace
+        self.lock = threading.Lock()
+
+        self.counters = {}  # (name, labels): value
+        self.histograms = {}  # (name, labels): _Histogram
+        self.gauges = {}  # (name, labels): value
+
+    def _inc(self, name: str, labels: tuple, value: float = 1) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def _observe(self, name: str, labels: tuple, buckets: tuple, value: float) -> None:
+        key = (name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = _Histogram(buckets)
+
+        self.histograms[key].observe(value)
+
+    def record(self, event: str, **fields) -> None:
+        with self.lock:
+            if event == "request":
+                endpoint = (("endpoint", fields["endpoint"]),)
+
+                self._inc(
+                    "requests_total",
+                    (("method", fields["method"]),) + endpoint + (("status", str(fields["status"])),),
+                )
+                self._inc("request_retries_total", endpoint, fields["retries"])
+                self._inc("response_bytes_total", endpoint, fields["bytes"])
+                self._observe("request_duration_seconds", endpoint, LATENCY_BUCKETS, fields["latency"])
+                self._observe("rate_limit_wait_seconds", endpoint, WAIT_BUCKETS, fields["wait"])
+
+            elif event == "conversion":
+                self._observe("conversion_seconds", (), LATENCY_BUCKETS, fields["seconds"])
+                self._inc("converted_points_total", (), fields["points"])
+
+            elif event == "allowance":
+                self.gauges[("allowance_remaining", ())] = fields["remaining"]
+                self.gauges[("allowance_total", ())] = fields["total"]
+
+    def render(self) -> str:
+        """
+        Return all metrics in the Prometheus text exposition format.
+
+        ---
+        Returns:
+            * str: exposition text (version 0.0.4)
+        """
+
+        def labels_text(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+        lines = []
+        typed = set()
+
+        def add_type(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                name = f"{self.namespace}_{name}"
+                add_type(name, "counter")
+                lines.append(f"{name}{labels_text(labels)} {value}")
+
+            for (name, labels), value in sorted(self.gauges.items()):
+                name = f"{self.namespace}_{name}"
+                add_type(name, "gauge")
+                lines.append(f"{name}{labels_text(labels)} {value}")
+
+            for (name, labels), hist in sorted(self.histograms.items(), key=lambda item: item[0]):
+                name = f"{self.namespace}_{name}"
+                add_type(name, "histogram")
+
+                cumulative = 0
+                for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{labels_text(labels + (('le', str(bound)),))} {cumulative}")
+
+                lines.append(f"{name}_sum{labels_text(labels)} {hist.sum}")
+                lines.append(f"{name}_count{labels_text(labels)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetrySink(MetricsSink):
+    """
+    Record the events as OpenTelemetry metrics (same names and attributes as
+    PrometheusSink), exported by the meter provider configured by the application.
+    Needs opentelemetry-api (imported on creation).
+    """
+
+    def __init__(self, meter=None) -> None:
+        """
+        ---
+        Args:
+            * meter (opentelemetry.metrics.Meter, opt.): meter to create the instruments with
+                * defaults to None (meter "ig_trading_historical_data" of the global provider)
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:
+                raise ImportError(
+                    "OpenTelemetrySink needs opentelemetry-api: pip install opentelemetry-api"
+                ) from None
+
+            meter = metrics.get_meter("ig_trading_historical_data")
+
+        self.requests = meter.create_counter("ig_api.requests", unit="1")
+        self.retries = meter.create_counter("ig_api.request_retries", unit="1")
+        self.bytes = meter.create_counter("ig_api.response_bytes", unit="By")
+        self.duration = meter.create_histogram("ig_api.request_duration", unit="s")
+        self.wait = meter.create_histogram("ig_api.rate_limit_wait", unit="s")
+        self.conversion = meter.create_histogram("ig_api.conversion_duration", unit="s")
+        self.points = meter.create_counter("ig_api.converted_points", unit="1")
+
+        # gauges are observed at export time
+        self.allowance = {}
+        meter.create_observable_gauge(
+            "ig_api.allowance_remaining", callbacks=[self._observe_allowance("remaining")]
+        )
+        meter.create_observable_gauge(
+            "ig_api.allowance_total", callbacks=[self._observe_allowance("total")]
+        )
+
+    def _observe_allowance(self, key: str):
+        from opentelemetry.metrics import Observation
+
+        def callback(options):
+            if key in self.allowance:
+                yield Observation(self.allowance[key])
+
+        return callback
+
+    def record(self, event: str, **fields) -> None:
+        if event == "request":
+            attributes = {"endpoint": fields["endpoint"]}
+
+            self.requests.add(
+                1, {**attributes, "method": fields["method"], "status": str(fields["status"])}
+            )
+            self.retries.add(fields["retries"], attributes)
+            self.bytes.add(fields["bytes"], attributes)
+            self.duration.record(fields["latency"], attributes)
+            self.wait.record(fields["wait"], attributes)
+
+        elif event == "conversion":
+            self.conversion.record(fields["seconds"])
+            self.points.add(fields["points"])
+
+        elif event == "allowance":
+            self.allowance.update(remaining=fields["remaining"], total=fields["total"])
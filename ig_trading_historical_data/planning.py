@@ -0,0 +1,435 @@
+""" this module contains the request planning helpers (point estimates and range chunking)."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------------------------------------------
+# planning inputs
+# ------------------------------------------------------------------
+# time between 2 bars of each resolution
+# (MONTH uses the shortest month, so estimates are upper bounds)
+RESOLUTION_DELTAS = {
+    "SECOND": pd.Timedelta(seconds=1),
+    "MINUTE": pd.Timedelta(minutes=1),
+    "MINUTE_2": pd.Timedelta(minutes=2),
+    "MINUTE_3": pd.Timedelta(minutes=3),
+    "MINUTE_5": pd.Timedelta(minutes=5),
+    "MINUTE_10": pd.Timedelta(minutes=10),
+    "MINUTE_15": pd.Timedelta(minutes=15),
+    "MINUTE_30": pd.Timedelta(minutes=30),
+    "HOUR": pd.Timedelta(hours=1),
+    "HOUR_2": pd.Timedelta(hours=2),
+    "HOUR_3": pd.Timedelta(hours=3),
+    "HOUR_4": pd.Timedelta(hours=4),
+    "DAY": pd.Timedelta(days=1),
+    "WEEK": pd.Timedelta(days=7),
+    "MONTH": pd.Timedelta(days=28),
+}
+
+# smallest time step of the 'prices' URL (dates are given to the second)
+ONE_SECOND = pd.Timedelta(seconds=1)
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# ------------------------------------------------------------------
+# planning function definitions
+# ------------------------------------------------------------------
+def resolution_delta(resolution: str) -> pd.Timedelta:
+    """
+    Return the time between 2 bars of a resolution.
+
+    ---
+    Args:
+        * resolution (str): price resolution, i.e. 'MINUTE_5'
+    ---
+    Raises:
+        * ValueError: if the resolution is unknown
+    ---
+    Returns:
+        * Timedelta: time between 2 bars
+    """
+    try:
+        return RESOLUTION_DELTAS[resolution]
+    except KeyError:
+        raise ValueError(f"unknown resolution: {resolution}") from None
+
+
+def estimate_range_points(
+    resolution: str,
+    start_date: str,
+    end_date: str,
+) -> int:
+    """
+    Estimate the number of bars (data points) in [start_date, end_date].
+
+    The estimate assumes the market is open the whole time,
+    so it is an upper bound of the allowance the range costs.
+
+    ---
+    Args:
+        * resolution (str): price resolution
+        * start_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+        * end_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+    ---
+    Returns:
+        * int: max number of bars
+    """
+    span = pd.Timestamp(end_date) - pd.Timestamp(start_date)
+
+    if span < pd.Timedelta(0):
+        return 0
+
+    return int(span // resolution_delta(resolution)) + 1
+
+
+def split_range(
+    resolution: str,
+    start_date: str,
+    end_date: str,
+    max_points: int,
+) -> list[tuple[str]]:
+    """
+    Split [start_date, end_date] into consecutive, non-overlapping chunks
+    of at most max_points bars each.
+
+    ---
+    Args:
+        * resolution (str): price resolution
+        * start_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+        * end_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+        * max_points (int): max number of bars per chunk
+    ---
+    Returns:
+        * list[tuple[str]]: (start_date, end_date) of each chunk (inclusive)
+    """
+    if estimate_range_points(resolution, start_date, end_date) <= max_points:
+        return [(start_date, end_date)]
+
+    step = resolution_delta(resolution) * max_points
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + step - ONE_SECOND, end)
+        chunks.append((start.strftime(DATE_FORMAT), chunk_end.strftime(DATE_FORMAT)))
+        start += step
+
+    return chunks
+
+
+def merge_ranges(
+    resolution: str,
+    date_ranges: list,
+    max_points: int,
+    strategy: str = "auto",
+    request_cost: int = 10,
+) -> list[tuple[str]]:
+    """
+    Merge time ordered, non-overlapping ranges (i.e. the days of a time interval)
+    into contiguous spans, fetched in fewer requests and filtered locally
+    (see 'ranges_mask'); a span costs the allowance of all its bars.
+
+    ---
+    Args:
+        * resolution (str): price resolution
+        * date_ranges (list[tuple[str]]): (start_date, end_date) ranges (inclusive)
+        * max_points (int): max number of bars per request
+        * strategy (str, default="auto"):
+            * 'per_range': no merging (1 request per range)
+            * 'span': 1 span from the first to the last range
+            * 'auto': merge neighbouring ranges while it lowers the cost
+            (estimated points + request_cost per request)
+        * request_cost (int, default=10): allowance points 1 request is worth ('auto')
+    ---
+    Returns:
+        * list[tuple[str]]: (start_date, end_date) of each range to fetch
+    """
+    if strategy == "per_range" or len(date_ranges) < 2:
+        return list(date_ranges)
+
+    if strategy == "span":
+        return [(date_ranges[0][0], date_ranges[-1][1])]
+
+    if strategy != "auto":
+        raise ValueError(f"unknown strategy: {strategy}")
+
+    def cost(start_date, end_date):
+        points = estimate_range_points(resolution, start_date, end_date)
+        return points + request_cost * max(1, -(-points // max_points))
+
+    merged = [date_ranges[0]]
+    for start_date, end_date in date_ranges[1:]:
+        span_start, span_end = merged[-1]
+
+        if cost(span_start, end_date) < cost(span_start, span_end) + cost(start_date, end_date):
+            merged[-1] = (span_start, end_date)
+        else:
+            merged.append((start_date, end_date))
+
+    return merged
+
+
+def plan_date_ranges(
+    start_date: str,
+    end_date: str,
+    weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+) -> list[tuple[str]]:
+    """
+    Return the date ranges to request for range_type='dates'
+    (see 'IG_API.get_prices_single_asset' for a description of the arguments).
+
+    ---
+    Returns:
+        * list[tuple[str]]: (start_date, end_date) of 1 range, or of 1 range
+        per day in the date range if the time portions of start_date/end_date differ
+    """
+    # unpack dates to dates and timeInterval
+    date_start, time_interval_start = start_date.split()
+    date_end, time_interval_end = end_date.split()
+
+    # condition to exclude time intervals
+    # gets all data points possible
+    # ignores 'weekdays' selection
+    if time_interval_start == time_interval_end:
+        return [(start_date, end_date)]
+
+    # ONLY if 'dates' selected and time intervals DIFFER
+    # 'weekdays' input only taken into account HERE
+    # create date range taking into account 'weekdays' input
+    date_range = pd.date_range(date_start, date_end)
+    date_range = list(filter(lambda x: x.weekday() in weekdays, date_range))
+    date_range = [x.strftime("%Y-%m-%d") for x in date_range]
+
+    # 1 range per day in the date range
+    return [(f"{x} {time_interval_start}", f"{x} {time_interval_end}") for x in date_range]
+
+
+def plan_fetch_ranges(
+    resolution: str,
+    date_ranges: list,
+    max_points: int,
+    strategy: str = "auto",
+    request_cost: int = 10,
+    merge: int = 0,
+) -> list[tuple[str]]:
+    """
+    Return the ranges of the 'prices' requests fetching date_ranges: merged into
+    spans (see 'merge_ranges') if 'merge', then split into chunks of at most
+    max_points bars (see 'split_range').
+
+    ---
+    Args:
+        * resolution ... request_cost: see 'merge_ranges'
+        * merge (int, default=0):
+            * 1: merge neighbouring ranges into spans (time interval mode)
+            * 0: 1 request per range (or chunk)
+    ---
+    Returns:
+        * list[tuple[str]]: (start_date, end_date) of each request
+    """
+    # fetch neighbouring ranges as 1 span where it is cheaper (filtered locally)
+    if merge:
+        date_ranges = merge_ranges(resolution, date_ranges, max_points, strategy, request_cost)
+
+    # split ranges holding more bars than 1 response can return
+    return [
+        chunk
+        for date_range in date_ranges
+        for chunk in split_range(resolution, *date_range, max_points)
+    ]
+
+
+def estimate_points(
+    resolution: str,
+    range_type: str,
+    start_date: str = None,
+    end_date: str = None,
+    weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+    num_points: int = None,
+    max_points: int = 5000,
+    strategy: str = "auto",
+    request_cost: int = 10,
+) -> int:
+    """
+    Estimate the allowance (number of data points) a 'get_prices_single_asset'
+    call costs without a cache, with no IG_API instance (i.e. to schedule jobs).
+
+    ---
+    Args:
+        * resolution ... num_points: see 'IG_API.get_prices_single_asset'
+        * max_points, strategy, request_cost: see 'max_points_per_request',
+        'interval_strategy' and 'request_cost' of IG_API
+    ---
+    Raises:
+        * ValueError: if range_type is not 'dates' or 'num_points'
+    ---
+    Returns:
+        * int: max number of data points fetched (upper bound)
+    """
+    if range_type == "num_points":
+        return num_points
+
+    if range_type != "dates":
+        raise ValueError(f"unknown range_type: {range_type}")
+
+    fetch_ranges = plan_fetch_ranges(
+        resolution,
+        plan_date_ranges(start_date, end_date, weekdays),
+        max_points,
+        strategy,
+        request_cost,
+        merge=1,
+    )
+
+    return sum(estimate_range_points(resolution, *date_range) for date_range in fetch_ranges)
+
+
+def ranges_mask(
+    index: pd.DatetimeIndex,
+    date_ranges: list,
+) -> np.ndarray:
+    """
+    Return which times fall in any of the ranges (1 vectorized pass), i.e. to keep
+    only the weekdays and time interval of the bars of merged spans.
+
+    ---
+    Args:
+        * index (DatetimeIndex): bar times
+        * date_ranges (list[tuple[str]]): time ordered, non-overlapping
+        (start_date, end_date) ranges (inclusive)
+    ---
+    Returns:
+        * ndarray[bool]: mask of the times to keep
+    """
+    if not date_ranges:
+        return np.zeros(len(index), dtype=bool)
+
+    starts = pd.DatetimeIndex([start for start, _ in date_ranges])
+    ends = pd.DatetimeIndex([end for _, end in date_ranges])
+
+    # range each time could fall in: the last one starting at or before it
+    i = starts.searchsorted(index, side="right") - 1
+
+    return (i >= 0) & np.asarray(index <= ends[np.maximum(i, 0)])
+
+
+# ------------------------------------------------------------------
+# allowance tracking
+# ------------------------------------------------------------------
+class AllowanceExceededError(ValueError):
+    """
+    Raised (or stored under an asset's 'error' key) when work would exceed
+    the remaining historical data allowance.
+    """
+
+
+class AllowanceTracker:
+    """
+    Live view of the remaining historical data allowance, shared by all
+    (concurrent) fetches of an IG_API instance.
+
+    Every 'prices' response updates it; work about to start reserves its
+    estimated points so concurrent fetches cannot overspend the budget together.
+    Points spent while work is in progress are taken off the reservations
+    (oldest first), so they are not counted both as spent and as reserved.
+    """
+
+    def __init__(self, clock=time.monotonic) -> None:
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.remaining = None  # last known remainingAllowance (None: unknown)
+        self.total = None  # totalAllowance
+        self.expiry = None  # clock time the current allowance period ends
+        self.reserved = {}  # reservation id: points still reserved by work in progress
+        self._next_id = 1
+
+    def update(self, allowance: dict) -> None:
+        """
+        Update from the 'allowance' dict of a 'prices' response.
+
+        ---
+        Args:
+            * allowance (dict): remainingAllowance, totalAllowance, allowanceExpiry
+        """
+        with self.lock:
+            expiry = self.clock() + allowance["allowanceExpiry"]
+            self.total = allowance["totalAllowance"]
+
+            # responses of concurrent requests can arrive out of order:
+            # keep the lowest remaining value of the current period
+            if self.expiry is None or expiry > self.expiry + 60:
+                self.remaining = allowance["remainingAllowance"]
+            else:
+                spent = max(0, self.remaining - allowance["remainingAllowance"])
+                self.remaining = min(self.remaining, allowance["remainingAllowance"])
+
+                # spent by the work in progress: no longer reserved
+                for reservation, points in self.reserved.items():
+                    taken = min(points, spent)
+                    self.reserved[reservation] -= taken
+                    spent -= taken
+
+            self.expiry = expiry if self.expiry is None else max(self.expiry, expiry)
+
+    def _available(self) -> int:
+        """
+        Points not yet spent nor reserved (caller holds the lock).
+        """
+        if self.remaining is None:
+            return None
+
+        reserved = sum(self.reserved.values())
+
+        # allowance has been reset since the last response
+        if self.clock() > self.expiry:
+            return self.total - reserved
+
+        return self.remaining - reserved
+
+    def available(self) -> int:
+        """
+        Return the points not yet spent nor reserved (None if unknown).
+        """
+        with self.lock:
+            return self._available()
+
+    def reserve(self, points: int) -> int:
+        """
+        Reserve points for work about to start.
+
+        ---
+        Args:
+            * points (int): estimated points of the work
+        ---
+        Returns:
+            * int: reservation id to pass to 'release' if reserved (or the remaining
+            allowance is unknown); None if not enough points are available
+            (nothing is reserved)
+        """
+        with self.lock:
+            available = self._available()
+
+            if available is not None and points > available:
+                return None
+
+            reservation = self._next_id
+            self._next_id += 1
+            self.reserved[reservation] = points
+
+            return reservation
+
+    def release(self, reservation: int) -> None:
+        """
+        Release the points still reserved by finished work (its real cost
+        is known from the responses by then).
+        """
+        with self.lock:
+            self.reserved.pop(reservation, None)
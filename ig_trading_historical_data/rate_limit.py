@@ -0,0 +1,273 @@
+""" this module contains the rate limiters that pace all requests sent to the IG REST API."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import threading
+import time
+
+
+# ------------------------------------------------------------------
+# IG request limits
+# ------------------------------------------------------------------
+# published REST API limits (requests per rolling minute)
+# see: https://labs.ig.com/faq
+IG_REQUEST_LIMITS = {
+    "app_non_trading": 60,  # per API key, shared by all accounts using it
+    "account_non_trading": 30,  # per account
+}
+
+# errorCode fragments returned (with status 403) when a per-minute limit is exceeded
+# NOTE: 'exceeded-account-historical-data-allowance' is the WEEKLY data point
+# allowance, waiting a few seconds does not help so it is NOT treated as a rate limit
+RATE_LIMIT_ERROR_CODES = (
+    "exceeded-api-key-allowance",
+    "exceeded-account-allowance",
+    "exceeded-account-trading-allowance",
+)
+
+
+def is_rate_limited(status_code: int, content: bytes) -> bool:
+    """
+    Check if a response was rejected because a per-minute request limit was exceeded.
+
+    ---
+    Args:
+        * status_code (int): response status code
+        * content (bytes): response body
+    ---
+    Returns:
+        * bool: True if the request should be retried after backing off
+    """
+    if status_code == 429:
+        return True
+
+    if status_code == 403:
+        if isinstance(content, bytes):
+            content = content.decode(errors="ignore")
+
+        return any(code in (content or "") for code in RATE_LIMIT_ERROR_CODES)
+
+    return False
+
+
+# ------------------------------------------------------------------
+# rate limiter class definitions
+# ------------------------------------------------------------------
+class RateLimiter:
+    """
+    Base class of all rate limiters.
+
+    A limiter is shared by all requests of an IG_API instance (pass the same
+    limiter to several instances to share it between them too):
+        * reserve(): claim the next request slot, returns the seconds to wait
+        * acquire(): reserve a slot and sleep until it is due
+        * update(): feed back each response so the limiter can adapt
+
+    'clock' and 'sleep' can be replaced (i.e. by a fake clock in tests).
+    """
+
+    def __init__(
+        self,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ) -> None:
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Claim the next request slot.
+
+        ---
+        Returns:
+            * float: seconds to wait before sending the request
+        """
+        return 0.0
+
+    def acquire(self) -> float:
+        """
+        Claim the next request slot and sleep until it is due.
+
+        ---
+        Returns:
+            * float: seconds waited
+        """
+        wait = self.reserve()
+
+        if wait > 0:
+            self.sleep(wait)
+
+        return wait
+
+    def update(
+        self,
+        status_code: int,
+        content: bytes = b"",
+    ) -> None:
+        """
+        Feed back the outcome of a request (no-op for non-adaptive limiters).
+
+        ---
+        Args:
+            * status_code (int): response status code
+            * content (bytes): response body
+        """
+
+
+class FixedIntervalLimiter(RateLimiter):
+    """
+    Start consecutive requests at least 'interval' seconds apart
+    (the behaviour of the former fixed 3 second sleep).
+    """
+
+    def __init__(
+        self,
+        interval: float = 3.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ) -> None:
+        super().__init__(clock, sleep)
+        self.interval = interval
+        self.next_time = None
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = self.clock()
+            due = now if self.next_time is None else max(now, self.next_time)
+            self.next_time = due + self.interval
+
+            return due - now
+
+
+class TokenBucketLimiter(RateLimiter):
+    """
+    Token bucket per request limit (by default IG's per API key and per account
+    non-trading limits); a request is only sent once EVERY bucket holds a token.
+
+    Each bucket holds at most 'burst' tokens and refills at (limit - burst) / 60
+    tokens per second, so no rolling minute ever sees more than 'limit' requests.
+    """
+
+    def __init__(
+        self,
+        limits: dict = None,
+        burst: int = 1,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ) -> None:
+        """
+        ---
+        Args:
+            * limits (dict, opt.): requests per minute for each limit
+                * defaults to IG_REQUEST_LIMITS
+            * burst (int, default=1): requests that can be sent back-to-back
+            * clock (callable, opt.): monotonic clock in seconds
+            * sleep (callable, opt.): sleep function
+        """
+        super().__init__(clock, sleep)
+        self.limits = dict(IG_REQUEST_LIMITS if limits is None else limits)
+        self.burst = burst
+        self.factor = 1.0  # fraction of the full rate that is used
+
+        now = self.clock()
+        self.tokens = {k: float(burst) for k in self.limits}
+        self.updated = {k: now for k in self.limits}
+
+    def rate(self, name: str) -> float:
+        """
+        Refill rate (tokens per second) of a bucket.
+
+        ---
+        Args:
+            * name (str): key of 'limits'
+        ---
+        Returns:
+            * float: tokens per second
+        """
+        return max(self.limits[name] - self.burst, 1) / 60.0 * self.factor
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = self.clock()
+            wait = 0.0
+
+            # refill buckets and find when ALL of them hold a token
+            # (a bucket can only be refilled from 'updated' onwards,
+            # which lies in the future while backing off)
+            for k in self.limits:
+                rate = self.rate(k)
+
+                if now > self.updated[k]:
+                    self.tokens[k] = min(
+                        self.burst, self.tokens[k] + (now - self.updated[k]) * rate
+                    )
+                    self.updated[k] = now
+
+                wait = max(
+                    wait,
+                    self.updated[k] - now + max(1.0 - self.tokens[k], 0.0) / rate,
+                )
+
+            # claim the token (buckets may go negative: already reserved slots)
+            for k in self.limits:
+                self.tokens[k] -= 1.0
+
+            return wait
+
+
+class AdaptiveRateLimiter(TokenBucketLimiter):
+    """
+    Token bucket limiter that backs off when IG rejects requests for exceeding
+    a per-minute limit (403 'exceeded' / 429) and speeds back up when they stop:
+        * on a rate limit error: rate is multiplied by 'decrease' (down to
+        'min_factor' of the full rate) and no request is sent for 'cooldown' seconds
+        * after every 'recover_after' successful responses: rate is increased
+        by 'increase' (up to the full rate)
+    """
+
+    def __init__(
+        self,
+        limits: dict = None,
+        burst: int = 1,
+        decrease: float = 0.5,
+        increase: float = 0.1,
+        min_factor: float = 0.1,
+        recover_after: int = 10,
+        cooldown: float = 5.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ) -> None:
+        super().__init__(limits, burst, clock, sleep)
+        self.decrease = decrease
+        self.increase = increase
+        self.min_factor = min_factor
+        self.recover_after = recover_after
+        self.cooldown = cooldown
+        self.successes = 0
+
+    def update(
+        self,
+        status_code: int,
+        content: bytes = b"",
+    ) -> None:
+        with self.lock:
+            if is_rate_limited(status_code, content):
+                self.factor = max(self.min_factor, self.factor * self.decrease)
+                self.successes = 0
+
+                # pause every bucket for 'cooldown' seconds, then allow
+                # a single request before pacing at the reduced rate
+                resume = self.clock() + self.cooldown
+
+                for k in self.limits:
+                    self.tokens[k] = 1.0
+                    self.updated[k] = max(self.updated[k], resume)
+
+            elif status_code < 400:
+                self.successes += 1
+
+                if self.successes >= self.recover_after and self.factor < 1.0:
+                    self.factor = min(1.0, self.factor + self.increase)
+                    self.successes = 0
@@ -0,0 +1,159 @@
+""" this module contains the resampling of prices to a coarser resolution."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from .conversion import VOLUME_COLUMN, frame_from_columns
+from .planning import ONE_SECOND, RESOLUTION_DELTAS, resolution_delta
+
+
+# ------------------------------------------------------------------
+# resampling inputs
+# ------------------------------------------------------------------
+# start of the first bar of fixed length resolutions (weeks start on Monday)
+ORIGIN = pd.Timestamp("1970-01-01")
+WEEK_ORIGIN = pd.Timestamp("1970-01-05")
+
+# resolutions whose bars are not all of the same length
+CALENDAR_RESOLUTIONS = ["MONTH"]
+
+BID_COLUMNS = ["open_px_bid", "high_px_bid", "low_px_bid", "close_px_bid"]
+ASK_COLUMNS = ["open_px_ask", "high_px_ask", "low_px_ask", "close_px_ask"]
+
+
+# ------------------------------------------------------------------
+# resampling function definitions
+# ------------------------------------------------------------------
+def bar_start(times, resolution: str):
+    """
+    Return the start of the bar (of a resolution) each time falls in.
+
+    ---
+    Args:
+        * times (Timestamp or DatetimeIndex): times (account timezone)
+        * resolution (str): price resolution
+    ---
+    Returns:
+        * Timestamp or DatetimeIndex: bar starts
+    """
+    if resolution == "MONTH":
+        return times.to_period("M").start_time
+
+    origin = WEEK_ORIGIN if resolution == "WEEK" else ORIGIN
+    delta = resolution_delta(resolution)
+
+    return origin + ((times - origin) // delta) * delta
+
+
+def finer_resolutions(resolution: str) -> list[str]:
+    """
+    Return the resolutions whose bars can be aggregated into bars of
+    'resolution' (each coarse bar is made of whole finer bars), coarsest first.
+
+    ---
+    Args:
+        * resolution (str): price resolution
+    ---
+    Returns:
+        * list[str]: finer resolutions
+    """
+    if resolution in CALENDAR_RESOLUTIONS:
+        candidates = [r for r in RESOLUTION_DELTAS if r not in ("WEEK", "MONTH")]
+    else:
+        delta = resolution_delta(resolution)
+        candidates = [
+            r
+            for r, d in RESOLUTION_DELTAS.items()
+            if r not in CALENDAR_RESOLUTIONS and d < delta and delta % d == pd.Timedelta(0)
+            and (resolution != "WEEK" or d <= RESOLUTION_DELTAS["DAY"])
+        ]
+
+    return sorted(candidates, key=lambda r: RESOLUTION_DELTAS[r], reverse=True)
+
+
+def resample_prices(
+    prices: pd.DataFrame,
+    resolution: str,
+) -> pd.DataFrame:
+    """
+    Aggregate prices into bars of a coarser resolution: open/high/low/close of
+    bid and ask, mid and spread recomputed from them, volume summed.
+    Bars without any finer bar are left out (as in API responses).
+
+    ---
+    Args:
+        * prices (DataFrame): 17 column prices (finer resolution)
+        * resolution (str): target resolution
+    ---
+    Returns:
+        * DataFrame: 17 columns indexed by bar start
+    """
+    grouped = prices.groupby(bar_start(prices.index, resolution), sort=True)
+
+    def ohlc(columns):
+        o, h, l, c = columns
+        return np.column_stack(
+            [
+                grouped[o].first().to_numpy(dtype=np.float64),
+                grouped[h].max().to_numpy(dtype=np.float64),
+                grouped[l].min().to_numpy(dtype=np.float64),
+                grouped[c].last().to_numpy(dtype=np.float64),
+            ]
+        ).reshape(-1, 4)
+
+    volume = grouped[VOLUME_COLUMN].sum(min_count=1).to_numpy(dtype=np.float64)
+
+    return frame_from_columns(
+        ohlc(BID_COLUMNS),
+        ohlc(ASK_COLUMNS),
+        volume,
+        pd.DatetimeIndex(grouped.size().index),
+    )
+
+
+def coarse_ranges(
+    resolution: str,
+    start_date: str,
+    end_date: str,
+    fine_gaps: list,
+) -> list[tuple[pd.Timestamp]]:
+    """
+    Return the parts of [start_date, end_date] whose bars (of 'resolution') overlap
+    a gap of the finer data, i.e. cannot be built from it.
+
+    ---
+    Args:
+        * resolution (str): coarse resolution
+        * start_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+        * end_date (str): yyyy-MM-dd HH:mm:ss (inclusive)
+        * fine_gaps (list[tuple[str]]): (start_date, end_date) missing finer data
+    ---
+    Returns:
+        * list[tuple[Timestamp]]: merged (start, end) ranges (inclusive), in time order
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+    ranges = []
+    for gap_start, gap_end in fine_gaps:
+        range_start = max(start, bar_start(pd.Timestamp(gap_start), resolution))
+        range_end = min(end, next_bar_start(pd.Timestamp(gap_end), resolution) - ONE_SECOND)
+
+        if ranges and range_start <= ranges[-1][1] + ONE_SECOND:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], range_end))
+        elif range_start <= range_end:
+            ranges.append((range_start, range_end))
+
+    return ranges
+
+
+def next_bar_start(time: pd.Timestamp, resolution: str) -> pd.Timestamp:
+    """
+    Return the start of the bar following the one 'time' falls in.
+    """
+    if resolution == "MONTH":
+        return (time.to_period("M") + 1).start_time
+
+    return bar_start(time, resolution) + resolution_delta(resolution)
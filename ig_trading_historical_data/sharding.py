@@ -0,0 +1,275 @@
+""" this module contains the ShardedFetcher class, spreading 'get_prices_all_assets' over accounts and processes."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from .ig_trading_historical_data import IG_API
+from .planning import AllowanceExceededError, estimate_points
+
+
+# ------------------------------------------------------------------
+# sharding function definitions
+# ------------------------------------------------------------------
+def _connect(account: dict) -> IG_API:
+    """
+    Return a logged in IG_API instance of 1 account spec (see ShardedFetcher).
+    """
+    kwargs = account.get("kwargs", {})
+
+    if "session" in account:
+        ig_api = IG_API.from_session(
+            account["session"], account.get("username"), account.get("pw"), **kwargs
+        )
+    else:
+        ig_api = IG_API(
+            account["demo"], account["username"], account["pw"], account["api_key"], **kwargs
+        )
+
+    if "url_base" in account:
+        ig_api.url_base = account["url_base"]
+
+    return ig_api
+
+
+def _fetch_shard(
+    account: dict,
+    assets: dict,
+    params: dict,
+    store: str = None,
+    budget_guard: str = "skip",
+) -> tuple:
+    """
+    Fetch the assets of 1 shard with its own session (runs in a worker process).
+
+    ---
+    Returns:
+        * tuple: assets (dict), allowance (dict) of 'get_prices_all_assets'
+        (without the prices if they were written to 'store')
+    """
+    ig_api = _connect(account)
+
+    try:
+        assets, allowance = ig_api.get_prices_all_assets(
+            assets, **params, max_workers=account.get("max_workers"), budget_guard=budget_guard
+        )
+    finally:
+        ig_api.transport.close()
+
+    # write to the shared store instead of sending the prices back
+    if store is not None:
+        from .export import ParquetStore
+
+        ParquetStore(store).write_assets(assets, params["resolution"])
+
+        for d in assets.values():
+            d.pop("prices", None)
+
+    return assets, allowance
+
+
+# ------------------------------------------------------------------
+# sharding class definition
+# ------------------------------------------------------------------
+class ShardedFetcher:
+    """
+    Spread a large 'get_prices_all_assets' job over several accounts (or API keys),
+    1 worker process per account, each with its own session, rate limiter
+    and allowance budget.
+
+    Assets are placed by the scheduler on the account with the most allowance left
+    (assets that fit no account are not fetched); the accounts' remaining allowance
+    is updated from the responses, so later jobs are placed by the real budgets.
+    """
+
+    def __init__(
+        self,
+        accounts: list,
+        executor: Executor = None,
+        store: str = None,
+        budget_guard: str = "skip",
+    ) -> None:
+        """
+        ---
+        Args:
+            * accounts (list[dict]): 1 dict per account (shard) with either
+                * demo, username, pw, api_key: credentials (each worker logs in), or
+                * session (str or dict): saved session ('save_session'/'session_state'),
+                with username/pw (opt.) to log in again once it expires
+            and optional keys:
+                * remaining (int): remaining allowance (None/missing: unknown)
+                * max_workers (int): threads fetching the shard's assets in parallel
+                * kwargs (dict): other IG_API keyword arguments (i.e. compact)
+                * url_base (str): API gateway URL override (i.e. a test server)
+            * executor (Executor, opt.): runs the shards
+                * defaults to None (a process pool with 1 process per account)
+            * store (str, opt.): root of a ParquetStore the shards write the prices to
+                * defaults to None (prices are returned in the 'assets' dict)
+            * budget_guard (str, default="skip"): allowance protection of each
+            shard's 'get_prices_all_assets' (see there): 'skip', 'raise' (the shard's
+            assets get the AllowanceExceededError) or None (no checks)
+        """
+        self.accounts = accounts
+        self.executor = executor
+        self.store = store
+        self.budget_guard = budget_guard
+
+        # remaining allowance per account (None: unknown)
+        self.remaining = [account.get("remaining") for account in accounts]
+
+    def schedule(
+        self,
+        assets: dict,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> dict:
+        """
+        Place the assets on the accounts (no request is sent).
+
+        Assets are taken by priority ('priority' key, higher first), then largest
+        estimate first, each placed on the account with the most allowance left
+        after the assets placed before it (accounts of unknown allowance first,
+        least loaded first).
+
+        ---
+        Args:
+            * assets ... num_points: see 'IG_API.get_prices_all_assets'
+        ---
+        Returns:
+            * dict:
+                * points (dict): estimated points (upper bound) per asset
+                * shards (list[list]): assets placed on each account
+                * skipped (list): assets fitting no account
+        """
+        # estimates only need the request planning (no session), same for every asset
+        estimate = estimate_points(
+            resolution,
+            range_type,
+            start_date,
+            end_date,
+            weekdays,
+            num_points,
+            IG_API.max_points_per_request,
+            IG_API.interval_strategy,
+            IG_API.request_cost,
+        )
+        points = {asset: estimate for asset in assets}
+
+        order = sorted(assets, key=lambda asset: (-assets[asset].get("priority", 0), -points[asset]))
+
+        shards = [[] for _ in self.accounts]
+        load = [0] * len(self.accounts)
+        skipped = []
+
+        def free(i):
+            return math.inf if self.remaining[i] is None else self.remaining[i] - load[i]
+
+        for asset in order:
+            candidates = [i for i in range(len(self.accounts)) if free(i) >= points[asset]]
+
+            if not candidates:
+                skipped.append(asset)
+                continue
+
+            i = min(candidates, key=lambda i: (-free(i), load[i]))
+            shards[i].append(asset)
+            load[i] += points[asset]
+
+        return {"points": points, "shards": shards, "skipped": skipped}
+
+    def fetch(
+        self,
+        assets: dict,
+        resolution: str,
+        range_type: str,
+        start_date: str = None,
+        end_date: str = None,
+        weekdays: tuple[int] = (0, 1, 2, 3, 4, 5, 6),
+        num_points: int = None,
+    ) -> tuple:
+        """
+        Fetch all assets, sharded over the accounts (see 'schedule').
+
+        ---
+        Args:
+            * assets ... num_points: see 'IG_API.get_prices_all_assets'
+        ---
+        Returns:
+            * tuple:
+                * assets (dict): as returned by 'get_prices_all_assets' (in the order
+                of 'assets'), with the 'account' (index) each asset was fetched by;
+                failed or skipped assets get an 'error' key; with 'store', the prices
+                are written to the ParquetStore instead of being returned
+                * allowances (list[dict]): last 'allowance' dict of each account
+                (None if the account fetched nothing)
+        """
+        plan = self.schedule(
+            assets, resolution, range_type, start_date, end_date, weekdays, num_points
+        )
+        params = {
+            "resolution": resolution,
+            "range_type": range_type,
+            "start_date": start_date,
+            "end_date": end_date,
+            "weekdays": weekdays,
+            "num_points": num_points,
+        }
+
+        for asset in plan["skipped"]:
+            assets[asset]["error"] = AllowanceExceededError(
+                f"{asset} skipped: up to {plan['points'][asset]} points needed, "
+                f"more than any account has left"
+            )
+
+        placed = [(i, shard) for i, shard in enumerate(plan["shards"]) if shard]
+        allowances = [None] * len(self.accounts)
+
+        pool = self.executor
+        if pool is None:
+            pool = ProcessPoolExecutor(max(1, len(placed)))
+
+        try:
+            futures = [
+                (
+                    i,
+                    shard,
+                    pool.submit(
+                        _fetch_shard,
+                        self.accounts[i],
+                        {asset: dict(assets[asset]) for asset in shard},
+                        params,
+                        self.store,
+                        self.budget_guard,
+                    ),
+                )
+                for i, shard in placed
+            ]
+
+            for i, shard, future in futures:
+                try:
+                    shard_assets, allowance = future.result()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # i.e. the account could not log in
+                    for asset in shard:
+                        assets[asset]["error"] = e
+                        assets[asset]["account"] = i
+                    continue
+
+                for asset in shard:
+                    assets[asset].update(shard_assets[asset])
+                    assets[asset]["account"] = i
+
+                if allowance is not None:
+                    allowances[i] = allowance
+                    self.remaining[i] = allowance["remainingAllowance"]
+        finally:
+            if self.executor is None:
+                pool.shutdown()
+
+        return assets, allowances
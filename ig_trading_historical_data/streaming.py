@@ -0,0 +1,356 @@
+""" this module contains the Lightstreamer (TLCP) client streaming live candles."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+from urllib.parse import quote, unquote, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .conversion import frame_from_columns
+
+
+# ------------------------------------------------------------------
+# streaming inputs
+# ------------------------------------------------------------------
+TLCP_PROTOCOL = "TLCP-2.1.0"
+
+# generic client identifier of the Lightstreamer text protocol
+LS_CID = "mgQkwtwdysogQz2BJ4Ji kOj2Bg"
+
+# IG 'CHART:{epic}:{scale}' scales of the price resolutions that can be streamed
+CHART_SCALES = {
+    "SECOND": "SECOND",
+    "MINUTE": "1MINUTE",
+    "MINUTE_5": "5MINUTE",
+    "HOUR": "HOUR",
+}
+
+# fields of a candle subscription (UTM: candle start in ms since epoch,
+# CONS_END: 1 once the candle is complete)
+CANDLE_FIELDS = [
+    "UTM",
+    "BID_OPEN", "BID_HIGH", "BID_LOW", "BID_CLOSE",
+    "OFR_OPEN", "OFR_HIGH", "OFR_LOW", "OFR_CLOSE",
+    "LTV",
+    "CONS_END",
+]
+
+
+# ------------------------------------------------------------------
+# streaming function definitions
+# ------------------------------------------------------------------
+def decode_update(raw: str, previous: list) -> list:
+    """
+    Decode the field values of a TLCP update ('U' message) against
+    the previous values of the item.
+
+    ---
+    Args:
+        * raw (str): '|' separated values ('' or '^n': unchanged, '#': null,
+        '$': empty string, else percent-encoded value)
+        * previous (list[str]): previous values of the item (None if unknown)
+    ---
+    Returns:
+        * list[str]: current values of the item
+    """
+    values = []
+
+    for value in raw.split("|"):
+        if value == "":
+            values.append(previous[len(values)])
+        elif value.startswith("^"):
+            n = int(value[1:])
+            values.extend(previous[len(values):len(values) + n])
+        elif value == "#":
+            values.append(None)
+        elif value == "$":
+            values.append("")
+        else:
+            values.append(unquote(value))
+
+    return values
+
+
+def candle_to_dataframe(candle: dict, utc_offset: float = 0) -> pd.DataFrame:
+    """
+    Convert 1 candle (CANDLE_FIELDS values) to a 1 row prices DataFrame
+    (same 17 columns as 'get_prices_single_asset').
+
+    ---
+    Args:
+        * candle (dict): CANDLE_FIELDS name to value (str or None)
+        * utc_offset (float, default=0): account timezone offset in hours
+        (REST prices are indexed by the account's local time)
+    ---
+    Returns:
+        * DataFrame: 17 columns indexed by snapshot time
+    """
+
+    def number(name):
+        return np.nan if candle[name] in (None, "") else float(candle[name])
+
+    bid = np.array([[number(f"BID_{p}") for p in ("OPEN", "HIGH", "LOW", "CLOSE")]])
+    ask = np.array([[number(f"OFR_{p}") for p in ("OPEN", "HIGH", "LOW", "CLOSE")]])
+
+    index = pd.DatetimeIndex(
+        [pd.Timestamp(int(candle["UTM"]), unit="ms") + pd.Timedelta(hours=utc_offset or 0)]
+    )
+
+    return frame_from_columns(bid, ask, np.array([number("LTV")]), index)
+
+
+# ------------------------------------------------------------------
+# streaming class definitions
+# ------------------------------------------------------------------
+class CandleAssembler:
+    """
+    Turn the updates of candle subscriptions into completed candles.
+
+    A candle is complete when IG flags it (CONS_END=1), or at the latest when
+    the first update of the next candle (new UTM) arrives.
+    """
+
+    def __init__(self, utc_offset: float = 0) -> None:
+        self.utc_offset = utc_offset
+        self.candles = {}  # epic: last values of its current candle
+        self.completed = {}  # epic: UTM of its last completed candle
+
+    def update(self, epic: str, candle: dict) -> list:
+        """
+        Add 1 update of an epic's candle.
+
+        ---
+        Args:
+            * epic (str): instrument epic
+            * candle (dict): CANDLE_FIELDS name to value
+        ---
+        Returns:
+            * list[DataFrame]: candles completed by this update (usually none or 1)
+        """
+        completed = []
+
+        # first update of the next candle: the previous one is complete
+        previous = self.candles.get(epic)
+        if previous is not None and previous["UTM"] != candle["UTM"]:
+            if self.completed.get(epic) != previous["UTM"]:
+                completed.append(candle_to_dataframe(previous, self.utc_offset))
+
+        self.candles[epic] = candle
+
+        if candle["CONS_END"] == "1" and self.completed.get(epic) != candle["UTM"]:
+            completed.append(candle_to_dataframe(candle, self.utc_offset))
+            self.completed[epic] = candle["UTM"]
+        elif completed:
+            self.completed[epic] = previous["UTM"]
+
+        return completed
+
+    def current(self, epic: str) -> pd.DataFrame:
+        """
+        Return the (incomplete) current candle of an epic (None if none yet).
+        """
+        candle = self.candles.get(epic)
+
+        return None if candle is None else candle_to_dataframe(candle, self.utc_offset)
+
+
+class LightstreamerClient:
+    """
+    Minimal client of IG's Lightstreamer server (TLCP text protocol over HTTP),
+    logged in with the session tokens of an IG_API instance.
+
+    1 stream connection carries the updates of all subscriptions;
+    subscriptions are added with separate control requests.
+    """
+
+    def __init__(self, ig_api) -> None:
+        """
+        ---
+        Args:
+            * ig_api (IG_API): logged in instance (ls_addr, tokens and transport are used)
+        """
+        self.ig_api = ig_api
+        self.ls_addr = ig_api.ls_addr.rstrip("/")
+        self.control_addr = self.ls_addr
+
+        self.session_id = None
+        self.stream = None
+        self.lines = None
+
+        self.req_id = 0
+        self.subscriptions = {}  # subscription id: (items, fields)
+        self.values = {}  # (subscription id, item index): last values
+
+    def _post(self, path: str, params: dict, **kwargs):
+        """
+        Send 1 TLCP request (parameters form encoded with %20 for spaces).
+        """
+        url = f"{path}?LS_protocol={TLCP_PROTOCOL}"
+
+        if self.session_id is not None and "LS_session" not in params:
+            url += f"&LS_session={self.session_id}"
+
+        return self.ig_api.transport.post(
+            url=url,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data=urlencode(params, quote_via=quote),
+            **kwargs,
+        )
+
+    def _open(self, params: dict, path: str) -> None:
+        """
+        Open the stream connection (new or rebound session) and read up to CONOK.
+        """
+        if self.stream is not None:
+            self.stream.close()
+
+        self.stream = self._post(f"{self.ls_addr}/lightstreamer/{path}", params, stream=True)
+        self.stream.encoding = "utf-8"
+        self.lines = self.stream.iter_lines(chunk_size=None, decode_unicode=True)
+
+        for line in self.lines:
+            message, *args = line.split(",")
+
+            if message == "CONOK":
+                self.session_id, _, _, control_link = args[:4]
+
+                if control_link != "*":
+                    scheme = urlsplit(self.ls_addr).scheme
+                    self.control_addr = f"{scheme}://{control_link}"
+
+                return
+
+            if message == "CONERR":
+                raise ConnectionError(f"Lightstreamer connection refused: {line}")
+
+        raise ConnectionError("Lightstreamer stream closed before CONOK")
+
+    def connect(self) -> None:
+        """
+        Create a Lightstreamer session with the IG session tokens.
+        """
+        self._open(
+            {
+                "LS_cid": LS_CID,
+                "LS_adapter_set": "DEFAULT",
+                "LS_user": self.ig_api.acc_info["currentAccountId"],
+                "LS_password": (
+                    f"CST-{self.ig_api.token_cst}|XST-{self.ig_api.token_x_security_token}"
+                ),
+                "LS_keepalive_millis": 5000,
+            },
+            "create_session.txt",
+        )
+
+    def subscribe(
+        self,
+        items: list,
+        fields: list,
+        mode: str = "MERGE",
+    ) -> int:
+        """
+        Subscribe to the fields of some items (connects first if needed).
+
+        ---
+        Args:
+            * items (list[str]): i.e. ['CHART:CS.D.GBPUSD.TODAY.IP:1MINUTE']
+            * fields (list[str]): i.e. CANDLE_FIELDS
+            * mode (str, default='MERGE'): Lightstreamer subscription mode
+        ---
+        Raises:
+            * ConnectionError: if the subscription is refused
+        ---
+        Returns:
+            * int: subscription id
+        """
+        if self.session_id is None:
+            self.connect()
+
+        self.req_id += 1
+        sub_id = len(self.subscriptions) + 1
+        self.subscriptions[sub_id] = (list(items), list(fields))
+
+        r = self._post(
+            f"{self.control_addr}/lightstreamer/control.txt",
+            {
+                "LS_reqId": self.req_id,
+                "LS_op": "add",
+                "LS_subId": sub_id,
+                "LS_mode": mode,
+                "LS_group": " ".join(items),
+                "LS_schema": " ".join(fields),
+                "LS_snapshot": "true",
+            },
+        )
+
+        if not r.text.startswith("REQOK"):
+            raise ConnectionError(f"Lightstreamer subscription refused: {r.text.strip()}")
+
+        return sub_id
+
+    def updates(self):
+        """
+        Yield the updates of all subscriptions as they arrive
+        (the session is rebound transparently when the server asks for it).
+
+        ---
+        Raises:
+            * ConnectionError: if the server ends the session
+        ---
+        Yields:
+            * tuple: item (str), values (dict of field name to value)
+        """
+        while True:
+            for line in self.lines:
+                message, _, rest = line.partition(",")
+
+                if message == "U":
+                    sub_id, item_index, raw = rest.split(",", 2)
+                    sub_id, item_index = int(sub_id), int(item_index)
+                    items, fields = self.subscriptions[sub_id]
+
+                    key = (sub_id, item_index)
+                    values = decode_update(raw, self.values.get(key, [None] * len(fields)))
+                    self.values[key] = values
+
+                    yield items[item_index - 1], dict(zip(fields, values))
+
+                elif message == "LOOP":
+                    break
+
+                elif message in ("END", "CONERR", "ERROR"):
+                    raise ConnectionError(f"Lightstreamer session ended: {line}")
+
+                # other messages (PROBE, SUBOK, SYNC, ...) need no action
+            else:
+                raise ConnectionError("Lightstreamer stream closed")
+
+            # LOOP: the stream connection is used up, rebind the session
+            self._open({"LS_session": self.session_id}, "bind_session.txt")
+
+    def close(self) -> None:
+        """
+        Destroy the Lightstreamer session and close the stream connection.
+        """
+        if self.session_id is not None:
+            self.req_id += 1
+            try:
+                self._post(
+                    f"{self.control_addr}/lightstreamer/control.txt",
+                    {"LS_reqId": self.req_id, "LS_op": "destroy"},
+                )
+            except OSError:
+                pass
+
+        if self.stream is not None:
+            self.stream.close()
+
+        self.session_id = self.stream = self.lines = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,135 @@
+""" this module contains the HTTPTransport class that is used to send all HTTP requests."""
+
+# ------------------------------------------------------------------
+# import packages
+# ------------------------------------------------------------------
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# ------------------------------------------------------------------
+# transport function definitions
+# ------------------------------------------------------------------
+def transport_retries(r) -> int:
+    """
+    Return the number of times the transport retried a request before returning
+    its response (connection errors, 502/503/504); 0 if unknown (i.e. a stand-in transport).
+    """
+    retry = getattr(getattr(r, "raw", None), "retries", None)
+
+    return len(getattr(retry, "history", ()))
+
+
+# ------------------------------------------------------------------
+# transport class definition
+# ------------------------------------------------------------------
+class HTTPTransport:
+    """
+    Pooled, keep-alive HTTP transport owned by an IG_API instance.
+    All requests share one requests.Session, so the TCP+TLS connection to
+    the API gateway is opened once and then reused.
+
+    Any object exposing the same 'get', 'post' and 'close' methods
+    (returning requests.Response-like objects) can be injected instead,
+    e.g. a local stand-in transport in tests.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 1,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: tuple[float] = (5.0, 30.0),
+    ) -> None:
+        """
+        Create the pooled session.
+
+        ---
+        Args:
+            * pool_connections (int, default=1): number of host pools to cache
+            (only the API gateway host is used)
+            * pool_maxsize (int, default=10): max number of connections kept alive
+            per host (raise this when fetching with several threads)
+            * max_retries (int, default=3): retries on connection errors and on
+            502/503/504 responses to GET requests (POST is never retried on status)
+            * backoff_factor (float, default=0.5): exponential backoff factor
+            between retries (in seconds)
+            * timeout (tuple[float], default=(5.0, 30.0)): (connect, read) timeout
+            in seconds used when a request does not pass its own timeout
+        """
+        self.timeout = timeout
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(
+        self,
+        url: str,
+        headers: dict = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a GET request through the pooled session.
+
+        ---
+        Args:
+            * url (str): request URL
+            * headers (dict, default None): request headers
+            * **kwargs: passed on to requests.Session.get
+        ---
+        Returns:
+            * requests.Response: response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        return self.session.get(url=url, headers=headers, **kwargs)
+
+    def post(
+        self,
+        url: str,
+        headers: dict = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a POST request through the pooled session.
+
+        ---
+        Args:
+            * url (str): request URL
+            * headers (dict, default None): request headers
+            * **kwargs: passed on to requests.Session.post (i.e. json=...)
+        ---
+        Returns:
+            * requests.Response: response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        return self.session.post(url=url, headers=headers, **kwargs)
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
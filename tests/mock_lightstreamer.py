@@ -0,0 +1,107 @@
+""" local fake Lightstreamer server streaming canned TLCP messages """
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class MockLightstreamer:
+    """
+    Serve a Lightstreamer session on a local port (use as a context manager).
+
+    'streams' is a list of message lists: the 1st is sent on create_session.txt
+    once a subscription was added, each next one on a bind_session.txt
+    (end a list with 'LOOP,0' to make the client rebind).
+    After the last message the stream stays open until the server stops.
+    """
+
+    def __init__(self, streams):
+        self.streams = streams
+        self.requests = []  # (path, form params) of every request, in order
+        self.subscribed = threading.Event()
+        self.stopped = threading.Event()
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url_base(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def write_chunk(self, line):
+                data = f"{line}\r\n".encode()
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                path = self.path.split("?")[0]
+                server.requests.append((path, params))
+
+                if path.endswith("control.txt"):
+                    if params.get("LS_op") == "add":
+                        server.subscribed.set()
+
+                    body = f"REQOK,{params.get('LS_reqId')}\r\n".encode()
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                # stream connection (chunked, like the real server)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/enriched")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                self.write_chunk("CONOK,S1,50000,5000,*")
+
+                if path.endswith("create_session.txt"):
+                    server.subscribed.wait(5)
+                    messages = server.streams[0]
+                else:
+                    n_binds = sum(p.endswith("bind_session.txt") for p, _ in server.requests)
+                    messages = server.streams[n_binds]
+
+                try:
+                    for message in messages:
+                        self.write_chunk(message)
+
+                    if messages and messages[-1].startswith("LOOP"):
+                        self.wfile.write(b"0\r\n\r\n")
+                        return
+
+                    server.stopped.wait(5)
+                except OSError:
+                    pass
+
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
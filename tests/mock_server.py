@@ -0,0 +1,86 @@
+""" local mock HTTP server serving canned IG REST API responses """
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+class MockServer:
+    """
+    Serve 'routes' on a local port (use as a context manager).
+
+    routes: dict of unquoted path (i.e. '/prices/EPIC/MINUTE/2' or '/watchlists')
+    to (status_code, JSON payload) or to a callable(path) returning that tuple.
+    Unknown paths return 404. Every request waits 'latency' seconds before answering.
+    """
+
+    def __init__(self, routes, latency=0.0):
+        self.routes = routes
+        self.latency = latency
+        self.paths = []  # every requested path, in order
+        self.lock = threading.Lock()
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url_base(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def respond(self, path):
+        with self.lock:
+            self.paths.append(path)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        route = self.routes.get(path)
+        if route is None:
+            return 404, {"errorCode": "error.mock.not-found"}
+
+        return route(path) if callable(route) else route
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def handle_one(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+
+                status, payload = server.respond(unquote(self.path))
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = handle_one
+            do_POST = handle_one
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import pytest
+
+from ig_trading_historical_data import IG_API, AsyncIG_API, PriceCache, RateLimiter, RequestCoalescer
+import tests.data.mock_user_info_demo as muid
+from tests.mock_server import MockServer
+
+
+def mock_routes():
+    """ routes of 2 assets (same mock data) for a 2 day time interval """
+
+    with open("tests/data/mock_hist_data_dates_time_interval_1.json", "r") as f:
+        day_1 = json.load(f)
+
+    with open("tests/data/mock_hist_data_dates_time_interval_2.json", "r") as f:
+        day_2 = json.load(f)
+
+    routes = {}
+    for epic in ["CF.D.GBPUSD.MAR.IP", "CF.D.EURUSD.MAR.IP"]:
+        routes[f"/prices/{epic}/MINUTE_15/2024-01-08 10:00:00/2024-01-08 10:30:00"] = (200, day_1)
+        routes[f"/prices/{epic}/MINUTE_15/2024-01-10 10:00:00/2024-01-10 10:30:00"] = (200, day_2)
+
+    return routes
+
+
+def mock_api(cls, url_base, mocker):
+    """ logged-in (mocked) instance pointing at the local mock server """
+
+    mocker.patch.object(IG_API, '__init__', return_value=None)
+
+    ig_api = cls(**muid.mock_user_info_demo)
+    ig_api.url_base = url_base
+    ig_api.header_base = muid.mock_header_base
+    ig_api.rate_limiter = RateLimiter()
+
+    return ig_api
+
+
+class TestAsyncAPI:
+    """ unit tests for the AsyncIG_API class """
+
+    def test_get_prices_all_assets_matches_sync(self, mocker):
+        """ concurrent fetch returns the same DataFrames as the sync path """
+
+        params = dict(
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',  # from Mon
+            end_date='2024-01-10 10:30:00',  # until Wed
+            weekdays=(0, 2),  # (Mon, Wed)
+        )
+
+        with MockServer(mock_routes()) as server:
+            sync_api = mock_api(IG_API, server.url_base, mocker)
+            async_api = mock_api(AsyncIG_API, server.url_base, mocker)
+
+            sync_assets, sync_allowance = sync_api.get_prices_all_assets(
+                {'GBPUSD': {'epic': 'CF.D.GBPUSD.MAR.IP'}, 'EURUSD': {'epic': 'CF.D.EURUSD.MAR.IP'}},
+                **params,
+            )
+            async_assets, async_allowance = asyncio.run(
+                async_api.get_prices_all_assets(
+                    {'GBPUSD': {'epic': 'CF.D.GBPUSD.MAR.IP'}, 'EURUSD': {'epic': 'CF.D.EURUSD.MAR.IP'}},
+                    **params,
+                )
+            )
+
+        assert list(async_assets) == ['GBPUSD', 'EURUSD']
+        assert async_allowance == sync_allowance
+        assert len(server.paths) == 8
+
+        for asset in sync_assets:
+            assert async_assets[asset]['prices'].equals(sync_assets[asset]['prices'])
+            assert async_assets[asset]['instrument_type'] == sync_assets[asset]['instrument_type']
+
+    def test_get_epics(self, mocker):
+        """ concurrent market searches update every asset's epic """
+
+        markets = {
+            "markets": [
+                {"instrumentName": "GBP/USD", "expiry": "DFB", "epic": "CS.D.GBPUSD.TODAY.IP"},
+                {"instrumentName": "EUR/USD", "expiry": "DFB", "epic": "CS.D.EURUSD.TODAY.IP"},
+            ]
+        }
+        routes = {
+            "/markets?searchTerm=GBPUSD": (200, markets),
+            "/markets?searchTerm=EURUSD": (200, markets),
+        }
+
+        with MockServer(routes) as server:
+            async_api = mock_api(AsyncIG_API, server.url_base, mocker)
+
+            assets = asyncio.run(
+                async_api.get_epics(
+                    {
+                        'GBPUSD': {'instrument_name': 'GBP/USD', 'expiry': 'DFB'},
+                        'EURUSD': {'instrument_name': 'EUR/USD', 'expiry': 'DFB'},
+                    }
+                )
+            )
+
+        assert assets['GBPUSD']['epic'] == "CS.D.GBPUSD.TODAY.IP"
+        assert assets['EURUSD']['epic'] == "CS.D.EURUSD.TODAY.IP"
+
+    def test_failed_asset_keeps_others(self, mocker):
+        """ 1 failed asset gets an 'error' key, the other assets are kept """
+
+        with MockServer(mock_routes()) as server:
+            async_api = mock_api(AsyncIG_API, server.url_base, mocker)
+
+            assets, allowance = asyncio.run(
+                async_api.get_prices_all_assets(
+                    {'GBPUSD': {'epic': 'CF.D.GBPUSD.MAR.IP'}, 'BAD': {'epic': 'UNKNOWN.EPIC'}},
+                    resolution='MINUTE_15',
+                    range_type='dates',
+                    start_date='2024-01-08 10:00:00',
+                    end_date='2024-01-10 10:30:00',
+                    weekdays=(0, 2),
+                )
+            )
+
+        assert 'error' not in assets['GBPUSD']
+        assert len(assets['GBPUSD']['prices']) > 0
+        assert allowance is not None
+
+        assert 'prices' not in assets['BAD']
+        assert isinstance(assets['BAD']['error'], ValueError)
+
+    def test_failed_day_keeps_received_days(self, mocker):
+        """ the days received alongside a failed one are stored in the cache """
+
+        routes = mock_routes()
+        del routes["/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/2024-01-08 10:00:00/2024-01-08 10:30:00"]
+
+        with MockServer(routes) as server:
+            async_api = mock_api(AsyncIG_API, server.url_base, mocker)
+            async_api.cache = PriceCache(":memory:")
+
+            result = asyncio.run(
+                async_api.get_prices_single_asset(
+                    'CF.D.GBPUSD.MAR.IP', 'MINUTE_15', 'dates', '2024-01-08 10:00:00', '2024-01-10 10:30:00', (0, 2)
+                )
+            )
+
+        assert isinstance(result, bytes)
+        assert async_api.cache.missing(
+            'CF.D.GBPUSD.MAR.IP', 'MINUTE_15', '2024-01-10 10:00:00', '2024-01-10 10:30:00'
+        ) == []
+        assert async_api.cache.missing(
+            'CF.D.GBPUSD.MAR.IP', 'MINUTE_15', '2024-01-08 10:00:00', '2024-01-08 10:30:00'
+        ) == [('2024-01-08 10:00:00', '2024-01-08 10:30:00')]
+
+    def test_iter_prices_async_generator(self, mocker):
+        """ iter_prices yields the chunks of the sync version without blocking the loop """
+
+        params = dict(
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+        async def collect(async_api):
+            return [chunk async for chunk in async_api.iter_prices(**params)]
+
+        with MockServer(mock_routes()) as server:
+            sync_chunks = list(mock_api(IG_API, server.url_base, mocker).iter_prices(**params))
+            async_chunks = asyncio.run(collect(mock_api(AsyncIG_API, server.url_base, mocker)))
+
+        assert len(async_chunks) == len(sync_chunks) > 0
+
+        for (async_prices, _, _), (sync_prices, _, _) in zip(async_chunks, sync_chunks):
+            assert async_prices.equals(sync_prices)
+
+    def test_lazy_prices_rejected(self, mocker):
+        """ the lazy accessors cannot await the async fetch """
+
+        async_api = mock_api(AsyncIG_API, muid.mock_url_base, mocker)
+
+        with pytest.raises(TypeError):
+            async_api.lazy_prices(
+                {'GBPUSD': {'epic': 'CF.D.GBPUSD.MAR.IP'}}, 'MINUTE_15', 'num_points', num_points=1
+            )
+
+    def test_coalescer_rejected(self):
+        """ a coalescer would be bypassed by the concurrent requests """
+
+        with pytest.raises(ValueError):
+            AsyncIG_API(**muid.mock_user_info_demo, coalescer=RequestCoalescer())
+
+        with pytest.raises(ValueError):
+            AsyncIG_API.from_session({}, coalescer=RequestCoalescer())
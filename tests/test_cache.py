@@ -0,0 +1,155 @@
+import json
+import responses
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter
+import tests.data.mock_user_info_demo as muid
+import tests.data.mock_hist_data as mhd
+
+
+class TestPriceCache:
+    """ unit tests for the local price cache """
+
+    def test_missing_write_read(self):
+        """ stored ranges are not missing anymore and read back identically """
+
+        cache = PriceCache(":memory:")
+        prices = mhd.mock_prices_dates_no_time_interval
+        epic = 'CF.D.GBPUSD.MAR.IP'
+
+        assert cache.missing(epic, 'HOUR_4', '2024-01-08 00:00:00', '2024-01-10 00:00:00') == [
+            ('2024-01-08 00:00:00', '2024-01-10 00:00:00')
+        ]
+
+        cache.write(epic, 'HOUR_4', prices, '2024-01-08 00:00:00', '2024-01-10 00:00:00', 'CURRENCIES')
+
+        assert cache.missing(epic, 'HOUR_4', '2024-01-07 00:00:00', '2024-01-11 00:00:00') == [
+            ('2024-01-07 00:00:00', '2024-01-07 23:59:59'),
+            ('2024-01-10 00:00:01', '2024-01-11 00:00:00'),
+        ]
+        assert cache.missing(epic, 'HOUR', '2024-01-08 00:00:00', '2024-01-08 01:00:00') == [
+            ('2024-01-08 00:00:00', '2024-01-08 01:00:00')
+        ]
+        assert cache.instrument_type(epic) == 'CURRENCIES'
+
+        result = cache.read(epic, 'HOUR_4', '2024-01-08 04:00:00', '2024-01-09 00:00:00')
+
+        assert all(result.columns == prices.columns)
+        assert all(result.index == prices.index[1:7])
+        assert (result.round(2).values == prices.round(2).values[1:7]).all()
+
+    def test_recent_range_complete(self):
+        """ a recent range is covered up to its last bar, unless its bars are final """
+
+        import pandas as pd
+
+        prices = mhd.mock_prices_dates_no_time_interval
+        last = prices.index[-1]
+        now = (last - pd.Timestamp(0)).total_seconds() + 60  # 1 minute after the last bar
+        # up to the end of the last bar's period
+        start = '2024-01-08 00:00:00'
+        end = (last + pd.Timedelta(hours=4, seconds=-1)).strftime('%Y-%m-%d %H:%M:%S')
+        epic = 'CF.D.GBPUSD.MAR.IP'
+
+        cache = PriceCache(":memory:", clock=lambda: now)
+        cache.write(epic, 'HOUR_4', prices, start, end)
+        assert cache.missing(epic, 'HOUR_4', start, end) == [(last.strftime('%Y-%m-%d %H:%M:%S'), end)]
+
+        cache = PriceCache(":memory:", clock=lambda: now)
+        cache.write(epic, 'HOUR_4', prices, start, end, complete=1)
+        assert cache.missing(epic, 'HOUR_4', start, end) == []
+
+    def test_eviction(self):
+        """ ranges are dropped by age, then least recently used by size """
+
+        now = [2e9]  # 2033
+        cache = PriceCache(":memory:", max_age=100, clock=lambda: now[0])
+        prices = mhd.mock_prices_dates_no_time_interval
+        epic = 'CF.D.GBPUSD.MAR.IP'
+
+        cache.write(epic, 'HOUR_4', prices.iloc[:6], '2024-01-08 00:00:00', '2024-01-08 23:59:59')
+        now[0] += 60
+        cache.write(epic, 'HOUR_4', prices.iloc[6:], '2024-01-09 00:00:00', '2024-01-10 00:00:00')
+        now[0] += 60
+
+        # first range has expired
+        cache.evict()
+        assert len(cache.read(epic, 'HOUR_4')) == 7
+        assert cache.missing(epic, 'HOUR_4', '2024-01-08 00:00:00', '2024-01-10 00:00:00') == [
+            ('2024-01-08 00:00:00', '2024-01-08 23:59:59')
+        ]
+
+        # size limit drops everything left
+        cache.max_bytes = 0
+        cache.evict()
+        assert cache.read(epic, 'HOUR_4').empty
+
+    def test_eviction_overlapping_ranges(self):
+        """ bars still covered by another (overlapping) range are not dropped with an evicted one """
+
+        now = [2e9]  # 2033
+        cache = PriceCache(":memory:", max_age=100, clock=lambda: now[0])
+        prices = mhd.mock_prices_dates_no_time_interval
+        epic = 'CF.D.GBPUSD.MAR.IP'
+
+        cache.write(epic, 'HOUR_4', prices, '2024-01-08 00:00:00', '2024-01-10 00:00:00')
+        now[0] += 60
+        cache.write(epic, 'HOUR_4', prices.iloc[6:], '2024-01-09 00:00:00', '2024-01-10 00:00:00')
+        now[0] += 60
+
+        # first range has expired: only its bars not fetched again are dropped
+        cache.evict()
+        assert cache.missing(epic, 'HOUR_4', '2024-01-08 00:00:00', '2024-01-10 00:00:00') == [
+            ('2024-01-08 00:00:00', '2024-01-08 23:59:59')
+        ]
+        assert all(cache.read(epic, 'HOUR_4').index == prices.index[6:])
+
+
+class TestGetPricesCached:
+    """ unit tests for get_prices_single_asset() with a cache """
+
+    @responses.activate
+    def test_get_prices_single_asset_fetches_missing_only(self, mocker):
+        """ only days missing from the cache are requested """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.cache = PriceCache(":memory:")
+
+        for i, day in [(1, '2024-01-08'), (2, '2024-01-10')]:
+            with open(f"tests/data/mock_hist_data_dates_time_interval_{i}.json", "r") as f:
+                responses.get(
+                    f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/{day} 10:00:00/{day} 10:30:00",
+                    json=json.load(f),
+                    status=200,
+                )
+
+        params = dict(epic='CF.D.GBPUSD.MAR.IP', resolution='MINUTE_15', range_type='dates')
+
+        # day 1 only
+        ig_api.get_prices_single_asset(**params, start_date='2024-01-08 10:00:00', end_date='2024-01-08 10:30:00')
+        assert len(responses.calls) == 1
+
+        # day 1 (cached) and day 2
+        prices, allowance, instrument_type = ig_api.get_prices_single_asset(
+            **params, start_date='2024-01-08 10:00:00', end_date='2024-01-10 10:30:00', weekdays=(0, 2)
+        )
+        assert len(responses.calls) == 2
+        assert '2024-01-10' in responses.calls[1].request.url
+
+        # everything cached
+        prices_cached, _, instrument_type_cached = ig_api.get_prices_single_asset(
+            **params, start_date='2024-01-08 10:00:00', end_date='2024-01-10 10:30:00', weekdays=(0, 2)
+        )
+        assert len(responses.calls) == 2
+
+        assert instrument_type == instrument_type_cached == 'CURRENCIES'
+        assert allowance is not None
+        assert prices_cached.equals(prices)
+        assert all(prices.columns == mhd.mock_prices_dates_time_interval.columns)
+        assert all(prices.index == mhd.mock_prices_dates_time_interval.index)
+        assert (prices.round(2).values == mhd.mock_prices_dates_time_interval.round(2).values).all()
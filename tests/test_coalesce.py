@@ -0,0 +1,193 @@
+import threading
+import time
+
+import json
+
+import pandas as pd
+import pytest
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter, RequestCoalescer
+from ig_trading_historical_data.coalesce import CoalescedResponse
+from ig_trading_historical_data.conversion import prices_to_dataframe
+from ig_trading_historical_data.decoding import decode_prices
+import tests.data.mock_user_info_demo as muid
+from tests.mock_server import MockServer
+
+
+EPIC = 'CS.D.GBPUSD.TODAY.IP'
+ALLOWANCE = {"remainingAllowance": 9000, "totalAllowance": 10000, "allowanceExpiry": 3600}
+
+
+def minute_bars(path):
+    """ route: 1 MINUTE bar per minute of the requested range """
+
+    start, end = path.rsplit("/", 2)[1:]
+    times = pd.date_range(pd.Timestamp(start).ceil("min"), end, freq="min")
+
+    prices = [
+        {
+            "snapshotTime": t.strftime("%Y/%m/%d %H:%M:%S"),
+            "openPrice": {"bid": 1.0 + i, "ask": 1.5 + i, "lastTraded": None},
+            "closePrice": {"bid": 1.2 + i, "ask": 1.7 + i, "lastTraded": None},
+            "highPrice": {"bid": 1.3 + i, "ask": 1.8 + i, "lastTraded": None},
+            "lowPrice": {"bid": 0.9 + i, "ask": 1.4 + i, "lastTraded": None},
+            "lastTradedVolume": 10 + i,
+        }
+        for i, t in enumerate(times)
+    ]
+
+    return 200, {"prices": prices, "instrumentType": "CURRENCIES", "allowance": ALLOWANCE}
+
+
+def minute_bars_num_points(path):
+    """ route: the last n MINUTE bars """
+
+    n = int(path.rsplit("/", 1)[1])
+
+    return minute_bars(f"/prices/{EPIC}/MINUTE/2024-01-08 10:00:00/2024-01-08 10:{n - 1:02d}:00")
+
+
+def range_path(start, end):
+    return f"/prices/{EPIC}/MINUTE/2024-01-08 {start}/2024-01-08 {end}"
+
+
+class TestRequestCoalescer:
+    """ unit tests for the RequestCoalescer """
+
+    def _ig_api(self, mocker, url_base, **kwargs):
+        """ IG_API instance with a mocked initialization """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        for name, value in kwargs.items():
+            setattr(ig_api, name, value)
+
+        return ig_api
+
+    def _get_later(self, ig_api, start, end, delay, out):
+        """ request a range in a thread started after 'delay' seconds """
+
+        def get():
+            time.sleep(delay)
+            out[start] = ig_api.get_prices_single_asset(
+                EPIC, 'MINUTE', 'dates', f'2024-01-08 {start}', f'2024-01-08 {end}'
+            )[0]
+
+        thread = threading.Thread(target=get)
+        thread.start()
+
+        return thread
+
+    @pytest.mark.parametrize("decoder", ["json", "msgspec"])
+    def test_overlapping_requests_share_fetch(self, mocker, decoder):
+        """ the 2nd request only fetches the part of its range not in flight """
+
+        if decoder == "msgspec":
+            pytest.importorskip("msgspec")
+
+        decode = mocker.spy(IG_API, "_decode_prices")
+
+        routes = {
+            range_path("10:00:00", "11:00:00"): minute_bars,
+            range_path("11:00:01", "11:30:00"): minute_bars,
+        }
+
+        with MockServer(routes, latency=0.3) as server:
+            ig_api = self._ig_api(mocker, server.url_base, coalescer=RequestCoalescer(), json_decoder=decoder)
+
+            out = {}
+            threads = [
+                self._get_later(ig_api, "10:00:00", "11:00:00", 0.0, out),
+                self._get_later(ig_api, "10:30:00", "11:30:00", 0.1, out),
+            ]
+            for thread in threads:
+                thread.join()
+
+        assert sorted(server.paths) == sorted(routes)
+
+        # 2 fetches, each decoded once (the shared one for both requests)
+        assert sum(not isinstance(call.args[1], CoalescedResponse) for call in decode.call_args_list) == 2
+
+        first, second = out["10:00:00"], out["10:30:00"]
+        assert len(first) == 61 and len(second) == 61
+        assert second.index[0] == pd.Timestamp("2024-01-08 10:30:00")
+        assert second.index[-1] == pd.Timestamp("2024-01-08 11:30:00")
+
+        # the shared part is sliced from the 1st response
+        pd.testing.assert_frame_equal(second.loc[:"2024-01-08 11:00:00"], first.loc["2024-01-08 10:30:00":])
+
+    def test_identical_num_points_requests_share_fetch(self, mocker):
+        """ identical requests in flight are sent once """
+
+        routes = {f"/prices/{EPIC}/MINUTE/10": minute_bars_num_points}
+
+        with MockServer(routes, latency=0.3) as server:
+            ig_api = self._ig_api(mocker, server.url_base, coalescer=RequestCoalescer())
+
+            out = []
+
+            def get():
+                out.append(ig_api.get_prices_single_asset(EPIC, 'MINUTE', 'num_points', num_points=10)[0])
+
+            threads = [threading.Thread(target=get) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(server.paths) == 1
+        assert len(out) == 3
+        for prices in out[1:]:
+            pd.testing.assert_frame_equal(prices, out[0])
+
+    def test_cross_process_lease(self, mocker, tmp_path):
+        """ a range leased by another process is read from the shared cache """
+
+        path = str(tmp_path / "prices.db")
+        routes = {range_path("10:00:00", "11:00:00"): minute_bars}
+
+        with MockServer(routes, latency=0.3) as server:
+            # 2 'processes': own coalescer (lease owner) and cache connection each
+            ig_apis = [
+                self._ig_api(
+                    mocker, server.url_base, cache=PriceCache(path), coalescer=RequestCoalescer(path, poll_interval=0.02)
+                )
+                for _ in range(2)
+            ]
+
+            out = {}
+            threads = [
+                self._get_later(ig_api, "10:00:00", "11:00:00", delay, out_i)
+                for ig_api, delay, out_i in zip(ig_apis, (0.0, 0.1), ({}, out))
+            ]
+            for thread in threads:
+                thread.join()
+
+        assert server.paths == [range_path("10:00:00", "11:00:00")]
+        assert len(out["10:00:00"]) == 61
+        # stored once, by the lease holder
+        assert ig_apis[0].cache.conn.execute("SELECT COUNT(*) FROM coverage").fetchone()[0] == 1
+        pd.testing.assert_frame_equal(
+            out["10:00:00"], ig_apis[0].cache.read(EPIC, 'MINUTE', '2024-01-08 10:00:00', '2024-01-08 11:00:00')
+        )
+
+    def test_content_of_decoded_columns(self):
+        """ the body of a response assembled from PriceBars is the original JSON """
+
+        pytest.importorskip("msgspec")
+
+        _, res = minute_bars(range_path("10:00:00", "10:09:00"))
+        res["prices"][0]["lastTradedVolume"] = None
+        res["prices"][1]["openPrice"]["bid"] = None
+
+        decoded = decode_prices(json.dumps(res).encode(), "msgspec")
+        content = json.loads(CoalescedResponse(decoded).content)
+
+        assert content["allowance"] == ALLOWANCE
+        pd.testing.assert_frame_equal(prices_to_dataframe(content["prices"]), prices_to_dataframe(res["prices"]))
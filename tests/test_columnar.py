@@ -0,0 +1,113 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import responses
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter
+import tests.data.mock_user_info_demo as muid
+
+pa = pytest.importorskip("pyarrow")
+pl = pytest.importorskip("polars")
+
+
+class TestColumnarOutput:
+    """ unit tests for the 'arrow' / 'polars' output backends """
+
+    def _ig_api(self, mocker, output, **attributes):
+        """ mocked instance with a given output backend """
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.output = output
+
+        for name, value in attributes.items():
+            setattr(ig_api, name, value)
+
+        return ig_api
+
+    def _mock_time_interval_responses(self):
+        """ mock the 2 responses of the time interval request (Mon and Wed) """
+
+        for i, day in enumerate(["2024-01-08", "2024-01-10"]):
+            with open(f"tests/data/mock_hist_data_dates_time_interval_{i+1}.json", "r") as f:
+                mock_response_json = json.load(f)
+
+            responses.get(
+                f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/{day} 10:00:00/{day} 10:30:00",
+                json=mock_response_json,
+                status=200,
+            )
+
+    def _get_prices(self, ig_api):
+        return ig_api.get_prices_single_asset(
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+    @responses.activate
+    def test_arrow_and_polars_match_pandas(self, mocker):
+        """ same values as the DataFrame output, snapshot time as the first column """
+
+        self._mock_time_interval_responses()
+
+        expected, _, _ = self._get_prices(self._ig_api(mocker, 'pandas'))
+        table, allowance, instrument_type = self._get_prices(self._ig_api(mocker, 'arrow'))
+        frame, _, _ = self._get_prices(self._ig_api(mocker, 'polars'))
+
+        assert isinstance(table, pa.Table)
+        assert isinstance(frame, pl.DataFrame)
+        assert instrument_type == 'CURRENCIES'
+        assert allowance is not None
+
+        assert table.column_names == ['snapshot_time'] + list(expected.columns)
+        assert table.schema.field('last_traded_volume').type == pa.int64()
+
+        from_table = table.to_pandas().set_index('snapshot_time')
+        pd.testing.assert_frame_equal(
+            from_table, expected, check_dtype=False, check_names=False, check_index_type=False
+        )
+        assert frame.equals(pl.from_arrow(table))
+
+    @responses.activate
+    def test_compact_arrow(self, mocker):
+        """ compact=2: float32 bid/ask columns only """
+
+        self._mock_time_interval_responses()
+
+        table, _, _ = self._get_prices(self._ig_api(mocker, 'arrow', compact=2))
+
+        assert table.column_names == ['snapshot_time'] + [
+            f'{p_type}_px_{side}' for side in ('bid', 'ask') for p_type in ('open', 'high', 'low', 'close')
+        ] + ['last_traded_volume']
+        assert table.schema.field('close_px_bid').type == pa.float32()
+
+    @responses.activate
+    def test_cached_output_same_schema(self, mocker):
+        """ prices read back from the cache have the schema of the direct conversion """
+
+        self._mock_time_interval_responses()
+
+        direct, _, _ = self._get_prices(self._ig_api(mocker, 'arrow'))
+
+        ig_api = self._ig_api(mocker, 'arrow', cache=PriceCache(":memory:"))
+        cached, _, _ = self._get_prices(ig_api)
+
+        assert cached.schema.equals(direct.schema)
+        assert cached.equals(direct)
+
+        np.testing.assert_array_equal(
+            cached.column('close_px_mid').to_numpy(), direct.column('close_px_mid').to_numpy()
+        )
+
+        # lazy slices need DataFrames
+        with pytest.raises(ValueError):
+            ig_api.lazy_prices({'GBPUSD': {'epic': 'CF.D.GBPUSD.MAR.IP'}}, 'MINUTE_15', 'num_points', num_points=1)
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+
+from ig_trading_historical_data.conversion import compact_prices, prices_to_dataframe, COLUMNS
+import tests.data.mock_hist_data as mhd
+
+
+class TestConversion:
+    """ unit tests for the JSON-to-DataFrame conversion """
+
+    def test_prices_to_dataframe(self):
+        """ vectorized conversion gives the expected 17 columns and values """
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            prices_historical = json.load(f)["prices"]
+
+        prices = prices_to_dataframe(prices_historical)
+
+        assert list(prices.columns) == COLUMNS
+        assert all(prices.columns == mhd.mock_prices_dates_no_time_interval.columns)
+        assert all(prices.index == mhd.mock_prices_dates_no_time_interval.index)
+        assert np.allclose(prices.values, mhd.mock_prices_dates_no_time_interval.values)
+        assert prices["last_traded_volume"].dtype == np.int64
+
+    def test_prices_to_dataframe_missing_values(self):
+        """ missing (null) fields become NaN, empty payloads give an empty frame """
+
+        with open("tests/data/mock_hist_data_num_points.json", "r") as f:
+            prices_historical = json.load(f)["prices"]
+
+        prices_historical[0]["lastTradedVolume"] = None
+        prices_historical[1]["openPrice"]["bid"] = None
+
+        prices = prices_to_dataframe(prices_historical)
+
+        assert np.isnan(prices["last_traded_volume"].iloc[0])
+        assert np.isnan(prices["open_px_bid"].iloc[1])
+        assert np.isnan(prices["open_px_mid"].iloc[1])
+        assert prices["open_px_ask"].iloc[1] == mhd.mock_prices_num_points["open_px_ask"].iloc[1]
+
+        empty = prices_to_dataframe([])
+
+        assert empty.empty
+        assert list(empty.columns) == COLUMNS
+
+    def test_compact_prices(self):
+        """ float32 prices, integer volume; dropped mid/spread are computed on access """
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            prices = prices_to_dataframe(json.load(f)["prices"])
+
+        compact = compact_prices(prices)
+
+        assert list(compact.columns) == COLUMNS
+        assert (compact.dtypes.iloc[:-1] == np.float32).all()
+        assert compact["last_traded_volume"].dtype == np.int64
+        assert compact.memory_usage().sum() < prices.memory_usage().sum()
+        assert np.allclose(compact.values, prices.values)
+
+        # without mid/spread
+        compact = compact_prices(prices, derived=0)
+
+        assert len(compact.columns) == 9
+        assert "open_px_mid" not in compact
+        assert np.allclose(compact.ig.mid.values, prices.ig.mid.values)
+        # float32 keeps ~7 significant digits (~0.001 for prices around 10,000)
+        assert np.allclose(compact.ig.spread.values, prices[[c for c in COLUMNS if "spread" in c]].values, atol=1e-3)
+        assert list(compact.ig.full().columns) == COLUMNS
+        assert np.allclose(compact.ig.full().values, prices.values, atol=1e-3)
+
+        # missing volume: nullable integers
+        prices.loc[prices.index[0], "last_traded_volume"] = np.nan
+
+        assert compact_prices(prices)["last_traded_volume"].dtype == "Int64"
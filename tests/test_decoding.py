@@ -0,0 +1,133 @@
+import json
+import pandas as pd
+import pytest
+import responses
+
+from ig_trading_historical_data import IG_API, RateLimiter
+from ig_trading_historical_data import decoding
+from ig_trading_historical_data.conversion import PriceBars, join_points, prices_to_dataframe
+import tests.data.mock_user_info_demo as muid
+
+
+def _content(i):
+    with open(f"tests/data/mock_hist_data_dates_time_interval_{i}.json", "rb") as f:
+        return f.read()
+
+
+def _installed_decoders():
+    return ["json"] + [
+        decoder for decoder, installed in [
+            ("orjson", decoding._orjson() is not None),
+            ("msgspec", decoding._typed_decoder() is not None),
+        ] if installed
+    ]
+
+
+class TestDecoding:
+    """ unit tests for the JSON decoders of 'prices' responses """
+
+    @pytest.mark.parametrize("decoder", _installed_decoders())
+    def test_decoders_match_json(self, decoder):
+        """ every decoder gives the frame and fields of the standard library """
+
+        content = _content(1)
+        expected = json.loads(content)
+
+        res = decoding.decode_prices(content, decoder)
+
+        assert res["allowance"] == expected["allowance"]
+        assert res["instrumentType"] == expected["instrumentType"]
+        pd.testing.assert_frame_equal(
+            prices_to_dataframe(res["prices"]), prices_to_dataframe(expected["prices"])
+        )
+
+        # missing prices and volume
+        expected["prices"][0]["openPrice"]["bid"] = None
+        expected["prices"][0]["lastTradedVolume"] = None
+        content = json.dumps(expected).encode()
+
+        pd.testing.assert_frame_equal(
+            prices_to_dataframe(decoding.decode_prices(content, decoder)["prices"]),
+            prices_to_dataframe(expected["prices"]),
+        )
+
+    def test_fallback(self, monkeypatch):
+        """ missing libraries: 'auto' falls back, an explicit choice raises """
+
+        monkeypatch.setattr(decoding, "_typed_decoder", lambda: None)
+        monkeypatch.setattr(decoding, "_orjson", lambda: None)
+
+        res = decoding.decode_prices(_content(1))
+
+        assert isinstance(res["prices"], list)
+        assert res == json.loads(_content(1))
+
+        for decoder in ["msgspec", "orjson"]:
+            with pytest.raises(ImportError):
+                decoding.decode_prices(_content(1), decoder)
+
+        with pytest.raises(ValueError):
+            decoding.decode_prices(_content(1), "simdjson")
+
+    def test_other_schema_falls_back(self):
+        """ a payload not matching the bar schema is decoded by json """
+
+        pytest.importorskip("msgspec")
+
+        content = json.dumps({"prices": [{"snapshotTime": None}], "allowance": None}).encode()
+
+        assert decoding.decode_prices(content, "msgspec") == json.loads(content)
+
+    def test_join_points(self):
+        """ lists and PriceBars of several responses are joined in order """
+
+        parts = [json.loads(_content(1))["prices"], json.loads(_content(2))["prices"]]
+        expected = prices_to_dataframe(parts[0] + parts[1])
+
+        assert join_points(parts) == parts[0] + parts[1]
+
+        if decoding._typed_decoder() is not None:
+            decoded = decoding.decode_prices(_content(2), "msgspec")["prices"]
+            joined = join_points([parts[0], decoded])
+
+            assert isinstance(joined, PriceBars)
+            assert len(joined) == len(expected)
+            pd.testing.assert_frame_equal(prices_to_dataframe(joined), expected)
+
+    @responses.activate
+    @pytest.mark.parametrize("decoder", _installed_decoders())
+    def test_get_prices_per_decoder(self, mocker, decoder):
+        """ get_prices_single_asset output does not depend on the decoder """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.json_decoder = decoder
+
+        expected = []
+        for i, day in enumerate(["2024-01-08", "2024-01-10"]):
+            expected.extend(json.loads(_content(i + 1))["prices"])
+
+            responses.get(
+                f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/{day} 10:00:00/{day} 10:30:00",
+                body=_content(i + 1),
+                status=200,
+                content_type="application/json",
+            )
+
+        prices, allowance, instrument_type = ig_api.get_prices_single_asset(
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+        assert instrument_type == 'CURRENCIES'
+        assert allowance == json.loads(_content(2))["allowance"]
+        pd.testing.assert_frame_equal(prices, prices_to_dataframe(expected))
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ig_trading_historical_data import ParquetStore
+from ig_trading_historical_data.conversion import COLUMNS, compact_prices, frame_from_columns
+
+pytest.importorskip("pyarrow")
+
+
+def make_prices(start, periods, freq, seed=0):
+    """ random 17 column prices """
+
+    rng = np.random.default_rng(seed)
+    bid = 1.27 + rng.normal(0, 0.001, (periods, 4))
+
+    return frame_from_columns(
+        bid,
+        bid + 0.0002,
+        rng.integers(1, 100, periods).astype(np.float64),
+        pd.date_range(start, periods=periods, freq=freq),
+    )
+
+
+class TestParquetStore:
+    """ unit tests for the partitioned Parquet export """
+
+    def test_write_read_partitions(self, tmp_path):
+        """ 1 date partition per day; reads select partitions, rows and columns """
+
+        store = ParquetStore(tmp_path)
+        prices = make_prices('2024-01-08 00:00:00', 3 * 24 * 12, '5min')
+
+        files = store.write('CS.D.GBPUSD.TODAY.IP', 'MINUTE_5', prices)
+
+        assert len(files) == 3
+        assert (tmp_path / "epic=CS.D.GBPUSD.TODAY.IP" / "resolution=MINUTE_5" / "date=2024-01-09").is_dir()
+
+        # all
+        read = store.read('CS.D.GBPUSD.TODAY.IP', 'MINUTE_5')
+        assert list(read.columns) == COLUMNS
+        assert read.index.equals(prices.index.astype("datetime64[ns]").rename("snapshot_time"))
+        assert np.allclose(read.values.astype(float), prices.values)
+
+        # time range and columns
+        read = store.read(
+            'CS.D.GBPUSD.TODAY.IP', 'MINUTE_5',
+            '2024-01-09 10:00:00', '2024-01-09 11:00:00',
+            columns=['close_px_bid', 'last_traded_volume'],
+        )
+        assert list(read.columns) == ['close_px_bid', 'last_traded_volume']
+        assert len(read) == 13
+        assert read.index[0] == pd.Timestamp('2024-01-09 10:00:00')
+
+        # unknown epic
+        assert store.read('CS.D.EURUSD.TODAY.IP', 'MINUTE_5').empty
+
+    def test_append_and_compact(self, tmp_path):
+        """ appends add part files; compaction merges them keeping the last written bars """
+
+        store = ParquetStore(tmp_path)
+        prices = make_prices('2024-01-08 00:00:00', 48, '15min')
+        newer = make_prices('2024-01-08 06:00:00', 48, '15min', seed=1)
+
+        store.write('CS.D.GBPUSD.TODAY.IP', 'MINUTE_15', prices)
+        store.write('CS.D.GBPUSD.TODAY.IP', 'MINUTE_15', compact_prices(newer, derived=0))
+
+        expected = pd.concat([prices.iloc[:24], newer])
+
+        read = store.read('CS.D.GBPUSD.TODAY.IP', 'MINUTE_15')
+        assert len(read) == 72
+        assert np.allclose(read.values.astype(float), expected.values, atol=1e-3)
+
+        partition = tmp_path / "epic=CS.D.GBPUSD.TODAY.IP" / "resolution=MINUTE_15" / "date=2024-01"
+        assert len(list(partition.glob("*.parquet"))) == 2
+
+        assert store.compact() == 1
+        assert len(list(partition.glob("*.parquet"))) == 1
+
+        compacted = store.read('CS.D.GBPUSD.TODAY.IP', 'MINUTE_15')
+        assert compacted.index.equals(read.index)
+        assert np.allclose(compacted.values.astype(float), read.values.astype(float))
+
+    def test_write_assets_outputs(self, tmp_path):
+        """ 'arrow' / 'polars' outputs are stored as DataFrames; other types raise """
+
+        pl = pytest.importorskip("polars")
+        from ig_trading_historical_data.columnar import table_from_prices
+
+        store = ParquetStore(tmp_path)
+        prices = make_prices('2024-01-08 00:00:00', 24, 'h')
+        table = table_from_prices(compact_prices(prices, derived=0))
+
+        store.write_assets(
+            {
+                "A": {"epic": "EPIC.A", "prices": table},
+                "B": {"epic": "EPIC.B", "prices": pl.from_arrow(table)},
+                "C": {"epic": "EPIC.C", "error": ValueError("failed")},
+            },
+            'HOUR',
+        )
+
+        for epic in ["EPIC.A", "EPIC.B"]:
+            read = store.read(epic, 'HOUR')
+            assert list(read.columns) == COLUMNS
+            assert read.index.equals(prices.index.astype("datetime64[ns]").rename("snapshot_time"))
+            assert np.allclose(read.values.astype(float), prices.values, atol=1e-4)
+
+        assert store.read("EPIC.C", 'HOUR').empty
+
+        with pytest.raises(TypeError):
+            store.write_assets({"A": {"epic": "EPIC.A", "prices": table.to_pylist()}}, 'HOUR')
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ig_trading_historical_data import EpicCache, IG_API, RateLimiter
+import tests.data.mock_user_info_demo as muid
+from tests.mock_server import MockServer
+
+
+class TestGetEpics:
+    """ unit tests for get_epics() method """
+
+    def test_get_epics_executor(self, mocker):
+        """ market searches run in the given executor """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        markets = {
+            "markets": [
+                {"instrumentName": "GBP/USD", "expiry": "DFB", "epic": "CS.D.GBPUSD.TODAY.IP"},
+                {"instrumentName": "GBP/USD Forward", "expiry": "MAR-24", "epic": "CF.D.GBPUSD.MAR.IP"},
+            ]
+        }
+        routes = {
+            "/markets?searchTerm=GBPUSD": (200, markets),
+            "/markets?searchTerm=GBPUSD Forward": (200, markets),
+        }
+
+        with MockServer(routes) as server, ThreadPoolExecutor(2) as executor:
+            ig_api.url_base = server.url_base
+
+            assets = ig_api.get_epics(
+                {
+                    'GBPUSD Forward': {'instrument_name': 'GBP/USD Forward', 'expiry': 'MAR-24'},
+                    'GBPUSD': {'instrument_name': 'GBP/USD', 'expiry': 'DFB'},
+                },
+                executor=executor,
+            )
+
+        assert list(assets) == ['GBPUSD Forward', 'GBPUSD']
+        assert assets['GBPUSD Forward']['epic'] == "CF.D.GBPUSD.MAR.IP"
+        assert assets['GBPUSD']['epic'] == "CS.D.GBPUSD.TODAY.IP"
+
+    def test_get_epics_epic_cache(self, mocker):
+        """ only cache misses are searched; entries expire after the TTL """
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        now = [1000.0]
+        ig_api.epic_cache = EpicCache(":memory:", ttl=3600, clock=lambda: now[0])
+
+        markets = {
+            "markets": [
+                {"instrumentName": "GBP/USD", "expiry": "DFB", "epic": "CS.D.GBPUSD.TODAY.IP"},
+                {"instrumentName": "GBP/USD Forward", "expiry": "MAR-24", "epic": "CF.D.GBPUSD.MAR.IP"},
+            ]
+        }
+        routes = {
+            "/markets?searchTerm=GBPUSD": (200, markets),
+            "/markets?searchTerm=GBPUSD Forward": (200, markets),
+        }
+
+        def assets():
+            return {
+                'GBPUSD': {'instrument_name': 'GBP/USD', 'expiry': 'DFB'},
+                'GBPUSD Forward': {'instrument_name': 'GBP/USD Forward', 'expiry': 'MAR-24'},
+            }
+
+        with MockServer(routes) as server:
+            ig_api.url_base = server.url_base
+
+            # 1 search stores both markets
+            result = ig_api.get_epics(assets())
+            assert len(server.paths) == 1
+            assert result['GBPUSD Forward']['epic'] == "CF.D.GBPUSD.MAR.IP"
+
+            # all served from the cache
+            result = ig_api.get_epics(assets(), max_workers=2)
+            assert len(server.paths) == 1
+            assert result['GBPUSD']['epic'] == "CS.D.GBPUSD.TODAY.IP"
+
+            # invalidated entries are searched again
+            ig_api.epic_cache.invalidate('GBP/USD Forward')
+            ig_api.get_epics(assets(), max_workers=2)
+            assert server.paths[1:] == ["/markets?searchTerm=GBPUSD Forward"]
+
+            # expired entries too
+            now[0] += 3601
+            ig_api.get_epics(assets())
+            assert len(server.paths) == 3
@@ -0,0 +1,56 @@
+import json
+
+from ig_trading_historical_data import IG_API, RateLimiter
+import tests.data.mock_user_info_demo as muid
+import tests.data.mock_hist_data as mhd
+from tests.mock_server import MockServer
+
+
+class TestGetPricesAllAssets:
+    """ unit tests for get_prices_all_assets() method """
+
+    def test_get_prices_all_assets_thread_pool(self, mocker):
+        """ fetch assets in parallel threads, keeping input order and collecting failures """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        with open("tests/data/mock_hist_data_num_points.json", "r") as f:
+            mock_prices_num_points_response_json = json.load(f)
+
+        # 'ERROR' epic is not served (404)
+        routes = {
+            f"/prices/{epic}/MINUTE_5/2": (200, mock_prices_num_points_response_json)
+            for epic in ['EPIC.A', 'EPIC.B', 'EPIC.C']
+        }
+
+        assets = {
+            'C': {'epic': 'EPIC.C'},
+            'failing': {'epic': 'ERROR'},
+            'A': {'epic': 'EPIC.A'},
+            'B': {'epic': 'EPIC.B'},
+        }
+
+        with MockServer(routes, latency=0.05) as server:
+            ig_api.url_base = server.url_base
+
+            assets, allowance = ig_api.get_prices_all_assets(
+                assets,
+                resolution='MINUTE_5',
+                range_type='num_points',
+                num_points=2,
+                max_workers=4,
+            )
+
+        assert list(assets) == ['C', 'failing', 'A', 'B']
+        assert isinstance(assets['failing']['error'], ValueError)
+        assert 'prices' not in assets['failing']
+        assert allowance == mock_prices_num_points_response_json['allowance']
+
+        for asset in ['A', 'B', 'C']:
+            assert all(assets[asset]['prices'].columns == mhd.mock_prices_num_points.columns)
+            assert all(assets[asset]['prices'].index == mhd.mock_prices_num_points.index)
@@ -1,4 +1,5 @@
 import json
+import numpy as np
 import responses
 import pytest_mock
 
@@ -189,3 +190,44 @@ class TestGetHistoricalPrices:
         assert all(prices.index == mhd.mock_prices_dates_no_time_interval.index)
         assert all(prices.round(2).values[0] == mhd.mock_prices_dates_no_time_interval.round(2).values[0])
         assert all(prices.round(2).values[-1] == mhd.mock_prices_dates_no_time_interval.round(2).values[-1])
+
+
+    @responses.activate
+    def test_get_prices_single_asset_compact(self, mocker):
+        """ test compact=2: float32 prices without the mid/spread columns """
+
+        """ mocking the class initialization """
+        mocked_init = mocker.patch.object(
+            IG_API,
+            '__init__',
+            return_value=None
+        )
+
+        # mock initialize
+        ig_api = IG_API(**muid.mock_user_info_demo)
+
+        # set mock attributes
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.compact = 2
+
+        with open("tests/data/mock_hist_data_num_points.json", "r") as f:
+            mock_prices_num_points_response_json = json.load(f)
+
+        responses.get(
+            "https://demo-api.ig.com/gateway/deal/prices/CF.D.GBPUSD.MAR.IP/HOUR_4/2",
+            json=mock_prices_num_points_response_json,
+            status=200
+        )
+
+        prices, allowance, instrument_type = ig_api.get_prices_single_asset(
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='HOUR_4',
+            range_type='num_points',
+            num_points=2,
+        )
+
+        assert len(prices.columns) == 9
+        assert all(prices.dtypes.iloc[:-1] == 'float32')
+        assert all(prices.index == mhd.mock_prices_num_points.index)
+        assert np.allclose(prices.ig.full().values, mhd.mock_prices_num_points.values)
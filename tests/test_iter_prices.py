@@ -0,0 +1,176 @@
+import json
+import pandas as pd
+import pytest
+import responses
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter
+import tests.data.mock_user_info_demo as muid
+import tests.data.mock_hist_data as mhd
+
+
+class TestIterPrices:
+    """ unit tests for iter_prices() and save_prices() methods """
+
+    def _mock_time_interval_responses(self):
+        """ mock the 2 responses of the time interval request (Mon and Wed) """
+
+        for i, day in enumerate(["2024-01-08", "2024-01-10"]):
+            with open(f"tests/data/mock_hist_data_dates_time_interval_{i+1}.json", "r") as f:
+                mock_response_json = json.load(f)
+
+            responses.get(
+                f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/{day} 10:00:00/{day} 10:30:00",
+                json=mock_response_json,
+                status=200,
+            )
+
+    @responses.activate
+    def test_iter_prices_yields_1_chunk_per_response(self, mocker):
+        """ 1 DataFrame chunk per response, together equal to get_prices_single_asset() """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        self._mock_time_interval_responses()
+
+        chunks = ig_api.iter_prices(
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+        # lazy: nothing is requested before the first chunk is asked for
+        assert len(responses.calls) == 0
+
+        prices, allowance, instrument_type = next(chunks)
+
+        assert len(responses.calls) == 1
+        assert all(prices.index.normalize() == pd.Timestamp('2024-01-08'))
+
+        frames = [prices] + [prices for prices, _, _ in chunks]
+        prices = pd.concat(frames)
+
+        assert len(frames) == 2
+        assert all(prices.columns == mhd.mock_prices_dates_time_interval.columns)
+        assert all(prices.index == mhd.mock_prices_dates_time_interval.index)
+        assert (prices.round(2).values == mhd.mock_prices_dates_time_interval.round(2).values).all()
+
+    @responses.activate
+    def test_iter_prices_reads_stored_parts_from_cache(self, mocker):
+        """ with a cache, stored parts are yielded from it and only the rest is requested """
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.cache = PriceCache(":memory:")
+
+        epic = 'CF.D.GBPUSD.MAR.IP'
+        prices = mhd.mock_prices_dates_no_time_interval
+
+        # stored: 2 ranges with a hole in between
+        ig_api.cache.write(epic, 'HOUR_4', prices.iloc[:3], '2024-01-08 00:00:00', '2024-01-08 08:00:00')
+        ig_api.cache.write(epic, 'HOUR_4', prices.iloc[6:9], '2024-01-09 00:00:00', '2024-01-09 08:00:00')
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        url = f"{muid.mock_url_base}/prices/{epic}/HOUR_4"
+        responses.get(
+            f"{url}/2024-01-08 08:00:01/2024-01-08 23:59:59",
+            json={**mock_response_json, "prices": mock_response_json["prices"][3:6]},
+            status=200,
+        )
+        responses.get(
+            f"{url}/2024-01-09 08:00:01/2024-01-10 00:00:00",
+            json={**mock_response_json, "prices": mock_response_json["prices"][9:]},
+            status=200,
+        )
+
+        frames = [
+            chunk
+            for chunk, _, _ in ig_api.iter_prices(
+                epic, 'HOUR_4', 'dates', '2024-01-08 00:00:00', '2024-01-10 00:00:00', max_workers=2
+            )
+        ]
+
+        assert len(responses.calls) == 2
+        assert [len(frame) for frame in frames] == [3, 3, 3, len(prices) - 9]
+
+        streamed = pd.concat(frames)
+        assert all(streamed.index == prices.index)
+        assert (streamed.round(2).values == prices.round(2).values).all()
+
+        # fetched chunks were stored on the way
+        assert ig_api.cache.missing(epic, 'HOUR_4', '2024-01-08 00:00:00', '2024-01-10 00:00:00') == []
+
+    @responses.activate
+    def test_iter_prices_error(self, mocker):
+        """ a failed request raises ValueError """
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        responses.get(
+            f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/HOUR_4/10",
+            json={"errorCode": "error.public-api.exceeded-account-historical-data-allowance"},
+            status=403,
+        )
+
+        with pytest.raises(ValueError):
+            list(ig_api.iter_prices('CF.D.GBPUSD.MAR.IP', 'HOUR_4', 'num_points', num_points=10))
+
+    @pytest.mark.parametrize("suffix", ["csv", "parquet"])
+    @responses.activate
+    def test_save_prices(self, mocker, tmp_path, suffix):
+        """ chunks are written to 1 file """
+
+        if suffix == "parquet":
+            pytest.importorskip("pyarrow")
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        self._mock_time_interval_responses()
+
+        path = tmp_path / f"prices.{suffix}"
+
+        n_points, allowance, instrument_type = ig_api.save_prices(
+            path,
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+        if suffix == "parquet":
+            saved = pd.read_parquet(path)
+        else:
+            saved = pd.read_csv(path, index_col=0, parse_dates=True)
+
+        expected = mhd.mock_prices_dates_time_interval
+
+        assert n_points == len(expected)
+        assert all(saved.columns == expected.columns)
+        assert all(saved.index == expected.index)
+        assert (saved.round(2).values == expected.round(2).values).all()
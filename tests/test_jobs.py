@@ -0,0 +1,223 @@
+import json
+from urllib.parse import unquote
+import pandas as pd
+import pytest
+import responses
+
+from ig_trading_historical_data import AllowanceExceededError, IG_API, PriceCache, PriceJob, RateLimiter
+import tests.data.mock_user_info_demo as muid
+
+
+EPIC = 'CF.D.GBPUSD.MAR.IP'
+DAYS = ["2024-01-08", "2024-01-10"]
+
+
+class TestPriceJob:
+    """ unit tests for the resumable PriceJob """
+
+    def _ig_api(self, mocker):
+        """ IG_API instance with a mocked initialization """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        return ig_api
+
+    def _url(self, day):
+        return f"{muid.mock_url_base}/prices/{EPIC}/MINUTE_15/{day} 10:00:00/{day} 10:30:00"
+
+    def _mock_day(self, i, **kwargs):
+        """ mock the response of day i (Mon or Wed), or an error response """
+
+        if kwargs:
+            responses.get(self._url(DAYS[i]), **kwargs)
+            return
+
+        with open(f"tests/data/mock_hist_data_dates_time_interval_{i+1}.json", "r") as f:
+            responses.get(self._url(DAYS[i]), json=json.load(f), status=200)
+
+    def _job(self, ig_api, path, **kwargs):
+        return PriceJob(
+            ig_api,
+            path,
+            {'GBPUSD Forward': {'epic': EPIC}},
+            'MINUTE_15',
+            'dates',
+            '2024-01-08 10:00:00',
+            '2024-01-10 10:30:00',
+            weekdays=(0, 2),
+            **kwargs,
+        )
+
+    def _expected(self, ig_api):
+        """ output of get_prices_single_asset for the same request """
+
+        self._mock_day(0)
+        self._mock_day(1)
+
+        prices, _, _ = ig_api.get_prices_single_asset(
+            EPIC, 'MINUTE_15', 'dates', '2024-01-08 10:00:00', '2024-01-10 10:30:00', (0, 2)
+        )
+        responses.reset()
+
+        return prices
+
+    @responses.activate
+    def test_failed_unit_retried_with_backoff(self, mocker, tmp_path):
+        """ a failing day is retried after a backoff, the output is unchanged """
+
+        ig_api = self._ig_api(mocker)
+        expected = self._expected(ig_api)
+
+        self._mock_day(0)
+        self._mock_day(1, json={"errorCode": "error.unexpected"}, status=500)
+        self._mock_day(1, json={"errorCode": "error.unexpected"}, status=500)
+        self._mock_day(1)
+
+        sleeps = []
+        clock = [0.0]
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        with self._job(ig_api, str(tmp_path / "job.db"), backoff=2.0, sleep=sleep, clock=lambda: clock[0]) as job:
+            assets, allowance = job.run()
+
+            assert job.progress() == {"pending": 0, "done": 2, "failed": 0, "total": 2}
+
+        assert sleeps == [2.0, 4.0]
+        assert len(responses.calls) == 4
+        assert allowance is not None
+        pd.testing.assert_frame_equal(assets['GBPUSD Forward']['prices'], expected)
+
+    @responses.activate
+    def test_resume_fetches_only_missing_units(self, mocker, tmp_path):
+        """ completed days are not fetched again by a resumed job """
+
+        ig_api = self._ig_api(mocker)
+        expected = self._expected(ig_api)
+        path = str(tmp_path / "job.db")
+
+        self._mock_day(0)
+        self._mock_day(1, json={"errorCode": "error.unexpected"}, status=500)
+
+        with self._job(ig_api, path, retries=0) as job:
+            assets, _ = job.run()
+
+            assert job.progress() == {"pending": 0, "done": 1, "failed": 1, "total": 2}
+
+        assert isinstance(assets['GBPUSD Forward']['error'], ValueError)
+        assert 'prices' not in assets['GBPUSD Forward']
+
+        # a new process: same checkpoint, the failed day only
+        responses.reset()
+        self._mock_day(1)
+
+        with self._job(ig_api, path, retries=0) as job:
+            assets, _ = job.run()
+
+        assert len(responses.calls) == 1
+        assert DAYS[1] in unquote(responses.calls[0].request.url)
+        pd.testing.assert_frame_equal(assets['GBPUSD Forward']['prices'], expected)
+
+    @responses.activate
+    def test_cached_once_per_unit(self, mocker, tmp_path):
+        """ each unit is stored in the cache as it completes, not again by every run """
+
+        ig_api = self._ig_api(mocker)
+        expected = self._expected(ig_api)
+        ig_api.cache = PriceCache(":memory:")
+
+        self._mock_day(0)
+        self._mock_day(1)
+
+        with self._job(ig_api, str(tmp_path / "job.db")) as job:
+            for _ in range(3):
+                assets, _ = job.run()
+
+                coverage = ig_api.cache.conn.execute("SELECT COUNT(*) FROM coverage").fetchone()[0]
+                assert coverage == 2
+
+                prices = assets['GBPUSD Forward']['prices']
+                assert all(prices.index == expected.index)
+                assert (prices.round(5).values == expected.round(5).values).all()
+
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_allowance_used_up_stops_job(self, mocker, tmp_path):
+        """ the job stops once the allowance is used up and resumes after the reset """
+
+        ig_api = self._ig_api(mocker)
+        path = str(tmp_path / "job.db")
+
+        self._mock_day(0)
+        self._mock_day(
+            1,
+            json={"errorCode": "error.public-api.exceeded-account-historical-data-allowance"},
+            status=403,
+        )
+
+        with self._job(ig_api, path) as job:
+            with pytest.raises(AllowanceExceededError):
+                job.run()
+
+            assert job.progress() == {"pending": 1, "done": 1, "failed": 0, "total": 2}
+
+        # no retries were sent
+        assert len(responses.calls) == 2
+
+        responses.reset()
+        self._mock_day(1)
+
+        with self._job(ig_api, path) as job:
+            assets, _ = job.run()
+
+        assert len(responses.calls) == 1
+        assert len(assets['GBPUSD Forward']['prices']) > 0
+
+    @responses.activate
+    def test_allowance_used_up_keeps_batch_responses(self, mocker, tmp_path):
+        """ responses of a parallel batch received after the allowance error are stored """
+
+        ig_api = self._ig_api(mocker)
+        path = str(tmp_path / "job.db")
+
+        self._mock_day(
+            0,
+            json={"errorCode": "error.public-api.exceeded-account-historical-data-allowance"},
+            status=403,
+        )
+        self._mock_day(1)
+
+        with self._job(ig_api, path) as job:
+            with pytest.raises(AllowanceExceededError):
+                job.run(max_workers=2)
+
+            assert job.progress() == {"pending": 1, "done": 1, "failed": 0, "total": 2}
+
+        responses.reset()
+        self._mock_day(0)
+
+        # only the unit rejected for the allowance is sent again
+        with self._job(ig_api, path) as job:
+            job.run(max_workers=2)
+
+        assert [DAYS[0] in unquote(call.request.url) for call in responses.calls] == [True]
+
+    def test_other_parameters_rejected(self, mocker, tmp_path):
+        """ a checkpoint only resumes the job it was created for """
+
+        ig_api = self._ig_api(mocker)
+        path = str(tmp_path / "job.db")
+
+        self._job(ig_api, path).close()
+
+        with pytest.raises(ValueError):
+            PriceJob(ig_api, path, {'GBPUSD Forward': {'epic': EPIC}}, 'HOUR', 'num_points', num_points=10)
@@ -0,0 +1,135 @@
+import json
+from urllib.parse import unquote
+import pandas as pd
+import responses
+
+from ig_trading_historical_data import IG_API, RateLimiter
+import tests.data.mock_user_info_demo as muid
+
+
+class TestLazyPrices:
+    """ unit tests for lazy_prices() and the LazyAsset accessor """
+
+    def _mock_time_interval_responses(self):
+        """ mock the 2 responses of the time interval request (Mon and Wed) """
+
+        for i, day in enumerate(["2024-01-08", "2024-01-10"]):
+            with open(f"tests/data/mock_hist_data_dates_time_interval_{i+1}.json", "r") as f:
+                mock_response_json = json.load(f)
+
+            responses.get(
+                f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/{day} 10:00:00/{day} 10:30:00",
+                json=mock_response_json,
+                status=200,
+            )
+
+    @responses.activate
+    def test_lazy_prices_fetch_on_access(self, mocker):
+        """ nothing fetched up front; slices fetch only their days """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        self._mock_time_interval_responses()
+
+        prices = ig_api.lazy_prices(
+            {
+                'GBPUSD Forward': {'epic': 'CF.D.GBPUSD.MAR.IP'},
+                'unused': {'epic': 'UNUSED.EPIC'},
+            },
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+        assert list(prices) == ['GBPUSD Forward', 'unused']
+        assert len(responses.calls) == 0
+
+        # a slice of 1 day: only that day is requested
+        wednesday = prices['GBPUSD Forward']['2024-01-10':'2024-01-10', ['close_px_bid', 'close_px_ask']]
+
+        assert len(responses.calls) == 1
+        assert '2024-01-10 10:00:00' in unquote(responses.calls[0].request.url)
+        assert list(wednesday.columns) == ['close_px_bid', 'close_px_ask']
+        assert all(wednesday.index.normalize() == pd.Timestamp('2024-01-10'))
+        assert prices.loaded() == []
+
+        # full load, then slices are served from memory
+        full = prices['GBPUSD Forward'].prices
+
+        assert len(responses.calls) == 3
+        assert prices.loaded() == ['GBPUSD Forward']
+        assert set(full.index.normalize()) == {pd.Timestamp('2024-01-08'), pd.Timestamp('2024-01-10')}
+
+        pd.testing.assert_frame_equal(
+            prices['GBPUSD Forward']['2024-01-10':'2024-01-10', ['close_px_bid', 'close_px_ask']], wednesday
+        )
+        pd.testing.assert_series_equal(prices['GBPUSD Forward']['close_px_mid'], full['close_px_mid'])
+        assert len(responses.calls) == 3
+
+        # a slice outside the job: nothing requested
+        assert prices['unused']['2025-01-01':].empty
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_lazy_prices_full_range_slices(self, mocker):
+        """ slices of a full range job fetch whole days (no time interval, no weekdays filter) """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        times = pd.date_range('2024-01-05 00:00:00', '2024-01-09 00:00:00', freq='h')
+        responses.get(
+            f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/HOUR/2024-01-05 00:00:00/2024-01-09 00:00:00",
+            json={
+                "prices": [
+                    {
+                        "snapshotTime": t.strftime("%Y/%m/%d %H:%M:%S"),
+                        **{
+                            p_type: {"bid": 1.0 + i, "ask": 1.5 + i, "lastTraded": None}
+                            for p_type in ["openPrice", "closePrice", "highPrice", "lowPrice"]
+                        },
+                        "lastTradedVolume": i,
+                    }
+                    for i, t in enumerate(times)
+                ],
+                "instrumentType": "CURRENCIES",
+                "allowance": {"remainingAllowance": 9000, "totalAllowance": 10000, "allowanceExpiry": 3600},
+            },
+            status=200,
+        )
+
+        asset = ig_api.lazy_prices(
+            {'GBPUSD Forward': {'epic': 'CF.D.GBPUSD.MAR.IP'}},
+            resolution='HOUR',
+            range_type='dates',
+            start_date='2024-01-01 00:00:00',
+            end_date='2024-02-01 00:00:00',
+            weekdays=(0, 1, 2, 3, 4),
+        )['GBPUSD Forward']
+
+        part = asset['2024-01-05':'2024-01-08 12:00:00']
+
+        # 1 request of whole days, cut to the slice
+        assert len(responses.calls) == 1
+        assert part.index[0] == pd.Timestamp('2024-01-05 00:00:00')
+        assert part.index[-1] == pd.Timestamp('2024-01-08 12:00:00')
+        assert len(part) == 3 * 24 + 13
+
+        # the weekend is kept; slices within a fetched part are not requested again
+        weekend = asset['2024-01-06':'2024-01-07']
+
+        assert len(weekend) == 48
+        assert len(responses.calls) == 1
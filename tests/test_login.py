@@ -1,4 +1,6 @@
 import json
+import os
+import pytest
 import responses
 
 from ig_trading_historical_data import IG_API
@@ -36,3 +38,79 @@ class TestLogin:
         assert ig_api.acc_info['clientId'] == mock_response_json['clientId']
         assert ig_api.acc_info['accountInfo']['balance'] == mock_response_json['accountInfo']['balance']
         assert ig_api.header_base['CST'] == mock_response_headers['CST']
+
+    @responses.activate
+    def test_login_from_saved_session(self, tmp_path):
+        """ a saved session is reused without logging in; expired tokens log in again """
+
+        with open("tests/data/mock_acc_info.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        mock_url = "https://demo-api.ig.com/gateway/deal/session"
+
+        responses.post(
+            mock_url,
+            json=mock_response_json,
+            status=200,
+            headers={"CST": "test_CST", "X-SECURITY-TOKEN": "test_X-SECURITY-TOKEN"},
+        )
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+
+        path = tmp_path / "session.json"
+        ig_api.save_session(path)
+
+        # readable by the owner only
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+        worker = IG_API.from_session(
+            path,
+            username=muid.mock_user_info_demo['username'],
+            pw=muid.mock_user_info_demo['pw'],
+        )
+
+        assert len(responses.calls) == 1
+        assert worker.header_base == ig_api.header_base
+        assert worker.url_base == muid.mock_url_base
+        assert worker.acc_info == ig_api.acc_info
+
+        # tokens expired: 401, log in again, retry with the new tokens
+        watchlist_url = f"{muid.mock_url_base}/watchlists"
+        responses.get(watchlist_url, json={"errorCode": "error.security.client-token-invalid"}, status=401)
+        responses.get(watchlist_url, json={"watchlists": []}, status=200)
+        responses.post(
+            mock_url,
+            json=mock_response_json,
+            status=200,
+            headers={"CST": "new_CST", "X-SECURITY-TOKEN": "new_X-SECURITY-TOKEN"},
+        )
+
+        assert worker.get_watchlist() == {"watchlists": []}
+        assert [call.request.method for call in responses.calls[1:]] == ["GET", "POST", "GET"]
+        assert responses.calls[-1].request.headers["CST"] == "new_CST"
+        assert worker.header_base["CST"] == "new_CST"
+
+    def test_from_session_options(self):
+        """ options of a saved session are checked as in __init__, 1 session lock per instance """
+
+        session = {
+            "demo": 1,
+            "api_key": muid.mock_user_info_demo['api_key'],
+            "token_cst": "test_CST",
+            "token_x_security_token": "test_X-SECURITY-TOKEN",
+            "acc_info": {"lightstreamerEndpoint": "", "timezoneOffset": 0},
+        }
+
+        with pytest.raises(ValueError):
+            IG_API.from_session(session, output="pandas_dataframe")
+
+        with pytest.raises(ValueError):
+            IG_API.from_session(session, compact=3)
+
+        with pytest.raises(TypeError):
+            IG_API.from_session(session, unknown_option=1)
+
+        ig_apis = [IG_API.from_session(session, compact=1) for _ in range(2)]
+
+        assert ig_apis[0].compact == 1
+        assert ig_apis[0]._session_lock is not ig_apis[1]._session_lock
@@ -0,0 +1,147 @@
+import json
+import responses
+
+from ig_trading_historical_data import IG_API, CallbackSink, PrometheusSink, RateLimiter
+import tests.data.mock_user_info_demo as muid
+
+
+class TestMetrics:
+    """ unit tests for the instrumentation events and the metrics sinks """
+
+    def _ig_api(self, mocker, metrics):
+        """ IG_API instance with a mocked initialization """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.metrics = metrics
+
+        return ig_api
+
+    def _mock_time_interval_responses(self):
+        """ mock the 2 responses of the time interval request (Mon and Wed) """
+
+        for i, day in enumerate(["2024-01-08", "2024-01-10"]):
+            with open(f"tests/data/mock_hist_data_dates_time_interval_{i+1}.json", "r") as f:
+                mock_response_json = json.load(f)
+
+            responses.get(
+                f"{muid.mock_url_base}/prices/CF.D.GBPUSD.MAR.IP/MINUTE_15/{day} 10:00:00/{day} 10:30:00",
+                json=mock_response_json,
+                status=200,
+            )
+
+    @responses.activate
+    def test_events_recorded_per_request(self, mocker, capsys):
+        """ request, allowance and conversion events; nothing printed """
+
+        events = []
+        ig_api = self._ig_api(mocker, CallbackSink(lambda event, fields: events.append((event, fields))))
+
+        self._mock_time_interval_responses()
+
+        prices, allowance, _ = ig_api.get_prices_single_asset(
+            epic='CF.D.GBPUSD.MAR.IP',
+            resolution='MINUTE_15',
+            range_type='dates',
+            start_date='2024-01-08 10:00:00',
+            end_date='2024-01-10 10:30:00',
+            weekdays=(0, 2),
+        )
+
+        assert capsys.readouterr().out == ""
+
+        requests = [fields for event, fields in events if event == "request"]
+        assert len(requests) == 2
+        for fields, call in zip(requests, responses.calls):
+            assert fields["method"] == "GET"
+            assert fields["endpoint"] == "prices"
+            assert fields["status"] == 200
+            assert fields["bytes"] == len(call.response.content)
+            assert fields["retries"] == 0
+            assert fields["latency"] >= 0 and fields["wait"] == 0
+
+        allowances = [fields for event, fields in events if event == "allowance"]
+        assert allowances[-1] == {
+            "remaining": allowance["remainingAllowance"],
+            "total": allowance["totalAllowance"],
+        }
+
+        conversions = [fields for event, fields in events if event == "conversion"]
+        assert sum(fields["points"] for fields in conversions) == len(prices)
+        assert all(fields["epic"] == 'CF.D.GBPUSD.MAR.IP' for fields in conversions)
+
+    @responses.activate
+    def test_retries_counted(self, mocker):
+        """ a request rejected for exceeding a limit is retried and counted once """
+
+        events = []
+        ig_api = self._ig_api(mocker, CallbackSink(lambda event, fields: events.append((event, fields))))
+
+        url = f"{muid.mock_url_base}/watchlists"
+        responses.get(url, json={"errorCode": "error.public-api.exceeded-api-key-allowance"}, status=403)
+        responses.get(url, json={"watchlists": []}, status=200)
+
+        ig_api.get_watchlist()
+
+        assert events == [
+            ("request", {**events[0][1], "endpoint": "watchlists", "status": 200, "retries": 1}),
+        ]
+
+    def test_prometheus_render(self):
+        """ counters, gauges and cumulative histograms in the text format """
+
+        sink = PrometheusSink()
+
+        for latency, status in [(0.02, 200), (0.3, 200), (0.02, 500)]:
+            sink.record(
+                "request", method="GET", endpoint="prices", status=status,
+                latency=latency, bytes=100, retries=1, wait=0.0,
+            )
+        sink.record("allowance", remaining=9000, total=10000)
+        sink.record("conversion", epic="E", resolution="MINUTE", points=50, seconds=0.001)
+
+        text = sink.render()
+        lines = text.splitlines()
+
+        assert '# TYPE ig_api_requests_total counter' in lines
+        assert 'ig_api_requests_total{method="GET",endpoint="prices",status="200"} 2' in lines
+        assert 'ig_api_requests_total{method="GET",endpoint="prices",status="500"} 1' in lines
+        assert 'ig_api_request_retries_total{endpoint="prices"} 3' in lines
+        assert 'ig_api_response_bytes_total{endpoint="prices"} 300' in lines
+        assert 'ig_api_allowance_remaining 9000' in lines
+        assert 'ig_api_converted_points_total 50' in lines
+
+        assert 'ig_api_request_duration_seconds_bucket{endpoint="prices",le="0.01"} 0' in lines
+        assert 'ig_api_request_duration_seconds_bucket{endpoint="prices",le="0.025"} 2' in lines
+        assert 'ig_api_request_duration_seconds_bucket{endpoint="prices",le="+Inf"} 3' in lines
+        assert 'ig_api_request_duration_seconds_count{endpoint="prices"} 3' in lines
+        assert lines.count('# TYPE ig_api_request_duration_seconds histogram') == 1
+
+    def test_transport_retries_counted(self, mocker):
+        """ retries of the transport (503 responses) count as request retries """
+
+        from ig_trading_historical_data import HTTPTransport
+        from tests.mock_server import MockServer
+
+        events = []
+        ig_api = self._ig_api(mocker, CallbackSink(lambda event, fields: events.append((event, fields))))
+        ig_api.transport = HTTPTransport(backoff_factor=0)
+
+        calls = []
+
+        def watchlists(path):
+            calls.append(path)
+            return (503, {}) if len(calls) < 3 else (200, {"watchlists": []})
+
+        with MockServer({"/watchlists": watchlists}) as server:
+            ig_api.url_base = server.url_base
+            ig_api.get_watchlist()
+
+        (_, fields), = events
+        assert fields["status"] == 200
+        assert fields["retries"] == 2
@@ -0,0 +1,235 @@
+import json
+
+import pandas as pd
+import pytest
+
+from ig_trading_historical_data import IG_API, RateLimiter
+from ig_trading_historical_data.planning import (
+    AllowanceExceededError,
+    AllowanceTracker,
+    estimate_points,
+    estimate_range_points,
+    merge_ranges,
+    ranges_mask,
+    split_range,
+)
+import tests.data.mock_user_info_demo as muid
+import tests.data.mock_hist_data as mhd
+from tests.mock_server import MockServer
+
+
+class TestPlanning:
+    """ unit tests for point estimates and range chunking """
+
+    def test_estimate_and_split(self):
+        """ chunks hold at most max_points bars and cover the whole range """
+
+        assert estimate_range_points('MINUTE', '2024-01-08 00:00:00', '2024-01-08 23:59:00') == 1440
+        assert estimate_range_points('HOUR_4', '2024-01-08 00:00:00', '2024-01-10 00:00:00') == 13
+
+        chunks = split_range('MINUTE', '2024-01-08 00:00:00', '2024-01-08 23:59:00', 500)
+
+        assert chunks == [
+            ('2024-01-08 00:00:00', '2024-01-08 08:19:59'),
+            ('2024-01-08 08:20:00', '2024-01-08 16:39:59'),
+            ('2024-01-08 16:40:00', '2024-01-08 23:59:00'),
+        ]
+        assert sum(estimate_range_points('MINUTE', *c) for c in chunks) == 1440
+
+    def test_get_prices_single_asset_chunked(self, mocker):
+        """ a long range is fetched in chunks (in parallel) and merged without duplicates """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.max_points_per_request = 5
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        def prices_route(path):
+            # every response also repeats the first bar after its range (boundary bar)
+            start, end = [pd.Timestamp(x) for x in path.split("/")[-2:]]
+            times = [pd.Timestamp(p["snapshotTime"]) for p in mock_response_json["prices"]]
+            inside = [i for i, t in enumerate(times) if start <= t <= end]
+            selected = inside + [inside[-1] + 1] if inside[-1] + 1 < len(times) else inside
+
+            return 200, {**mock_response_json, "prices": [mock_response_json["prices"][i] for i in selected]}
+
+        epic = 'CF.D.GBPUSD.MAR.IP'
+        routes = {
+            f"/prices/{epic}/HOUR_4/{start}/{end}": prices_route
+            for start, end in split_range('HOUR_4', '2024-01-08 00:00:00', '2024-01-10 00:00:00', 5)
+        }
+
+        with MockServer(routes) as server:
+            ig_api.url_base = server.url_base
+
+            assert ig_api.estimate_points(
+                epic, 'HOUR_4', 'dates', '2024-01-08 00:00:00', '2024-01-10 00:00:00'
+            ) == 13
+            assert estimate_points('HOUR_4', 'dates', '2024-01-08 00:00:00', '2024-01-10 00:00:00', max_points=5) == 13
+
+            prices, allowance, instrument_type = ig_api.get_prices_single_asset(
+                epic=epic,
+                resolution='HOUR_4',
+                range_type='dates',
+                start_date='2024-01-08 00:00:00',
+                end_date='2024-01-10 00:00:00',
+                max_workers=3,
+            )
+
+        assert len(server.paths) == 3
+        assert all(prices.columns == mhd.mock_prices_dates_no_time_interval.columns)
+        assert all(prices.index == mhd.mock_prices_dates_no_time_interval.index)
+        assert (prices.round(2).values == mhd.mock_prices_dates_no_time_interval.round(2).values).all()
+
+    def test_merge_ranges(self):
+        """ days are merged into spans only where it lowers the cost """
+
+        days = [(f'2024-01-{d:02d} 10:00:00', f'2024-01-{d:02d} 10:30:00') for d in (8, 9, 10)]
+
+        # short window of fine bars: overnight bars cost more than the requests saved
+        assert merge_ranges('MINUTE_5', days, 5000) == days
+
+        # coarse bars: 1 span
+        assert merge_ranges('HOUR_4', days, 5000) == [('2024-01-08 10:00:00', '2024-01-10 10:30:00')]
+
+        # cheap requests: never merged; forced strategies
+        assert merge_ranges('HOUR_4', days, 5000, request_cost=0) == days
+        assert merge_ranges('HOUR_4', days, 5000, strategy='per_range') == days
+        assert merge_ranges('MINUTE_5', days, 5000, strategy='span') == [('2024-01-08 10:00:00', '2024-01-10 10:30:00')]
+
+        index = pd.DatetimeIndex(
+            [
+                '2024-01-08 09:55', '2024-01-08 10:00', '2024-01-08 10:30',
+                '2024-01-08 12:00', '2024-01-10 10:15', '2024-01-11 10:15',
+            ]
+        )
+        assert ranges_mask(index, days).tolist() == [False, True, True, False, True, False]
+
+    def test_time_interval_fetched_as_span(self, mocker):
+        """ time interval days merged into 1 request, filtered to the windows locally """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        epic = 'CF.D.GBPUSD.MAR.IP'
+        routes = {
+            f"/prices/{epic}/HOUR_4/2024-01-08 04:00:00/2024-01-10 16:00:00": (200, mock_response_json)
+        }
+
+        with MockServer(routes) as server:
+            ig_api.url_base = server.url_base
+
+            prices, _, _ = ig_api.get_prices_single_asset(
+                epic=epic,
+                resolution='HOUR_4',
+                range_type='dates',
+                start_date='2024-01-08 04:00:00',
+                end_date='2024-01-10 16:00:00',
+            )
+
+        assert server.paths == list(routes)
+
+        expected = mhd.mock_prices_dates_no_time_interval
+        expected = expected[(expected.index.hour >= 4) & (expected.index.hour <= 16)]
+
+        assert len(prices) == 8
+        assert all(prices.index == expected.index)
+        assert (prices.round(2).values == expected.round(2).values).all()
+
+
+class TestAllowance:
+    """ unit tests for the allowance tracker, planner and budget guard """
+
+    def test_tracker_keeps_lowest_remaining(self):
+        """ out of order responses do not raise the remaining allowance """
+
+        tracker = AllowanceTracker(clock=lambda: 0.0)
+        assert tracker.available() is None
+
+        tracker.update({"remainingAllowance": 900, "totalAllowance": 10000, "allowanceExpiry": 1000})
+        tracker.update({"remainingAllowance": 950, "totalAllowance": 10000, "allowanceExpiry": 1000})
+        assert tracker.available() == 900
+
+        reservation = tracker.reserve(600)
+        assert reservation is not None
+        assert tracker.reserve(600) is None
+        tracker.release(reservation)
+        assert tracker.available() == 900
+
+    def test_tracker_spend_of_reserved_work(self):
+        """ points spent by work in progress are not also counted as reserved """
+
+        tracker = AllowanceTracker(clock=lambda: 0.0)
+        tracker.update({"remainingAllowance": 5000, "totalAllowance": 10000, "allowanceExpiry": 1000})
+
+        reservation = tracker.reserve(1000)
+        tracker.update({"remainingAllowance": 4000, "totalAllowance": 10000, "allowanceExpiry": 1000})
+
+        assert tracker.available() == 4000
+        assert tracker.reserve(3500) is not None
+
+        # spent beyond the estimate: nothing left reserved
+        tracker.release(reservation)
+        tracker.update({"remainingAllowance": 0, "totalAllowance": 10000, "allowanceExpiry": 1000})
+        assert tracker.available() == 0
+
+    def test_budget_guard(self, mocker):
+        """ assets are fetched by priority while they fit the remaining allowance """
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+
+        with open("tests/data/mock_hist_data_num_points.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        # 100 points left, every asset costs 60
+        mock_response_json["allowance"]["remainingAllowance"] = 100
+        ig_api.allowance_tracker.update(mock_response_json["allowance"])
+
+        assets = {
+            'low': {'epic': 'EPIC.LOW'},
+            'high': {'epic': 'EPIC.HIGH', 'priority': 1},
+        }
+
+        def prices_route(path):
+            # every response spends 60 points
+            mock_response_json["allowance"]["remainingAllowance"] -= 60
+            return 200, mock_response_json
+
+        routes = {f"/prices/EPIC.{x}/MINUTE/60": prices_route for x in ['LOW', 'HIGH']}
+
+        with MockServer(routes) as server:
+            ig_api.url_base = server.url_base
+
+            plan = ig_api.plan_allowance(assets, 'MINUTE', 'num_points', num_points=60)
+            assert plan['order'] == ['high', 'low']
+            assert plan['selected'] == ['high'] and plan['skipped'] == ['low']
+
+            with pytest.raises(AllowanceExceededError):
+                ig_api.get_prices_all_assets(assets, 'MINUTE', 'num_points', num_points=60, budget_guard='raise')
+            assert server.paths == []
+
+            assets, allowance = ig_api.get_prices_all_assets(
+                assets, 'MINUTE', 'num_points', num_points=60, budget_guard='skip'
+            )
+
+        assert server.paths == ['/prices/EPIC.HIGH/MINUTE/60']
+        assert list(assets) == ['low', 'high']
+        assert 'prices' in assets['high']
+        assert isinstance(assets['low']['error'], AllowanceExceededError)
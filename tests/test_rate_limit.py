@@ -0,0 +1,100 @@
+import json
+
+from ig_trading_historical_data import (
+    FixedIntervalLimiter,
+    TokenBucketLimiter,
+    AdaptiveRateLimiter,
+)
+from ig_trading_historical_data.rate_limit import is_rate_limited
+
+
+class FakeClock:
+    """ fake monotonic clock, sleeping advances time instantly """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def send_times(limiter, clock, n):
+    """ acquire n request slots and return the time each request is sent """
+    times = []
+    for _ in range(n):
+        limiter.acquire()
+        times.append(clock.now)
+    return times
+
+
+class TestRateLimit:
+    """ unit tests for the rate limiters """
+
+    def test_fixed_interval(self):
+        """ requests start exactly 'interval' seconds apart """
+
+        clock = FakeClock()
+        limiter = FixedIntervalLimiter(3.0, clock=clock.time, sleep=clock.sleep)
+
+        assert send_times(limiter, clock, 3) == [0.0, 3.0, 6.0]
+
+    def test_token_bucket_respects_every_limit(self):
+        """ no rolling minute exceeds the tightest limit, and no slower than it allows """
+
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(
+            limits={"app_non_trading": 60, "account_non_trading": 30},
+            burst=5,
+            clock=clock.time,
+            sleep=clock.sleep,
+        )
+
+        times = send_times(limiter, clock, 100)
+
+        # burst is sent immediately
+        assert times[:5] == [0.0] * 5
+
+        # at most 30 requests in any rolling minute
+        for i, t in enumerate(times):
+            assert sum(t <= x < t + 60 for x in times[i:]) <= 30
+
+        # sustained rate is (30 - 5) requests per minute
+        assert abs((times[-1] - times[5]) / (100 - 6) - 60 / 25) < 1e-9
+
+    def test_adaptive_backs_off_and_recovers(self):
+        """ rate halves on 'exceeded' errors and recovers after successes """
+
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(
+            limits={"account_non_trading": 31},
+            cooldown=10.0,
+            recover_after=2,
+            increase=0.5,
+            clock=clock.time,
+            sleep=clock.sleep,
+        )
+        exceeded = json.dumps({"errorCode": "error.public-api.exceeded-account-allowance"}).encode()
+
+        limiter.acquire()
+        limiter.update(403, exceeded)
+        assert limiter.factor == 0.5
+
+        # cooldown before the next request, then half the rate (4s between requests)
+        times = send_times(limiter, clock, 2)
+        assert times[0] == 10.0
+        assert times[1] - times[0] == 4.0
+
+        limiter.update(200)
+        limiter.update(200)
+        assert limiter.factor == 1.0
+
+    def test_is_rate_limited(self):
+        """ weekly allowance errors are not retried, per-minute limit errors are """
+
+        assert is_rate_limited(429, b"")
+        assert is_rate_limited(403, b'{"errorCode":"error.public-api.exceeded-api-key-allowance"}')
+        assert not is_rate_limited(403, b'{"errorCode":"error.public-api.exceeded-account-historical-data-allowance"}')
+        assert not is_rate_limited(200, b"{}")
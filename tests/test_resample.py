@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pandas as pd
+import responses
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter
+from ig_trading_historical_data.conversion import frame_from_columns
+from ig_trading_historical_data.resample import finer_resolutions, resample_prices
+import tests.data.mock_user_info_demo as muid
+
+
+def make_prices(start, periods, freq, seed=0):
+    """ random 17 column prices """
+
+    rng = np.random.default_rng(seed)
+    bid = 1.27 + rng.normal(0, 0.001, (periods, 4))
+    ask = bid + 0.0002
+
+    return frame_from_columns(
+        bid,
+        ask,
+        rng.integers(1, 100, periods).astype(np.float64),
+        pd.date_range(start, periods=periods, freq=freq),
+    )
+
+
+class TestResample:
+    """ unit tests for resampling and building coarser bars from the cache """
+
+    def test_resample_prices(self):
+        """ OHLC per side, mid/spread recomputed, volume summed """
+
+        prices = make_prices('2024-01-08 00:00:00', 120, '1min')
+
+        hourly = resample_prices(prices, 'HOUR')
+
+        assert list(hourly.index) == [pd.Timestamp('2024-01-08 00:00:00'), pd.Timestamp('2024-01-08 01:00:00')]
+        assert list(hourly.columns) == list(prices.columns)
+
+        first = prices.iloc[:60]
+        for side in ('bid', 'ask'):
+            assert hourly[f'open_px_{side}'].iloc[0] == first[f'open_px_{side}'].iloc[0]
+            assert hourly[f'high_px_{side}'].iloc[0] == first[f'high_px_{side}'].max()
+            assert hourly[f'low_px_{side}'].iloc[0] == first[f'low_px_{side}'].min()
+            assert hourly[f'close_px_{side}'].iloc[0] == first[f'close_px_{side}'].iloc[-1]
+
+        assert hourly['high_px_mid'].iloc[0] == (hourly['high_px_bid'].iloc[0] + hourly['high_px_ask'].iloc[0]) / 2
+        assert np.isclose(hourly['low_px_spread'].iloc[0], hourly['low_px_ask'].iloc[0] - hourly['low_px_bid'].iloc[0])
+        assert hourly['last_traded_volume'].iloc[0] == first['last_traded_volume'].sum()
+
+        assert finer_resolutions('HOUR')[:2] == ['MINUTE_30', 'MINUTE_15']
+        assert 'MINUTE_30' in finer_resolutions('HOUR_3')
+        assert 'HOUR_3' not in finer_resolutions('HOUR_2')
+
+    @responses.activate
+    def test_prices_built_from_finer_bars(self, mocker):
+        """ bars covered by finer stored bars are built locally, only the rest is fetched """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.cache = PriceCache(":memory:")
+
+        epic = 'CS.D.GBPUSD.TODAY.IP'
+
+        # MINUTE_15 bars stored for the first 12 hours
+        fine = make_prices('2024-01-08 00:00:00', 48, '15min')
+        ig_api.cache.write(epic, 'MINUTE_15', fine, '2024-01-08 00:00:00', '2024-01-08 11:59:59', 'CURRENCIES')
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        # estimates do not write: built bars are left out, nothing is stored
+        assert ig_api.estimate_points(epic, 'HOUR', 'dates', '2024-01-08 00:00:00', '2024-01-08 23:00:00') == 12
+        assert ig_api.cache.stored_range(epic, 'HOUR') is None
+
+        # only the hours without finer bars are requested
+        responses.get(
+            f"{muid.mock_url_base}/prices/{epic}/HOUR/2024-01-08 12:00:00/2024-01-08 23:00:00",
+            json={**mock_response_json, "prices": []},
+            status=200,
+        )
+
+        prices, allowance, instrument_type = ig_api.get_prices_single_asset(
+            epic, 'HOUR', 'dates', '2024-01-08 00:00:00', '2024-01-08 23:00:00'
+        )
+
+        assert len(responses.calls) == 1
+        assert len(prices) == 12
+        assert np.allclose(prices.values, resample_prices(fine, 'HOUR').values)
+        assert instrument_type == 'CURRENCIES'
+
+        # all stored now
+        assert ig_api.estimate_points(epic, 'HOUR', 'dates', '2024-01-08 00:00:00', '2024-01-08 23:00:00') == 0
@@ -0,0 +1,141 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ig_trading_historical_data import IG_API, ShardedFetcher
+import tests.data.mock_hist_data as mhd
+from tests.mock_server import MockServer
+
+
+def session_account(url_base, i, **kwargs):
+    """ account spec of a saved session served by the mock server """
+
+    return {
+        "session": {
+            "demo": 1,
+            "api_key": f"api_key_{i}",
+            "token_cst": f"CST_{i}",
+            "token_x_security_token": f"X-SECURITY-TOKEN_{i}",
+            "acc_info": {"lightstreamerEndpoint": "", "timezoneOffset": 0},
+        },
+        "url_base": url_base,
+        **kwargs,
+    }
+
+
+class TestShardedFetcher:
+    """ unit tests for the ShardedFetcher scheduler and shards """
+
+    def _routes(self, epics):
+        with open("tests/data/mock_hist_data_num_points.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        routes = {f"/prices/{epic}/MINUTE_5/2": (200, mock_response_json) for epic in epics}
+
+        return routes, mock_response_json
+
+    def test_schedule_by_remaining_allowance(self):
+        """ assets go to the account with the most allowance left """
+
+        fetcher = ShardedFetcher(
+            [{"session": {}, "remaining": 100}, {"session": {}, "remaining": 250}, {"session": {}, "remaining": 0}]
+        )
+        assets = {name: {"epic": f"EPIC.{name}"} for name in "ABCDEF"}
+        assets["F"]["priority"] = 1
+
+        plan = fetcher.schedule(assets, 'MINUTE', 'num_points', num_points=60)
+
+        assert plan["points"] == {name: 60 for name in "ABCDEF"}
+        # free: 250 > 190 > 130 (vs 100) > 100 (vs 70) > 70 (vs 40), then 40/10/0 left
+        assert plan["shards"] == [["C"], ["F", "A", "B", "D"], []]
+        assert plan["skipped"] == ["E"]
+
+        fetcher.remaining = [100, 100, None]
+        plan = fetcher.schedule(assets, 'MINUTE', 'num_points', num_points=120)
+
+        # only the account of unknown allowance can take 120 points
+        assert plan["shards"] == [[], [], list("FABCDE")]
+
+        fetcher.remaining = [100, 100, 100]
+        assert fetcher.schedule(assets, 'MINUTE', 'num_points', num_points=120)["skipped"] == list("FABCDE")
+
+    def test_schedule_dates(self):
+        """ date range estimates need no IG_API instance (as IG_API.estimate_points without cache) """
+
+        fetcher = ShardedFetcher([{"session": {}, "remaining": 20}])
+        assets = {name: {"epic": f"EPIC.{name}"} for name in "AB"}
+
+        plan = fetcher.schedule(assets, 'HOUR_4', 'dates', '2024-01-08 00:00:00', '2024-01-10 00:00:00')
+
+        assert plan["points"] == {"A": 13, "B": 13}
+        assert plan["shards"] == [["A"]]
+        assert plan["skipped"] == ["B"]
+
+    def test_budget_guard(self, mocker):
+        """ the shards fetch with the fetcher's budget guard """
+
+        routes, _ = self._routes(["EPIC.A"])
+        get_prices_all_assets = mocker.spy(IG_API, "get_prices_all_assets")
+
+        with MockServer(routes) as server:
+            fetcher = ShardedFetcher(
+                [session_account(server.url_base, 0)], executor=ThreadPoolExecutor(1), budget_guard=None
+            )
+            assets, _ = fetcher.fetch({"A": {"epic": "EPIC.A"}}, 'MINUTE_5', 'num_points', num_points=2)
+
+        assert "error" not in assets["A"]
+        assert get_prices_all_assets.call_args.kwargs["budget_guard"] is None
+
+    def test_fetch_in_processes(self):
+        """ each account fetches its shard in its own process; results merged in order """
+
+        epics = [f"EPIC.{i}" for i in range(6)]
+        routes, mock_response_json = self._routes(epics)
+
+        assets = {f"asset {i}": {"epic": epic} for i, epic in enumerate(epics)}
+
+        with MockServer(routes, latency=0.05) as server:
+            fetcher = ShardedFetcher(
+                [session_account(server.url_base, i, remaining=10) for i in range(3)]
+            )
+            assets, allowances = fetcher.fetch(assets, 'MINUTE_5', 'num_points', num_points=2)
+
+        assert list(assets) == [f"asset {i}" for i in range(6)]
+
+        for i, epic in enumerate(epics):
+            d = assets[f"asset {i}"]
+            assert d["account"] in (0, 1, 2)
+            assert all(d["prices"].index == mhd.mock_prices_num_points.index)
+            assert d["instrument_type"] == mock_response_json["instrumentType"]
+
+        # 6 assets of 2 points, 10 points per account: 2 per account
+        assert sorted(d["account"] for d in assets.values()) == [0, 0, 1, 1, 2, 2]
+        assert allowances == [mock_response_json["allowance"]] * 3
+        assert fetcher.remaining == [mock_response_json["allowance"]["remainingAllowance"]] * 3
+
+    def test_fetch_to_store(self, tmp_path):
+        """ shards write to a shared ParquetStore instead of returning the prices """
+
+        pytest.importorskip("pyarrow")
+        from ig_trading_historical_data import ParquetStore
+
+        epics = ["EPIC.A", "EPIC.B"]
+        routes, _ = self._routes(epics)
+
+        with MockServer(routes) as server:
+            fetcher = ShardedFetcher(
+                [session_account(server.url_base, i) for i in range(2)],
+                executor=ThreadPoolExecutor(2),
+                store=str(tmp_path),
+            )
+            assets, _ = fetcher.fetch(
+                {epic: {"epic": epic} for epic in epics}, 'MINUTE_5', 'num_points', num_points=2
+            )
+
+        assert sorted(d["account"] for d in assets.values()) == [0, 1]
+        assert all("prices" not in d for d in assets.values())
+
+        for epic in epics:
+            prices = ParquetStore(str(tmp_path)).read(epic, 'MINUTE_5')
+            assert all(prices.index == mhd.mock_prices_num_points.index)
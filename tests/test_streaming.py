@@ -0,0 +1,108 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter
+from ig_trading_historical_data.streaming import decode_update
+import tests.data.mock_user_info_demo as muid
+from tests.mock_lightstreamer import MockLightstreamer
+from tests.mock_server import MockServer
+
+
+class TestStreaming:
+    """ unit tests for the Lightstreamer client and stream_candles() method """
+
+    def test_decode_update(self):
+        """ unchanged ('' and '^n'), null ('#'), empty ('$') and encoded values """
+
+        previous = ["a", "b", "c", "d", "e"]
+
+        assert decode_update("|x|^2|#", previous) == ["a", "x", "c", "d", None]
+        assert decode_update("$|%7C||^1|1", previous) == ["", "|", "c", "d", "1"]
+
+    def test_stream_candles(self, mocker):
+        """ candles are assembled from the updates of a (rebound) stream, and stored """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.header_base = muid.mock_header_base
+        ig_api.acc_info = {"currentAccountId": "ABC123"}
+        ig_api.token_cst = "test_CST"
+        ig_api.token_x_security_token = "test_X-SECURITY-TOKEN"
+        ig_api.utc_offset = 0
+        ig_api.cache = PriceCache(":memory:")
+        ig_api.rate_limiter = RateLimiter()
+
+        # instrument types are read from the market details (EURUSD: not found)
+        markets = {"/markets/CS.D.GBPUSD.TODAY.IP": (200, {"instrument": {"type": "CURRENCIES"}})}
+
+        streams = [
+            [
+                "SUBOK,1,2,11",
+                # GBPUSD 10:00 candle: opened, then updated and completed (CONS_END=1)
+                "U,1,1,1704708000000|1.2700|1.2705|1.2698|1.2702|1.2701|1.2706|1.2699|1.2703|10|0",
+                "U,1,1,|||1.2697|1.2701|^3|1.2702|12|1",
+                "PROBE",
+                # EURUSD 10:00 candle, no volume
+                "U,1,2,1704708000000|1.0900|1.0910|1.0890|1.0905|1.0901|1.0911|1.0891|1.0906|#|0",
+                "LOOP,0",
+            ],
+            [
+                # next EURUSD candle: the 10:00 one is complete
+                "U,1,2,1704708060000|1.0905|1.0905|1.0905|1.0905|1.0906|1.0906|1.0906|1.0906|1|0",
+            ],
+        ]
+
+        with MockLightstreamer(streams) as server, MockServer(markets) as rest:
+            ig_api.ls_addr = server.url_base
+            ig_api.url_base = rest.url_base
+
+            candles = ig_api.stream_candles(
+                ['CS.D.GBPUSD.TODAY.IP', 'CS.D.EURUSD.TODAY.IP'], 'MINUTE', store=1
+            )
+            received = list(itertools.islice(candles, 2))
+            candles.close()
+
+        (epic_1, candle_1), (epic_2, candle_2) = received
+
+        assert epic_1 == 'CS.D.GBPUSD.TODAY.IP'
+        assert list(candle_1.index) == [pd.Timestamp('2024-01-08 10:00:00')]
+        assert candle_1['open_px_bid'].iloc[0] == 1.27
+        assert candle_1['low_px_bid'].iloc[0] == 1.2697
+        assert candle_1['high_px_ask'].iloc[0] == 1.2706
+        assert candle_1['close_px_ask'].iloc[0] == 1.2702
+        assert np.isclose(candle_1['close_px_spread'].iloc[0], 0.0001)
+        assert candle_1['last_traded_volume'].iloc[0] == 12
+
+        assert epic_2 == 'CS.D.EURUSD.TODAY.IP'
+        assert candle_2['close_px_bid'].iloc[0] == 1.0905
+        assert np.isnan(candle_2['last_traded_volume'].iloc[0])
+
+        # stored on the way, the candle's period marked as fetched
+        stored = ig_api.cache.read('CS.D.GBPUSD.TODAY.IP', 'MINUTE')
+        assert stored.index.equals(candle_1.index)
+        assert ig_api.cache.missing(
+            'CS.D.GBPUSD.TODAY.IP', 'MINUTE', '2024-01-08 10:00:00', '2024-01-08 10:00:59'
+        ) == []
+        assert ig_api.cache.instrument_type('CS.D.GBPUSD.TODAY.IP') == 'CURRENCIES'
+
+        # 1 market details request per epic (unknown epics: 404, type stays unknown)
+        assert sorted(rest.paths) == ['/markets/CS.D.EURUSD.TODAY.IP', '/markets/CS.D.GBPUSD.TODAY.IP']
+
+        paths = [path for path, _ in server.requests]
+        assert paths == [
+            "/lightstreamer/create_session.txt",
+            "/lightstreamer/control.txt",
+            "/lightstreamer/bind_session.txt",
+            "/lightstreamer/control.txt",
+        ]
+
+        create, add = server.requests[0][1], server.requests[1][1]
+        assert create["LS_user"] == "ABC123"
+        assert create["LS_password"] == "CST-test_CST|XST-test_X-SECURITY-TOKEN"
+        assert add["LS_group"] == "CHART:CS.D.GBPUSD.TODAY.IP:1MINUTE CHART:CS.D.EURUSD.TODAY.IP:1MINUTE"
+        assert add["LS_schema"].split()[0] == "UTM"
+        assert server.requests[3][1]["LS_op"] == "destroy"
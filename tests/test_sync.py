@@ -0,0 +1,72 @@
+import json
+import pytest
+import responses
+
+from ig_trading_historical_data import IG_API, PriceCache, RateLimiter
+import tests.data.mock_user_info_demo as muid
+import tests.data.mock_hist_data as mhd
+
+
+class TestSync:
+    """ unit tests for sync() method """
+
+    @responses.activate
+    def test_sync_fetches_holes_and_new_bars_only(self, mocker):
+        """ only holes in the stored series and bars after the last stored one are fetched """
+
+        """ mocking the class initialization """
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+        ig_api.url_base = muid.mock_url_base
+        ig_api.header_base = muid.mock_header_base
+        ig_api.rate_limiter = RateLimiter()
+        ig_api.cache = PriceCache(":memory:")
+
+        epic = 'CF.D.GBPUSD.MAR.IP'
+        prices = mhd.mock_prices_dates_no_time_interval
+
+        # stored: 2 ranges with a hole in between
+        ig_api.cache.write(epic, 'HOUR_4', prices.iloc[:3], '2024-01-08 00:00:00', '2024-01-08 08:00:00')
+        ig_api.cache.write(epic, 'HOUR_4', prices.iloc[6:9], '2024-01-09 00:00:00', '2024-01-09 08:00:00')
+
+        with open("tests/data/mock_hist_data_dates_no_time_interval.json", "r") as f:
+            mock_response_json = json.load(f)
+
+        url = f"{muid.mock_url_base}/prices/{epic}/HOUR_4"
+        hole_url = f"{url}/2024-01-08 08:00:01/2024-01-08 23:59:59"
+        tail_url = f"{url}/2024-01-09 08:00:01/2024-01-10 00:00:00"
+
+        responses.get(hole_url, json={**mock_response_json, "prices": mock_response_json["prices"][3:6]}, status=200)
+        responses.get(tail_url, json={**mock_response_json, "prices": mock_response_json["prices"][9:]}, status=200)
+
+        new_prices, allowance, instrument_type = ig_api.sync(epic, 'HOUR_4', end_date='2024-01-10 00:00:00')
+
+        assert len(responses.calls) == 2
+        assert len(new_prices) == 7
+        assert instrument_type == mock_response_json["instrumentType"]
+
+        stored = ig_api.cache.read(epic, 'HOUR_4')
+        assert all(stored.index == prices.index)
+        assert (stored.round(2).values == prices.round(2).values).all()
+
+        # nothing missing anymore
+        new_prices, _, _ = ig_api.sync(epic, 'HOUR_4', end_date='2024-01-10 00:00:00')
+
+        assert len(responses.calls) == 2
+        assert new_prices.empty
+
+    def test_sync_needs_cache(self, mocker):
+        """ sync without a cache (or without a start) raises ValueError """
+
+        mocker.patch.object(IG_API, '__init__', return_value=None)
+
+        ig_api = IG_API(**muid.mock_user_info_demo)
+
+        with pytest.raises(ValueError):
+            ig_api.sync('CF.D.GBPUSD.MAR.IP', 'HOUR_4')
+
+        ig_api.cache = PriceCache(":memory:")
+
+        with pytest.raises(ValueError):
+            ig_api.sync('CF.D.GBPUSD.MAR.IP', 'HOUR_4')
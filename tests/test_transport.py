@@ -0,0 +1,87 @@
+import json
+import responses
+
+from ig_trading_historical_data import IG_API, HTTPTransport
+import tests.data.mock_user_info_demo as muid
+
+
+class MockResponse:
+    """ minimal stand-in for requests.Response """
+
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode()
+
+    def json(self):
+        return self.payload
+
+
+class MockTransport:
+    """ local stand-in transport recording every request """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append(("GET", url))
+        return self.routes[url]
+
+    def post(self, url, headers=None, **kwargs):
+        self.calls.append(("POST", url))
+        return self.routes[url]
+
+
+class TestTransport:
+    """ unit tests for the HTTP transport layer """
+
+    def test_injected_transport_used_by_all_methods(self):
+        """ log in and get watchlist through an injected stand-in transport """
+
+        with open("tests/data/mock_acc_info.json", "r") as f:
+            mock_acc_info_json = json.load(f)
+
+        with open("tests/data/mock_watchlist.json", "r") as f:
+            mock_watchlist_json = json.load(f)
+
+        transport = MockTransport(
+            {
+                f"{muid.mock_url_base}/session": MockResponse(
+                    mock_acc_info_json,
+                    headers={"CST": "test_CST", "X-SECURITY-TOKEN": "test_X-SECURITY-TOKEN"},
+                ),
+                f"{muid.mock_url_base}/watchlists": MockResponse(mock_watchlist_json),
+            }
+        )
+
+        ig_api = IG_API(**muid.mock_user_info_demo, transport=transport)
+        result = ig_api.get_watchlist()
+
+        assert ig_api.transport is transport
+        assert transport.calls == [
+            ("POST", f"{muid.mock_url_base}/session"),
+            ("GET", f"{muid.mock_url_base}/watchlists"),
+        ]
+        assert result['watchlists'][0]['id'] == mock_watchlist_json['watchlists'][0]['id']
+
+    @responses.activate
+    def test_default_transport_reuses_session(self):
+        """ default transport is pooled and shared by consecutive requests """
+
+        responses.get(f"{muid.mock_url_base}/watchlists", json={"watchlists": []}, status=200)
+
+        transport = HTTPTransport(pool_maxsize=4, max_retries=2, timeout=1.0)
+        adapter = transport.session.get_adapter(muid.mock_url_base)
+
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 2
+
+        transport.get(f"{muid.mock_url_base}/watchlists")
+        transport.get(f"{muid.mock_url_base}/watchlists")
+
+        assert len(responses.calls) == 2
+        assert transport.session.get_adapter(muid.mock_url_base) is adapter
+
+        transport.close()